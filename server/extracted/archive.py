@@ -0,0 +1,216 @@
+"""
+Archival of closed queries.
+
+Approved, rejected and completed queries older than ARCHIVE_RETENTION_DAYS
+are moved, together with their responses and files, from the live tables
+into query_archive, response_archive and file_archive. This keeps the
+tables scanned by the review and triage dashboards small. Rows keep their
+primary keys, so an archived response still points at its archived query;
+the live tables use AUTOINCREMENT on SQLite so archived keys are never
+handed out again. Files created before that may hold live rows that reuse
+an archived key; those queries are left in the live tables.
+
+Queries are moved oldest first in batches of ARCHIVE_BATCH_SIZE, one
+transaction per batch, so the single writer connection is only held
+briefly and a failed run leaves each query either live or archived.
+
+The job runs in the application every ARCHIVE_INTERVAL_SECONDS when that
+is set, or by hand against DATABASE_URL with:
+
+    python -m db.archive --retention-days 90
+"""
+
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import DateTime, delete, exists, insert, literal
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from dotenv import load_dotenv
+
+from db.database import async_engine
+from models import File, FileArchive, Query, QueryArchive, Response, ResponseArchive, StatusEnum
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Archival configuration; the periodic job is off unless an interval is set
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", 90))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 500))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", 0))
+
+# Statuses after which a query no longer changes
+ARCHIVABLE_STATUSES = (StatusEnum.APPROVED, StatusEnum.REJECTED, StatusEnum.COMPLETED)
+
+# Live table and its archive, parents first
+ARCHIVE_TABLES = (
+    (Query.__table__, QueryArchive.__table__),
+    (Response.__table__, ResponseArchive.__table__),
+    (File.__table__, FileArchive.__table__),
+)
+
+
+async def archive_batch(conn: AsyncConnection, cutoff: datetime, batch_size: int) -> int:
+    """
+    Move the oldest batch of closed queries created before cutoff.
+
+    The batch is copied into the archive tables with INSERT ... SELECT and
+    then deleted from the live tables, children first. Queries with a row
+    whose key is already in the archive are skipped. The caller owns the
+    transaction.
+
+    Args:
+        conn: A connection inside a transaction
+        cutoff: Only queries created before this time are moved
+        batch_size: Maximum number of queries to move
+
+    Returns:
+        Number of queries moved
+    """
+    # Skip queries with a row whose key is already taken in the archive
+    no_conflicts = []
+    for live, archive in ARCHIVE_TABLES:
+        conflict = exists().where(archive.c.id == live.c.id)
+        if live is not Query.__table__:
+            conflict = conflict.where(live.c.query_id == Query.id)
+        no_conflicts.append(~conflict)
+    result = await conn.execute(
+        select(Query.id)
+        .where(Query.status.in_(ARCHIVABLE_STATUSES), Query.created_at < cutoff, *no_conflicts)
+        .order_by(Query.created_at, Query.id)
+        .limit(batch_size)
+    )
+    ids = result.scalars().all()
+    if not ids:
+        return 0
+
+    archived_at = datetime.utcnow()
+    for live, archive in ARCHIVE_TABLES:
+        key = live.c.id if live is Query.__table__ else live.c.query_id
+        names = [column.name for column in archive.c if column.name in live.c]
+        columns = [live.c[name] for name in names]
+        if "archived_at" in archive.c:
+            names.append("archived_at")
+            columns.append(literal(archived_at, DateTime))
+        await conn.execute(
+            insert(archive).from_select(names, select(*columns).where(key.in_(ids)))
+        )
+
+    for live, _ in reversed(ARCHIVE_TABLES):
+        key = live.c.id if live is Query.__table__ else live.c.query_id
+        await conn.execute(delete(live).where(key.in_(ids)))
+    return len(ids)
+
+
+async def archive_closed_queries(
+    engine: AsyncEngine = async_engine,
+    retention_days: int = ARCHIVE_RETENTION_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    max_batches: Optional[int] = None,
+) -> int:
+    """
+    Archive closed queries older than the retention window.
+
+    Args:
+        engine: The async engine to write through
+        retention_days: Age in days after which closed queries are archived
+        batch_size: Queries moved per transaction
+        max_batches: Stop after this many batches (None for all)
+
+    Returns:
+        Number of queries archived
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        async with engine.begin() as conn:
+            moved = await archive_batch(conn, cutoff, batch_size)
+        if not moved:
+            break
+        total += moved
+        batches += 1
+        # Let waiting request handlers have the writer between batches
+        await asyncio.sleep(0)
+    if total:
+        logger.info("Archived %d queries created before %s", total, cutoff.isoformat())
+    return total
+
+
+async def get_archived_query(session: AsyncSession, query_id: str) -> Optional[QueryArchive]:
+    """
+    Look up an archived query by its public ID.
+    """
+    result = await session.exec(select(QueryArchive).where(QueryArchive.query_id == query_id))
+    return result.first()
+
+
+class ArchiveScheduler:
+    """
+    Background task running the archival job at a fixed interval.
+    """
+
+    def __init__(self, interval: float = ARCHIVE_INTERVAL_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.archived = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        """
+        Start the periodic job, unless it is disabled or already running.
+        """
+        if self._task is not None or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run(), name="query-archiver")
+
+    async def stop(self) -> None:
+        """
+        Stop the periodic job. A batch in progress is rolled back.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.archived += await archive_closed_queries()
+            except Exception as e:
+                logger.exception("Archiving closed queries failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+
+# Process-wide scheduler, started and stopped by main.lifespan
+archive_scheduler = ArchiveScheduler()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description="Move closed queries older than the retention window to the archive tables")
+    parser.add_argument("--retention-days", type=int, default=ARCHIVE_RETENTION_DAYS, help="Archive closed queries older than this")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Queries moved per transaction")
+    args = parser.parse_args()
+
+    async def main() -> None:
+        from db.init_db import init_db
+        await init_db()
+        archived = await archive_closed_queries(retention_days=args.retention_days, batch_size=args.batch_size)
+        print(f"Archived {archived} queries")
+        await async_engine.dispose()
+
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+import os
+import json
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+from agents.llm_client import post_chat_completion
+from agents.cache import get_agent_cache, make_cache_key
+from agents.resilience import LLMUnavailableError
+from agents.deadline import has_budget
+from models import QueryAssessment
+
+# Load environment variables
+load_dotenv()
+
+# Get OpenAI API key from environment variables
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+
+# MCP configuration
+MCP_ENABLED = os.getenv("MCP_ENABLED", "True").lower() == "true"
+
+# Fused mode replaces the enhancer -> scorer -> triage chain with one call
+FUSED_AGENT_ENABLED = os.getenv("FUSED_AGENT_ENABLED", "False").lower() == "true"
+
+# Prompt settings, part of the result cache key
+PROMPT_VERSION = "1"
+TEMPERATURE = 0.1  # Low temperature for consistent scoring
+
+
+async def assess_query(query_text: str) -> Optional[QueryAssessment]:
+    """
+    Enhance, safety score and triage a medical query in a single model call.
+    
+    The model is asked for a strict JSON object which is validated against
+    the QueryAssessment schema. Callers fall back to the separate enhancer,
+    scorer and triage agents when this returns None.
+    
+    Args:
+        query_text: The original query text from the user
+        
+    Returns:
+        The validated assessment, or None if it is unavailable or invalid
+    """
+    # The MCP agents are local, so there are no round trips to fuse
+    if MCP_ENABLED or not OPENAI_API_KEY:
+        return None
+    # Leave a tight deadline to the chain, whose stages can degrade one by one
+    if not has_budget("assess"):
+        return None
+    
+    key = make_cache_key("assessor", query_text, OPENAI_MODEL, TEMPERATURE, PROMPT_VERSION)
+    try:
+        result = await get_agent_cache().get_or_compute(
+            "assessor", key, lambda: assess_query_with_openai(query_text),
+            is_fallback=lambda assessment: assessment is None
+        )
+    except LLMUnavailableError as e:
+        print(f"OpenAI unavailable, skipping fused assessment: {e}")
+        return None
+    return QueryAssessment.model_validate(result) if result is not None else None
+
+
+def parse_assessment(content: str) -> Optional[QueryAssessment]:
+    """
+    Parse and validate the fused agent's JSON output.
+    
+    Args:
+        content: The raw model output
+        
+    Returns:
+        The validated assessment, or None if parsing or validation fails
+    """
+    try:
+        data = json.loads(content)
+        if isinstance(data.get("triage_level"), str):
+            data["triage_level"] = data["triage_level"].strip().lower()
+        return QueryAssessment.model_validate(data)
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"Failed to parse fused assessment: {e}")
+        return None
+
+
+async def assess_query_with_openai(query_text: str) -> Optional[Dict[str, Any]]:
+    """
+    Assess a medical query using one direct OpenAI API call.
+    
+    Args:
+        query_text: The original query text from the user
+        
+    Returns:
+        The assessment as a JSON-serializable dict, or None on failure
+    """
+    # Prepare the prompt for the OpenAI API
+    system_prompt = (
+        "You are a medical query assessment agent. For the user's medical query, do three things: "
+        "1) enhance the query by adding relevant medical context and clarifying ambiguities, without "
+        "diagnosing or giving advice; 2) rate its safety from 0.0 (high risk) to 1.0 (low risk), "
+        "considering urgency, severity, complexity and potential for harm if answered incorrectly; "
+        "3) assign a triage level of low, medium, high or urgent. Respond with only a JSON object "
+        'of the form {"enhanced_query": string, "safety_score": number, "triage_level": string}.'
+    )
+    
+    # Make the API request over the shared HTTP client
+    response = await post_chat_completion("assessor", {
+        "model": OPENAI_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": query_text}
+        ],
+        "temperature": TEMPERATURE,
+        "max_tokens": 600,
+        "response_format": {"type": "json_object"}
+    })
+    
+    # Parse the response
+    if response.status_code == 200:
+        result = response.json()
+        assessment = parse_assessment(result["choices"][0]["message"]["content"])
+        return assessment.model_dump(mode="json") if assessment else None
+    else:
+        print(f"OpenAI API error: {response.status_code} - {response.text}")
+        return None
@@ -0,0 +1,128 @@
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Collect individual requests into small batches for one upstream call.
+
+    Items are buffered until ``max_batch_size`` items are waiting or
+    ``max_wait`` seconds have passed since the first one arrived, then
+    ``batch_fn`` is called with all buffered items. It must return one result
+    per item, in order; a result of None marks a per-item failure, which is
+    retried on its own with ``item_fn``. If the whole batch call fails every
+    item falls back to ``item_fn``.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Awaitable[List[Optional[Any]]]],
+        item_fn: Callable[[Any], Awaitable[Any]],
+        max_batch_size: int = 16,
+        max_wait: float = 0.02,
+    ):
+        self.batch_fn = batch_fn
+        self.item_fn = item_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: List[Tuple[Any, "asyncio.Future[Any]", float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.item_fallbacks = 0
+        self.batch_failures = 0
+        self.max_observed_batch = 0
+        self.total_wait = 0.0
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Add an item to the current batch and wait for its result.
+
+        Args:
+            item: The input to process
+
+        Returns:
+            The result for this item
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.monotonic()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, "asyncio.Future[Any]", float]]) -> None:
+        started = time.monotonic()
+        self.batches += 1
+        self.items += len(batch)
+        self.max_observed_batch = max(self.max_observed_batch, len(batch))
+        self.total_wait += sum(started - enqueued for _, _, enqueued in batch)
+
+        items = [item for item, _, _ in batch]
+        try:
+            results = await self.batch_fn(items)
+            if len(results) != len(items):
+                raise ValueError(f"Expected {len(items)} results, got {len(results)}")
+        except Exception as e:
+            logger.warning("Batch of %d failed, falling back to single calls: %s", len(items), e)
+            self.batch_failures += 1
+            results = [None] * len(items)
+
+        await asyncio.gather(*(
+            self._resolve(item, future, result)
+            for (item, future, _), result in zip(batch, results)
+        ))
+
+    async def _resolve(self, item: Any, future: "asyncio.Future[Any]", result: Optional[Any]) -> None:
+        if future.done():
+            return
+        if result is None:
+            self.item_fallbacks += 1
+            try:
+                result = await self.item_fn(item)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                return
+        if not future.done():
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get batching metrics for monitoring.
+
+        Returns:
+            Dictionary with batch counts, sizes and queueing delay
+        """
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_observed_batch,
+            "avg_wait_ms": 1000 * self.total_wait / self.items if self.items else 0.0,
+            "item_fallbacks": self.item_fallbacks,
+            "batch_failures": self.batch_failures,
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+"""
+Benchmark for the shared LLM HTTP client.
+
+Simulates the three sequential agent calls made by each ``create_query``
+request (enhancer, scorer, triage) and compares opening a new
+``httpx.AsyncClient`` per call against the pooled client from
+``agents.llm_client``. Reports the connection reuse rate and the latency
+saved per ``create_query`` call.
+
+By default the calls go to a local keep-alive HTTP server started by this
+script, which counts accepted TCP connections. Loopback has no TLS
+handshake, so savings against a real HTTPS endpoint are larger; use
+``--url`` to point the benchmark at a real or stand-in endpoint.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from agents.llm_client import create_http_client
+
+AGENT_CALLS_PER_QUERY = 3
+
+COMPLETION_BODY = json.dumps({
+    "choices": [{"message": {"role": "assistant", "content": "0.8"}}]
+}).encode()
+
+
+class CountingServer:
+    """
+    Minimal HTTP/1.1 keep-alive server that counts accepted connections.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.connections = 0
+        self.requests = 0
+        self.server = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode("latin-1").split("\r\n"):
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(COMPLETION_BODY)).encode() + b"\r\n\r\n" + COMPLETION_BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1/chat/completions"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+PAYLOAD = {
+    "model": "benchmark",
+    "messages": [{"role": "user", "content": "I have had a headache for three days."}],
+    "max_tokens": 10,
+}
+
+
+async def create_query_per_call_clients(url: str):
+    """The previous behaviour: every agent call opens its own client."""
+    for _ in range(AGENT_CALLS_PER_QUERY):
+        async with httpx.AsyncClient() as client:
+            response = await client.post(url, json=PAYLOAD, timeout=30.0)
+            response.raise_for_status()
+
+
+async def create_query_shared_client(client: httpx.AsyncClient, url: str):
+    """The pooled behaviour: all agent calls reuse the app-scoped client."""
+    for _ in range(AGENT_CALLS_PER_QUERY):
+        response = await client.post(url, json=PAYLOAD, timeout=30.0)
+        response.raise_for_status()
+
+
+async def run_mode(name, make_call, queries: int, concurrency: int, server):
+    """Run ``queries`` simulated create_query calls and collect latencies."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    connections_before = server.connections if server else 0
+    requests_before = server.requests if server else 0
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await make_call()
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(queries)))
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "mode": name,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p95_ms": sorted(latencies)[int(len(latencies) * 0.95) - 1] * 1000,
+        "throughput": queries / elapsed,
+    }
+    if server:
+        connections = server.connections - connections_before
+        requests = server.requests - requests_before
+        result["connections"] = connections
+        result["requests"] = requests
+        result["reuse_rate"] = 1 - connections / requests if requests else 0.0
+    return result
+
+
+def print_result(result):
+    line = (
+        f"{result['mode']:>10}: mean {result['mean_ms']:.2f} ms/create_query, "
+        f"p95 {result['p95_ms']:.2f} ms, {result['throughput']:.0f} queries/s"
+    )
+    if "reuse_rate" in result:
+        line += (
+            f", {result['connections']} connections for {result['requests']} requests "
+            f"(reuse rate {result['reuse_rate']:.1%})"
+        )
+    print(line)
+
+
+async def main(args):
+    server = None
+    url = args.url
+    if not url:
+        server = CountingServer(latency_ms=args.latency_ms)
+        url = await server.start()
+
+    print(f"Benchmarking {args.queries} create_query calls ({AGENT_CALLS_PER_QUERY} agent calls each) against {url}")
+
+    per_call = await run_mode(
+        "per-call", lambda: create_query_per_call_clients(url), args.queries, args.concurrency, server
+    )
+
+    client = create_http_client()
+    try:
+        shared = await run_mode(
+            "shared", lambda: create_query_shared_client(client, url), args.queries, args.concurrency, server
+        )
+    finally:
+        await client.aclose()
+
+    print_result(per_call)
+    print_result(shared)
+    print(f"Latency saved per create_query: {per_call['mean_ms'] - shared['mean_ms']:.2f} ms")
+
+    if server:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs per-call LLM HTTP clients")
+    parser.add_argument("--queries", type=int, default=500, help="Number of simulated create_query calls")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent create_query calls")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated server latency per request")
+    parser.add_argument("--url", help="Benchmark against this chat completions URL instead of a local server")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+"""
+Benchmark for the secondary indexes on the query, response and file tables.
+
+Builds a SQLite database file shaped like an existing deployment (tables
+without the newer indexes), fills it with synthetic rows, and times the hot
+lookups before and after running the index migration from
+``db.migrations``. The migration itself is timed too, since it runs on
+startup against databases that already hold data.
+
+Example:
+
+    python benchmark_indexes.py --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.engine import Connection
+from sqlmodel import SQLModel
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from models import File, Query, Response, StatusEnum, TriageLevelEnum
+from db.migrations import create_missing_indexes
+
+CHUNK_SIZE = 50_000
+START = datetime(2024, 1, 1)
+
+STATUS_WEIGHTS = {
+    StatusEnum.COMPLETED: 0.55,
+    StatusEnum.APPROVED: 0.2,
+    StatusEnum.REJECTED: 0.05,
+    StatusEnum.NEEDS_REVIEW: 0.1,
+    StatusEnum.PROCESSING: 0.05,
+    StatusEnum.PENDING: 0.05,
+}
+
+
+def populate(conn: Connection, rows: int, rng: random.Random) -> List[str]:
+    """
+    Insert ``rows`` queries, one response per reviewed query and a file for
+    every tenth query. Returns the query_ids for lookups.
+    """
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    levels = list(TriageLevelEnum)
+    query_ids: List[str] = []
+
+    for offset in range(0, rows, CHUNK_SIZE):
+        queries, responses, files = [], [], []
+        for row_id in range(offset + 1, min(rows, offset + CHUNK_SIZE) + 1):
+            created_at = START + timedelta(seconds=30 * row_id + rng.randint(0, 29))
+            status = rng.choices(statuses, weights)[0]
+            query_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            query_ids.append(query_id)
+            queries.append({
+                "id": row_id, "query_id": query_id, "query_text": f"Synthetic query {row_id}",
+                "status": status, "triage_level": rng.choice(levels), "safety_score": rng.random(),
+                "created_at": created_at, "updated_at": created_at,
+            })
+            if status in (StatusEnum.APPROVED, StatusEnum.REJECTED, StatusEnum.COMPLETED, StatusEnum.NEEDS_REVIEW):
+                responses.append({
+                    "query_id": row_id, "response_text": "Synthetic response",
+                    "is_approved": status == StatusEnum.APPROVED,
+                    "created_at": created_at, "updated_at": created_at,
+                })
+            if row_id % 10 == 0:
+                files.append({
+                    "query_id": row_id, "original_filename": f"file_{row_id}.txt",
+                    "stored_filename": f"{query_id}.txt", "file_type": "text/plain", "file_size": 1024,
+                    "file_hash": query_id.replace("-", ""), "created_at": created_at,
+                    "expiry_time": created_at + timedelta(hours=rng.randint(1, 72)),
+                })
+        conn.execute(insert(Query.__table__), queries)
+        if responses:
+            conn.execute(insert(Response.__table__), responses)
+        if files:
+            conn.execute(insert(File.__table__), files)
+    return query_ids
+
+
+def lookups(rows: int, query_ids: List[str], rng: random.Random) -> Dict[str, Callable[[Connection], None]]:
+    """
+    The hot lookups of the API, each as a callable over a connection.
+    """
+    open_statuses = (StatusEnum.PENDING, StatusEnum.PROCESSING, StatusEnum.NEEDS_REVIEW)
+    now = START + timedelta(seconds=15 * rows)
+
+    def by_query_id(conn: Connection) -> None:
+        conn.execute(select(Query).where(Query.query_id == rng.choice(query_ids))).first()
+
+    def pending_reviews(conn: Connection) -> None:
+        conn.execute(
+            select(Query.id).where(Query.status == StatusEnum.NEEDS_REVIEW)
+            .order_by(Query.created_at).offset(rng.randint(0, 1000)).limit(20)
+        ).all()
+
+    def open_urgent(conn: Connection) -> None:
+        conn.execute(
+            select(func.count()).select_from(Query)
+            .where(Query.triage_level == TriageLevelEnum.URGENT, Query.status.in_(open_statuses))
+        ).scalar()
+
+    def latest_response(conn: Connection) -> None:
+        conn.execute(
+            select(Response).where(Response.query_id == rng.randint(1, rows))
+            .order_by(Response.created_at.desc()).limit(1)
+        ).first()
+
+    def files_for_query(conn: Connection) -> None:
+        conn.execute(select(File.id).where(File.query_id == 10 * rng.randint(1, rows // 10))).all()
+
+    def expired_files(conn: Connection) -> None:
+        conn.execute(select(func.count()).select_from(File).where(File.expiry_time < now)).scalar()
+
+    return {
+        "query by query_id": by_query_id,
+        "pending reviews page": pending_reviews,
+        "open urgent count": open_urgent,
+        "latest response": latest_response,
+        "files for query": files_for_query,
+        "expired files count": expired_files,
+    }
+
+
+def measure(conn: Connection, fn: Callable[[Connection], None], samples: int) -> List[float]:
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        fn(conn)
+        timings.append(1000 * (time.perf_counter() - start))
+    return timings
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lookup latency with and without the secondary indexes")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of synthetic queries")
+    parser.add_argument("--samples", type=int, default=50, help="Timed lookups per query shape and phase")
+    parser.add_argument("--database", default=None, help="SQLite file to use (default: a temporary file)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    path = args.database or os.path.join(tempfile.mkdtemp(), "benchmark_indexes.db")
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    rng = random.Random(args.seed)
+
+    with engine.begin() as conn:
+        SQLModel.metadata.create_all(conn)
+        # Start from tables created before the indexes existed
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(text(f'DROP INDEX "{index.name}"'))
+
+    print(f"Inserting {args.rows:,} queries into {path} ...")
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        query_ids = populate(conn, args.rows, rng)
+    print(f"  done in {time.perf_counter() - start:.1f}s\n")
+
+    shapes = lookups(args.rows, query_ids, rng)
+    before: Dict[str, List[float]] = {}
+    after: Dict[str, List[float]] = {}
+
+    with engine.connect() as conn:
+        for name, fn in shapes.items():
+            before[name] = measure(conn, fn, args.samples)
+
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        created = create_missing_indexes(conn)
+    print(f"Migration created {len(created)} indexes in {time.perf_counter() - start:.1f}s\n")
+
+    with engine.connect() as conn:
+        for name, fn in shapes.items():
+            fn(conn)  # warm up the page cache for the new index
+            after[name] = measure(conn, fn, args.samples)
+
+    print(f"{'Lookup':<22} {'before p50':>11} {'before p99':>11} {'after p50':>10} {'after p99':>10} {'speedup':>9}")
+    print("-" * 78)
+    for name in shapes:
+        b50, b99 = statistics.median(before[name]), percentile(before[name], 0.99)
+        a50, a99 = statistics.median(after[name]), percentile(after[name], 0.99)
+        print(f"{name:<22} {b50:>9.3f}ms {b99:>9.3f}ms {a50:>8.3f}ms {a99:>8.3f}ms {b50 / a50:>8.1f}x")
+
+    engine.dispose()
+    if not args.database:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+Benchmark for the compiled safety lexicon matcher.
+
+Generates synthetic patient queries and scores them with the previous
+keyword scan from ``calculate_safety_score_with_mcp`` and with the compiled
+``SafetyLexicon``, reporting throughput and how often the two agree. A
+second round grows the lexicon with synthetic terms to show how a linear
+per-keyword scan and the compiled matcher scale with lexicon size.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from agents.lexicon import SafetyLexicon, get_safety_lexicon
+
+TEMPLATES = [
+    "I've been having {symptom} for the past {duration}. Should I be worried?",
+    "My {relative} has {symptom} and {symptom2}. What should we do?",
+    "Is it normal to feel {symptom} after taking my {drug} {frequency}?",
+    "I have {severity} {symptom} and my blood sugar is {sugar}. Is this an emergency?",
+    "What are the side effects of {drug}? I started it {duration} ago.",
+    "Since {duration} I keep waking up with {symptom}, it is {severity}.",
+]
+WORDS = {
+    "symptom": ["headaches", "dizziness", "chest pain", "nausea", "fatigue", "blurred vision",
+                "chronic back pain", "numb feet", "shortness of breath", "thirst", "painful urination"],
+    "symptom2": ["a fever", "swelling", "symptoms of flu", "trouble sleeping", "a rash"],
+    "duration": ["two days", "a week", "three weeks", "a month", "six months"],
+    "relative": ["son", "daughter", "mother", "father", "partner"],
+    "drug": ["metformin", "insulin", "lisinopril", "medication", "atorvastatin"],
+    "frequency": ["daily", "twice a day", "every morning", "at night"],
+    "severity": ["mild", "moderate", "severe", "extreme", "unbearable"],
+    "sugar": ["110", "180", "250", "400", "low"],
+}
+
+
+def generate_queries(count: int, seed: int = 42):
+    """Yield ``count`` synthetic patient queries."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        template = rng.choice(TEMPLATES)
+        yield template.format(**{key: rng.choice(values) for key, values in WORDS.items()})
+
+
+def legacy_score(query_text: str) -> float:
+    """The previous keyword scan, kept here as the baseline."""
+    lower_query = query_text.lower()
+    if any(word in lower_query for word in ["emergency", "severe", "extreme", "dying", "suicide"]):
+        return 0.2
+    elif any(word in lower_query for word in ["pain", "chronic", "symptoms", "medication"]):
+        return 0.6
+    else:
+        return 0.8
+
+
+def linear_scan_score(lexicon: SafetyLexicon, query_text: str) -> float:
+    """A legacy-style substring scan over every lexicon term."""
+    lower_query = query_text.lower()
+    score = lexicon.baseline
+    for term, weight in lexicon.weights.items():
+        if term in lower_query:
+            score *= 1.0 - weight
+    return score
+
+
+def grown_lexicon(base: SafetyLexicon, extra_terms: int, seed: int = 7) -> SafetyLexicon:
+    """Extend a lexicon with pseudo-random clinical-looking terms."""
+    rng = random.Random(seed)
+    syllables = ["car", "dio", "neph", "ro", "pa", "thy", "glu", "co", "hyp", "er", "emia", "itis", "algia"]
+    terms = dict(base.weights)
+    while len(terms) < len(base.weights) + extra_terms:
+        terms["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))] = 0.1
+    return SafetyLexicon(terms, baseline=base.baseline)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compiled safety lexicon matcher")
+    parser.add_argument("--queries", type=int, default=1_000_000, help="Number of synthetic queries")
+    parser.add_argument("--extra-terms", type=int, default=500, help="Synthetic terms added for the scaling round")
+    args = parser.parse_args()
+
+    print(f"Generating {args.queries:,} synthetic queries...")
+    queries = list(generate_queries(args.queries))
+    lexicon = get_safety_lexicon()
+
+    legacy, legacy_elapsed = timed(lambda: [legacy_score(q) for q in queries])
+    _, single_elapsed = timed(lambda: [lexicon.score(q) for q in queries])
+    compiled, compiled_elapsed = timed(lambda: lexicon.score_many(queries))
+
+    # With one term of each tier the compiled scorer reproduces the legacy
+    # scores; it differs where several terms compound or where the legacy
+    # substring scan matched inside other words
+    agreement = sum(1 for a, b in zip(legacy, compiled) if abs(a - b) < 1e-9) / len(queries)
+
+    print(f"Default lexicon ({len(lexicon.weights)} terms; the legacy scan hardcodes 9):")
+    print(f"        legacy scan: {legacy_elapsed:.2f}s ({len(queries) / legacy_elapsed:,.0f} queries/s)")
+    print(f"    compiled score: {single_elapsed:.2f}s ({len(queries) / single_elapsed:,.0f} queries/s)")
+    print(f"  compiled batched: {compiled_elapsed:.2f}s ({len(queries) / compiled_elapsed:,.0f} queries/s)")
+    print(f"         agreement: {agreement:.1%} identical scores")
+
+    big = grown_lexicon(lexicon, args.extra_terms)
+    _, linear_elapsed = timed(lambda: [linear_scan_score(big, q) for q in queries])
+    _, big_elapsed = timed(lambda: big.score_many(queries))
+    print(f"Grown lexicon ({len(big.weights)} terms):")
+    print(f"        linear scan: {linear_elapsed:.2f}s ({len(queries) / linear_elapsed:,.0f} queries/s)")
+    print(f"  compiled batched: {big_elapsed:.2f}s ({len(queries) / big_elapsed:,.0f} queries/s)")
+    print(f"           speedup: {linear_elapsed / big_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
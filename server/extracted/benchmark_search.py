@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Benchmark for full-text search over queries and responses.
+
+Times the statement behind ``GET /api/query/search`` against a database
+filled by ``seed_db.py``, for searches ranging from rare to very common
+words, on the first page and on a page reached through cursors.
+
+Example:
+
+    python seed_db.py --queries 1000000
+    python benchmark_search.py --samples 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from sqlalchemy import func, select
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from models import Query
+from db.database import read_engine, init_db
+from db.search import SEARCH_MAX_CANDIDATES, SEARCH_TABLE, Key, search_statement, search_terms, search_window_statement
+
+SEARCHES = [
+    "seizure minutes",
+    "peanuts throat",
+    "blood urine",
+    "headache worst",
+    "cholesterol",
+    "medication",
+    "fever",
+    "doctor",
+    "the",
+]
+
+
+async def run_search(conn, dialect: str, search: str, limit: int, after: Optional[Key], window_start: Optional[int]):
+    terms = search_terms(search, dialect)
+    if window_start is None:
+        window = await conn.execute(search_window_statement(dialect), {"terms": terms, "candidates": SEARCH_MAX_CANDIDATES})
+        window_start = window.scalar()
+    params = {"terms": terms, "window_start": window_start, "limit": limit + 1}
+    if after is not None:
+        params.update(after_score=after[0], after_id=after[1])
+    result = await conn.execute(search_statement(dialect, after), params)
+    return result.all(), window_start
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    await init_db()
+    async with read_engine.connect() as conn:
+        dialect = conn.dialect.name
+        documents = (await conn.execute(select(func.count()).select_from(Query))).scalar()
+        print(f"{documents:,} live queries, {args.samples} samples per search, limit {args.limit}, "
+              f"{SEARCH_MAX_CANDIDATES:,} candidates")
+        print()
+        print(f"{'Search':<18} {'matches':>9} {'page 1 p50':>11} {'p99':>9} {f'page {args.pages} p50':>11} {'p99':>9}")
+        print("-" * 72)
+        for search in SEARCHES:
+            if dialect == "sqlite":
+                matches = (await conn.exec_driver_sql(
+                    f"SELECT count(*) FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH ?",
+                    (search_terms(search, dialect),)
+                )).scalar()
+            else:
+                matches = -1
+            timings = {1: [], args.pages: []}
+            for _ in range(args.samples):
+                after = window_start = None
+                for page in range(1, args.pages + 1):
+                    started = time.perf_counter()
+                    rows, window_start = await run_search(conn, dialect, search, args.limit, after, window_start)
+                    if page in timings:
+                        timings[page].append(time.perf_counter() - started)
+                    if len(rows) <= args.limit:
+                        break
+                    after = (rows[args.limit - 1].score, rows[args.limit - 1].id)
+            first, deep = timings[1], timings[args.pages] or [0.0]
+            print(
+                f"{search:<18} {matches:>9,} {1000 * statistics.median(first):>9.2f}ms {1000 * percentile(first, 0.99):>7.2f}ms "
+                f"{1000 * statistics.median(deep):>9.2f}ms {1000 * percentile(deep, 0.99):>7.2f}ms"
+            )
+    await read_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full-text search latency")
+    parser.add_argument("--samples", type=int, default=20, help="Timed runs per search")
+    parser.add_argument("--limit", type=int, default=10, help="Results per page")
+    parser.add_argument("--pages", type=int, default=5, help="Page reached through cursors")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+"""
+Benchmark for the SQLite engine configuration under concurrent reads and
+writes.
+
+Runs the same mixed workload against two setups on a fresh database file:
+
+- ``legacy``: one engine with SQLAlchemy's default pool and SQLite's
+  defaults (rollback journal, synchronous=FULL), shared by readers and
+  writers, as the app used before it moved off ``:memory:``.
+- ``tuned``: the engines from ``db.database.create_engines``: WAL,
+  synchronous=NORMAL, larger page cache and mmap, a busy timeout, a
+  single serialized writer connection and a pool of query-only readers.
+
+Readers fetch a query by ``query_id`` and a page of pending reviews;
+writers insert a query and then update its status, like the API and the
+background workers do. Reports throughput, latency and errors (such as
+"database is locked") per setup.
+
+Example:
+
+    python benchmark_sqlite.py --readers 32 --writers 8 --duration 10
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import SQLModel
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from models import Query, StatusEnum, TriageLevelEnum
+from db.database import create_engines
+
+
+class Workload:
+    """
+    Counts operations, latencies and errors of one benchmark run.
+    """
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {"read": [], "write": []}
+        self.errors: Dict[str, int] = {"read": 0, "write": 0}
+        self.error_kinds: Dict[str, int] = {}
+
+    def record(self, kind: str, start: float) -> None:
+        self.latencies[kind].append(time.perf_counter() - start)
+
+    def fail(self, kind: str, error: Exception) -> None:
+        self.errors[kind] += 1
+        message = str(getattr(error, "orig", error)).splitlines()[0][:60]
+        self.error_kinds[message] = self.error_kinds.get(message, 0) + 1
+
+
+async def seed(engine: AsyncEngine, rows: int) -> List[str]:
+    """
+    Create the tables and insert ``rows`` queries, a tenth of them pending review.
+    """
+    query_ids = [str(uuid.uuid4()) for _ in range(rows)]
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.execute(insert(Query.__table__), [
+            {
+                "query_id": query_id, "query_text": f"Seed query {i}",
+                "status": StatusEnum.NEEDS_REVIEW if i % 10 == 0 else StatusEnum.COMPLETED,
+                "triage_level": TriageLevelEnum.LOW, "created_at": now, "updated_at": now,
+            }
+            for i, query_id in enumerate(query_ids)
+        ])
+    return query_ids
+
+
+async def reader(engine: AsyncEngine, query_ids: List[str], stop: float, workload: Workload, rng: random.Random):
+    while time.perf_counter() < stop:
+        start = time.perf_counter()
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(select(Query).where(Query.query_id == rng.choice(query_ids)))
+                await conn.execute(
+                    select(Query.id, Query.query_text).where(Query.status == StatusEnum.NEEDS_REVIEW)
+                    .order_by(Query.created_at, Query.id).limit(20)
+                )
+            workload.record("read", start)
+        except Exception as e:
+            workload.fail("read", e)
+
+
+async def writer(engine: AsyncEngine, stop: float, workload: Workload):
+    while time.perf_counter() < stop:
+        start = time.perf_counter()
+        try:
+            now = datetime.utcnow()
+            async with engine.begin() as conn:
+                result = await conn.execute(insert(Query.__table__).values(
+                    query_id=str(uuid.uuid4()), query_text="Benchmark query",
+                    status=StatusEnum.PROCESSING, created_at=now, updated_at=now,
+                ))
+                await conn.execute(
+                    update(Query.__table__).where(Query.__table__.c.id == result.inserted_primary_key[0])
+                    .values(status=StatusEnum.NEEDS_REVIEW, triage_level=TriageLevelEnum.MEDIUM)
+                )
+            workload.record("write", start)
+        except Exception as e:
+            workload.fail("write", e)
+
+
+async def run_setup(name: str, path: str, args: argparse.Namespace) -> Tuple[Workload, float]:
+    url = f"sqlite+aiosqlite:///{path}"
+    if name == "legacy":
+        write_engine = read_engine = create_async_engine(url)
+    else:
+        write_engine, read_engine = create_engines(url)
+
+    query_ids = await seed(write_engine, args.rows)
+    workload = Workload()
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    stop = started + args.duration
+    await asyncio.gather(
+        *(reader(read_engine, query_ids, stop, workload, rng) for _ in range(args.readers)),
+        *(writer(write_engine, stop, workload) for _ in range(args.writers)),
+    )
+    elapsed = time.perf_counter() - started
+
+    await write_engine.dispose()
+    if read_engine is not write_engine:
+        await read_engine.dispose()
+    return workload, elapsed
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    directory = tempfile.mkdtemp()
+    results = {}
+    for name in ("legacy", "tuned"):
+        path = os.path.join(directory, f"{name}.db")
+        print(f"Running {name} for {args.duration}s "
+              f"({args.readers} readers, {args.writers} writers, {args.rows:,} rows) ...")
+        results[name] = await run_setup(name, path, args)
+
+    print()
+    print(f"{'Setup':<8} {'reads/s':>9} {'writes/s':>9} {'read p50':>9} {'read p99':>9} "
+          f"{'write p50':>10} {'write p99':>10} {'errors':>7}")
+    print("-" * 78)
+    for name, (workload, elapsed) in results.items():
+        reads, writes = workload.latencies["read"], workload.latencies["write"]
+        print(
+            f"{name:<8} {len(reads) / elapsed:>9.0f} {len(writes) / elapsed:>9.0f} "
+            f"{1000 * statistics.median(reads or [0]):>7.2f}ms {1000 * percentile(reads, 0.99):>7.2f}ms "
+            f"{1000 * statistics.median(writes or [0]):>8.2f}ms {1000 * percentile(writes, 0.99):>8.2f}ms "
+            f"{sum(workload.errors.values()):>7}"
+        )
+    for name, (workload, _) in results.items():
+        for message, count in workload.error_kinds.items():
+            print(f"  {name}: {count} x {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite engine settings under concurrent reads and writes")
+    parser.add_argument("--readers", type=int, default=32, help="Concurrent reader tasks")
+    parser.add_argument("--writers", type=int, default=8, help="Concurrent writer tasks")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per setup")
+    parser.add_argument("--rows", type=int, default=50_000, help="Queries seeded before the run")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Benchmark for the synchronous session path.
+
+Compares opening sessions the way ``get_sync_session`` used to, building a
+new engine (and connection pool) for every session, with the cached
+process-wide engine and sessionmaker from ``db.database``. Each session
+runs one primary key lookup and is closed. Reports sessions per second
+and the latency distribution.
+
+Example:
+
+    python benchmark_sync_sessions.py --sessions 2000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import Session, SQLModel, create_engine
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from models import Query
+from db.database import create_sync_engine
+
+
+def per_session_engine(url: str) -> Callable[[], Session]:
+    """
+    The previous behaviour: a new engine for every session.
+    """
+    sync_url = url.replace("+aiosqlite", "")
+
+    def open_session() -> Session:
+        return Session(create_engine(sync_url, echo=False))
+
+    return open_session
+
+
+def cached_sessionmaker(url: str) -> Callable[[], Session]:
+    """
+    One engine and session factory shared by all sessions.
+    """
+    return sessionmaker(bind=create_sync_engine(url), class_=Session)
+
+
+def measure(open_session: Callable[[], Session], sessions: int, query_id: int) -> List[float]:
+    timings = []
+    for _ in range(sessions):
+        start = time.perf_counter()
+        with open_session() as session:
+            session.get(Query, query_id)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark synchronous session creation")
+    parser.add_argument("--sessions", type=int, default=2000, help="Sessions opened per variant")
+    parser.add_argument("--database", default=None, help="SQLite file to use (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.database or os.path.join(tempfile.mkdtemp(), "benchmark_sessions.db")
+    url = f"sqlite+aiosqlite:///{path}"
+
+    setup = create_sync_engine(url)
+    SQLModel.metadata.create_all(setup)
+    with Session(setup) as session:
+        query = Query(query_text="Benchmark query")
+        session.add(query)
+        session.commit()
+        query_id = query.id
+    setup.dispose()
+
+    print(f"{'Variant':<22} {'sessions/s':>11} {'p50':>9} {'p99':>9}")
+    print("-" * 54)
+    for name, factory in (("engine per session", per_session_engine), ("cached sessionmaker", cached_sessionmaker)):
+        open_session = factory(url)
+        measure(open_session, 20, query_id)  # warm up
+        timings = measure(open_session, args.sessions, query_id)
+        ordered = sorted(timings)
+        print(
+            f"{name:<22} {len(timings) / sum(timings):>11.0f} "
+            f"{1000 * statistics.median(timings):>7.3f}ms {1000 * ordered[int(0.99 * (len(ordered) - 1))]:>7.3f}ms"
+        )
+
+    if not args.database:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
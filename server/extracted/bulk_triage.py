@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+"""
+Offline bulk triage over a JSONL dump of queries.
+
+Each input line is a JSON object with a ``query_text`` and optionally an
+``id`` or ``query_id``. Queries are streamed through the enhancement,
+safety scoring and triage agents with bounded concurrency, and one JSON
+result per query is appended to the output as soon as it completes
+(completion order, tagged with the input line number).
+
+The output file doubles as the checkpoint: with ``--resume``, lines that
+already have a result are skipped, so an interrupted run can be restarted
+with the same arguments. A throughput and latency report is printed to
+stderr at the end.
+
+Example:
+
+    python bulk_triage.py queries.jsonl -o triaged.jsonl --concurrency 32
+    python bulk_triage.py queries.jsonl -o triaged.jsonl --local-scoring --processes 4
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, TextIO, Tuple
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from models import Query
+from agents.enhancer import enhance_query
+from agents.triage import determine_triage_level
+from agents.lexicon import get_safety_lexicon
+from agents.pipeline import Pipeline, Stage
+from agents.deadline import deadline_scope, degraded_stages
+from agents.llm_client import close_http_client
+from agents.worker import (
+    PIPELINE_RETRY_BACKOFF, PIPELINE_STAGE_RETRIES, PIPELINE_STAGE_TIMEOUT,
+    QUERY_PIPELINE, final_status, keep_original_query, score_locally,
+)
+
+
+def score_in_process(query_text: str) -> float:
+    """Score with the lexicon in a pool worker (loaded once per process)."""
+    return get_safety_lexicon().score(query_text)
+
+
+def build_local_scoring_pipeline(executor: Optional[ProcessPoolExecutor]) -> Pipeline:
+    """
+    Build the query pipeline with the LLM scorer replaced by the local lexicon,
+    run in ``executor`` when given so CPU work stays off the event loop.
+    """
+    async def score(query_text: str) -> float:
+        if executor is None:
+            return score_in_process(query_text)
+        return await asyncio.get_running_loop().run_in_executor(executor, score_in_process, query_text)
+
+    return Pipeline("bulk_local", [
+        Stage(
+            "enhance", enhance_query,
+            inputs={"query_text": "query_text"}, outputs="enhanced_query",
+            timeout=PIPELINE_STAGE_TIMEOUT, retries=PIPELINE_STAGE_RETRIES,
+            retry_backoff=PIPELINE_RETRY_BACKOFF, fallback=keep_original_query
+        ),
+        Stage(
+            "score", score,
+            inputs={"query_text": "enhanced_query"}, outputs="safety_score",
+            timeout=PIPELINE_STAGE_TIMEOUT, fallback=score_locally
+        ),
+        Stage(
+            "triage", determine_triage_level,
+            inputs={"query_text": "enhanced_query", "safety_score": "safety_score"}, outputs="triage_level",
+            timeout=PIPELINE_STAGE_TIMEOUT
+        ),
+    ])
+
+
+def read_queries(path: str, skip: Set[int]) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Stream (line number, record, error) tuples from a JSONL file.
+
+    Blank lines and lines in ``skip`` are left out. Malformed lines are
+    yielded with an error instead of a record.
+    """
+    source = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line_number, line in enumerate(source, start=1):
+            if line_number in skip or not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict) or not str(record.get("query_text") or "").strip():
+                    raise ValueError("missing query_text")
+                yield line_number, record, None
+            except ValueError as e:
+                yield line_number, None, str(e)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+def load_checkpoint(path: str) -> Set[int]:
+    """
+    Collect the input line numbers that already have a result.
+
+    Queries that failed are processed again, as is a partially written last
+    line from an interrupted run. Invalid input lines are not retried.
+    """
+    done: Set[int] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+                if "error" not in result or result.get("invalid"):
+                    done.add(int(result["line"]))
+            except (ValueError, KeyError, TypeError):
+                continue
+    return done
+
+
+def open_output(path: str, resume: bool) -> TextIO:
+    if path == "-":
+        return sys.stdout
+    if resume and os.path.exists(path) and os.path.getsize(path):
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+        output = open(path, "a", encoding="utf-8")
+        if needs_newline:
+            # Terminate a line cut off by a crash so it is skipped next time
+            output.write("\n")
+        return output
+    return open(path, "w", encoding="utf-8")
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class BulkTriage:
+    """
+    Runs queries through a pipeline with at most ``concurrency`` in flight
+    and writes results as they complete.
+    """
+
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        output: TextIO,
+        concurrency: int,
+        deadline: Optional[float],
+        flush_every: int
+    ):
+        self.pipeline = pipeline
+        self.output = output
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.deadline = deadline
+        self.flush_every = flush_every
+
+        self.latencies: List[float] = []
+        self.stage_times: Dict[str, List[float]] = {}
+        self.triage_levels: Counter = Counter()
+        self.processed = 0
+        self.failed = 0
+        self.degraded = 0
+        self._unflushed = 0
+
+    def write(self, result: Dict[str, Any]) -> None:
+        self.output.write(json.dumps(result) + "\n")
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        self.output.flush()
+        if self.output is not sys.stdout:
+            os.fsync(self.output.fileno())
+        self._unflushed = 0
+
+    async def process(self, line_number: int, record: Dict[str, Any]) -> None:
+        start = time.perf_counter()
+        result: Dict[str, Any] = {"line": line_number, "id": record.get("id", record.get("query_id"))}
+        try:
+            with deadline_scope(self.deadline):
+                query = Query(query_text=record["query_text"])
+                run = await self.pipeline.run({"query_text": query.query_text})
+                degraded = degraded_stages()
+                degraded += [stage for stage in run.degraded() if stage not in degraded]
+
+            query.enhanced_query = run.context["enhanced_query"]
+            query.safety_score = run.context["safety_score"]
+            query.triage_level = run.context["triage_level"]
+            result.update(
+                query_text=query.query_text,
+                enhanced_query=query.enhanced_query,
+                safety_score=query.safety_score,
+                triage_level=query.triage_level.value,
+                status=final_status(query).value,
+                degraded_stages=degraded,
+            )
+            for stage, duration in run.timings().items():
+                self.stage_times.setdefault(stage, []).append(duration)
+            self.triage_levels[query.triage_level.value] += 1
+            self.degraded += bool(degraded)
+            self.processed += 1
+        except Exception as e:
+            result["error"] = repr(e)
+            self.failed += 1
+
+        latency = time.perf_counter() - start
+        result["latency_ms"] = round(1000 * latency, 2)
+        self.latencies.append(latency)
+        self.write(result)
+
+    async def run(self, records: Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]) -> None:
+        tasks: Set[asyncio.Task] = set()
+
+        async def guarded(line_number: int, record: Dict[str, Any]) -> None:
+            try:
+                await self.process(line_number, record)
+            finally:
+                self.semaphore.release()
+
+        for line_number, record, error in records:
+            if record is None:
+                self.failed += 1
+                self.write({"line": line_number, "error": f"Invalid input: {error}", "invalid": True})
+                continue
+            # Acquire before creating the task so reading the input stays bounded
+            await self.semaphore.acquire()
+            task = asyncio.create_task(guarded(line_number, record))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        self.flush()
+
+    def report(self, elapsed: float, skipped: int) -> str:
+        lines = [
+            "",
+            "Bulk triage report",
+            "=" * 40,
+            f"Processed:      {self.processed}",
+            f"Failed:         {self.failed}",
+            f"Degraded:       {self.degraded}",
+            f"Resumed (skip): {skipped}",
+            f"Wall time:      {elapsed:.2f}s",
+            f"Throughput:     {self.processed / elapsed if elapsed else 0.0:.1f} queries/s",
+        ]
+        if self.latencies:
+            ms = [1000 * latency for latency in self.latencies]
+            lines.append(
+                f"Latency (ms):   p50 {percentile(ms, 0.5):.1f}  p90 {percentile(ms, 0.9):.1f}  "
+                f"p99 {percentile(ms, 0.99):.1f}  max {max(ms):.1f}"
+            )
+        for stage, times in self.stage_times.items():
+            lines.append(f"  {stage:<13} mean {1000 * statistics.fmean(times):.1f} ms")
+        if self.triage_levels:
+            lines.append("Triage levels:  " + ", ".join(
+                f"{level} {count}" for level, count in sorted(self.triage_levels.items())
+            ))
+        return "\n".join(lines)
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    if args.output != "-" and os.path.exists(args.output) and not (args.resume or args.overwrite):
+        print(f"{args.output} exists; pass --resume to continue it or --overwrite to start over", file=sys.stderr)
+        return 2
+
+    done = load_checkpoint(args.output) if args.resume and args.output != "-" else set()
+    executor = ProcessPoolExecutor(max_workers=args.processes) if args.local_scoring and args.processes else None
+    pipeline = build_local_scoring_pipeline(executor) if args.local_scoring else QUERY_PIPELINE
+    output = open_output(args.output, args.resume)
+
+    bulk = BulkTriage(pipeline, output, args.concurrency, args.deadline, args.flush_every)
+    start = time.perf_counter()
+    try:
+        await bulk.run(read_queries(args.input, done))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if executor is not None:
+            executor.shutdown()
+        await close_http_client()
+
+    print(bulk.report(time.perf_counter() - start, len(done)), file=sys.stderr)
+    return 1 if bulk.failed else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run enhancement, scoring and triage over a JSONL file of queries")
+    parser.add_argument("input", help="Input JSONL file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="Output JSONL file, or - for stdout (default)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Queries in flight at once")
+    parser.add_argument("--local-scoring", action="store_true",
+                        help="Score with the local safety lexicon instead of the scoring agent")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="With --local-scoring, score in a pool of this many processes")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="Per-query deadline in seconds; stages short of time degrade")
+    parser.add_argument("--resume", action="store_true", help="Skip input lines already in the output")
+    parser.add_argument("--overwrite", action="store_true", help="Replace an existing output file")
+    parser.add_argument("--flush-every", type=int, default=50, help="Results between output flushes")
+    args = parser.parse_args()
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
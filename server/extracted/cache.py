@@ -0,0 +1,313 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import asyncio
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from agents.singleflight import SingleFlight
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+AGENT_CACHE_ENABLED = os.getenv("AGENT_CACHE_ENABLED", "True").lower() == "true"
+AGENT_CACHE_MAX_ENTRIES = int(os.getenv("AGENT_CACHE_MAX_ENTRIES", 10000))
+AGENT_CACHE_TTL_SECONDS = float(os.getenv("AGENT_CACHE_TTL_SECONDS", 3600))
+AGENT_CACHE_SQLITE_PATH = os.getenv("AGENT_CACHE_SQLITE_PATH")  # Persistent tier is off unless set
+
+_MISSING = object()
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize query text so trivially different inputs share a cache entry.
+
+    Applies Unicode NFKC normalization, case folding and whitespace collapsing.
+
+    Args:
+        text: The raw input text
+
+    Returns:
+        Normalized text
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def make_cache_key(
+    agent: str,
+    text: str,
+    model: str,
+    temperature: float,
+    prompt_version: str,
+    extra: Any = None
+) -> str:
+    """
+    Build a content-addressed cache key for an agent call.
+
+    Args:
+        agent: The agent name
+        text: The input text, normalized before hashing
+        model: The model name serving the call
+        temperature: The sampling temperature
+        prompt_version: Version of the agent's prompt
+        extra: Optional JSON-serializable context (file summaries, history)
+
+    Returns:
+        Hex SHA-256 digest identifying the call
+    """
+    material = json.dumps(
+        [agent, normalize_text(text), model, temperature, prompt_version, extra],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class MemoryCache:
+    """
+    In-process LRU cache with per-entry TTL.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = AGENT_CACHE_MAX_ENTRIES, ttl: float = AGENT_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    async def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    Persistent cache tier backed by a local SQLite file.
+
+    Values are stored as JSON and survive restarts. Blocking sqlite3 calls
+    run in a worker thread so they do not stall the event loop.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, ttl: float = AGENT_CACHE_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS agent_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM agent_cache WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+
+    def _get(self, key: str) -> Any:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM agent_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return _MISSING
+            if row[1] < time.time():
+                self._conn.execute("DELETE FROM agent_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return _MISSING
+        return json.loads(row[0])
+
+    def _set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO agent_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + self.ttl),
+            )
+            self._conn.commit()
+
+    async def get(self, key: str) -> Any:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: Any) -> None:
+        await asyncio.to_thread(self._set, key, value)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class AgentCache:
+    """
+    Tiered result cache for agent calls.
+
+    Tiers are checked in order; a hit in a slower tier is promoted into the
+    faster ones. Hit and miss counters are kept per agent. Concurrent misses
+    for the same key are coalesced into a single computation, also when the
+    cache itself is disabled.
+    """
+
+    def __init__(self, tiers: List[Any], enabled: bool = True):
+        self.tiers = tiers
+        self.enabled = enabled and bool(tiers)
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.tier_hits: Dict[str, int] = {tier.name: 0 for tier in tiers}
+        self.flights = SingleFlight()
+
+    async def get(self, agent: str, key: str, default: Any = _MISSING) -> Any:
+        """
+        Look up a cached value, returning ``default`` (the ``_MISSING``
+        sentinel unless given) on a miss.
+        """
+        for index, tier in enumerate(self.tiers):
+            try:
+                value = await tier.get(key)
+            except Exception as e:
+                logger.warning("Agent cache tier %s failed on get: %s", tier.name, e)
+                continue
+            if value is not _MISSING:
+                self.hits[agent] = self.hits.get(agent, 0) + 1
+                self.tier_hits[tier.name] += 1
+                for faster in self.tiers[:index]:
+                    try:
+                        await faster.set(key, value)
+                    except Exception as e:
+                        logger.warning("Agent cache tier %s failed on promote: %s", faster.name, e)
+                return value
+        self.misses[agent] = self.misses.get(agent, 0) + 1
+        return default
+
+    async def set(self, key: str, value: Any) -> None:
+        for tier in self.tiers:
+            try:
+                await tier.set(key, value)
+            except Exception as e:
+                logger.warning("Agent cache tier %s failed on set: %s", tier.name, e)
+
+    async def get_or_compute(
+        self,
+        agent: str,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        is_fallback: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Return the cached result for ``key`` or compute and store it.
+
+        Args:
+            agent: The agent name, used for hit/miss counters
+            key: The cache key from make_cache_key
+            compute: Coroutine factory producing the value on a miss
+            is_fallback: Optional predicate identifying degraded fallback
+                results, which are returned but never cached
+
+        Returns:
+            The cached or freshly computed value
+        """
+        if not self.enabled:
+            return await self.flights.do(key, compute)
+
+        value = await self.get(agent, key)
+        if value is not _MISSING:
+            return value
+
+        async def compute_and_store() -> Any:
+            value = await compute()
+            if is_fallback is None or not is_fallback(value):
+                await self.set(key, value)
+            return value
+
+        return await self.flights.do(key, compute_and_store)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters for monitoring.
+
+        Returns:
+            Dictionary with per-agent hits, misses and hit rates
+        """
+        agents = set(self.hits) | set(self.misses)
+        return {
+            "enabled": self.enabled,
+            "tiers": [tier.name for tier in self.tiers],
+            "tier_hits": dict(self.tier_hits),
+            "single_flight": self.flights.stats(),
+            "agents": {
+                agent: {
+                    "hits": self.hits.get(agent, 0),
+                    "misses": self.misses.get(agent, 0),
+                    "hit_rate": self.hits.get(agent, 0) / max(1, self.hits.get(agent, 0) + self.misses.get(agent, 0)),
+                }
+                for agent in sorted(agents)
+            },
+        }
+
+
+def build_agent_cache() -> AgentCache:
+    """
+    Build the agent cache from environment configuration.
+
+    Returns:
+        AgentCache with an in-process tier and, if configured, a SQLite tier
+    """
+    tiers: List[Any] = [MemoryCache()]
+    if AGENT_CACHE_SQLITE_PATH:
+        tiers.append(SQLiteCache(AGENT_CACHE_SQLITE_PATH))
+    return AgentCache(tiers, enabled=AGENT_CACHE_ENABLED)
+
+
+# Process-wide cache shared by all agents
+_agent_cache: Optional[AgentCache] = None
+
+
+def get_agent_cache() -> AgentCache:
+    """
+    Get the process-wide agent cache, building it on first use.
+
+    Returns:
+        The shared AgentCache
+    """
+    global _agent_cache
+    if _agent_cache is None:
+        _agent_cache = build_agent_cache()
+    return _agent_cache
+
+
+def set_agent_cache(cache: Optional[AgentCache]) -> None:
+    """
+    Replace the process-wide agent cache, e.g. with custom tiers.
+
+    Args:
+        cache: The cache to install, or None to rebuild from configuration
+    """
+    global _agent_cache
+    _agent_cache = cache
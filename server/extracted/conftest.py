@@ -0,0 +1,41 @@
+import os
+import asyncio
+import tempfile
+
+import pytest_asyncio
+
+# Point the suite at TEST_DATABASE_URL (e.g. a local PostgreSQL database,
+# which is emptied first) or a throwaway SQLite file. This runs before the
+# app is imported, so DATABASE_URL from the environment or .env is never used.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL or (
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='medical-ai-tests-'), 'test.db')}"
+)
+
+
+def pytest_sessionstart(session):
+    """Start from empty tables when testing against a shared database."""
+    if not TEST_DATABASE_URL:
+        return
+    from sqlmodel import SQLModel
+    from db.database import create_engines
+    from db.search import drop_search_index
+    from models import User, Query, Response, File
+
+    async def reset():
+        engine, _ = create_engines(TEST_DATABASE_URL)
+        async with engine.begin() as conn:
+            await conn.run_sync(drop_search_index)
+            await conn.run_sync(SQLModel.metadata.drop_all)
+        await engine.dispose()
+
+    asyncio.run(reset())
+
+
+if TEST_DATABASE_URL and not TEST_DATABASE_URL.startswith("sqlite"):
+    @pytest_asyncio.fixture(autouse=True)
+    async def release_connections():
+        """Close pooled connections after each test; asyncpg connections are bound to the test's event loop."""
+        yield
+        from db.database import dispose_engines
+        await dispose_engines()
@@ -1,17 +1,193 @@
 from sqlmodel import SQLModel, create_engine, Session
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.engine import URL, Engine, Row, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+import threading
 import os
-from typing import AsyncGenerator
+from typing import AsyncGenerator, AsyncIterator, Optional, Tuple, Union
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Get database URL from environment variables or fallback
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+# Durable SQLite file by default; set DATABASE_URL to use another database
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(os.getcwd(), "data", "medical_assistant.db"))
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite+aiosqlite:///{SQLITE_PATH}")
 
-# Create async engine
-async_engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+# SQLite tuning
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", 8))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 64 * 1024))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+
+# Connections kept by the synchronous engine
+SYNC_POOL_SIZE = int(os.getenv("SYNC_POOL_SIZE", 5))
+
+# PostgreSQL pool (per process)
+PG_POOL_SIZE = int(os.getenv("PG_POOL_SIZE", 10))
+PG_MAX_OVERFLOW = int(os.getenv("PG_MAX_OVERFLOW", 10))
+PG_POOL_TIMEOUT = float(os.getenv("PG_POOL_TIMEOUT", 10.0))
+PG_POOL_RECYCLE = int(os.getenv("PG_POOL_RECYCLE", 1800))
+# Prepared statements cached per asyncpg connection; use 0 behind PgBouncer in transaction mode
+PG_STATEMENT_CACHE_SIZE = int(os.getenv("PG_STATEMENT_CACHE_SIZE", 500))
+PG_COMMAND_TIMEOUT = float(os.getenv("PG_COMMAND_TIMEOUT", 30.0))
+PG_APPLICATION_NAME = os.getenv("PG_APPLICATION_NAME", "medical-ai-assistant")
+
+# Rows fetched per round trip when streaming large results
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 1000))
+
+# Default async and sync drivers per backend
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+SYNC_DRIVERS = {"aiosqlite": None, "asyncpg": "psycopg2", "psycopg_async": "psycopg", "aiomysql": "pymysql", "asyncmy": "pymysql"}
+# URL parameters only the async drivers understand
+ASYNC_ONLY_PARAMETERS = ("prepared_statement_cache_size",)
+
+
+def async_database_url(url: Union[str, URL]) -> URL:
+    """
+    Parse a database URL and pick the async driver when none is given.
+
+    ``postgres://`` and ``postgresql://`` URLs use asyncpg, and plain
+    ``sqlite://`` URLs use aiosqlite.
+    """
+    if isinstance(url, str) and url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if "+" not in parsed.drivername and backend in ASYNC_DRIVERS:
+        parsed = parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return parsed
+
+
+def sync_database_url(url: Union[str, URL]) -> URL:
+    """
+    Derive the synchronous URL for the same database.
+
+    The async driver is swapped for its blocking counterpart (asyncpg for
+    psycopg2, aiosqlite for the standard library sqlite3) and parameters
+    only the async driver accepts are dropped. Credentials are kept.
+    """
+    parsed = async_database_url(url)
+    driver = parsed.get_driver_name()
+    if driver in SYNC_DRIVERS:
+        sync_driver = SYNC_DRIVERS[driver]
+        backend = parsed.get_backend_name()
+        parsed = parsed.set(drivername=f"{backend}+{sync_driver}" if sync_driver else backend)
+    return parsed.difference_update_query(ASYNC_ONLY_PARAMETERS)
+
+
+def is_sqlite_file(url: Union[str, URL]) -> bool:
+    """
+    Check whether a URL points at an on-disk SQLite database.
+    """
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def set_sqlite_pragmas(dbapi_connection, read_only: bool = False) -> None:
+    """
+    Tune a new SQLite connection.
+
+    WAL lets readers run alongside the writer, and synchronous=NORMAL only
+    syncs at checkpoints, which is still durable across application crashes
+    in WAL mode. Reader connections are made query-only so a stray write
+    through them fails instead of contending for the write lock.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    if not read_only:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    if read_only:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+def create_engines(url: str) -> Tuple[AsyncEngine, AsyncEngine]:
+    """
+    Create the write and read engines for a database URL.
+
+    For an SQLite file, all writes go through a single pooled connection so
+    write transactions are serialized in the application instead of failing
+    with "database is locked", and reads use a separate pool of query-only
+    connections. An in-memory SQLite database has to be shared through one
+    connection, and other databases handle concurrent writers themselves, so
+    both use a single engine for reads and writes.
+
+    Returns:
+        The (write, read) engines, which may be the same engine
+    """
+    url = async_database_url(url)
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        engine = create_postgres_engine(url)
+        return engine, engine
+
+    if backend != "sqlite":
+        engine = create_async_engine(url, echo=False, future=True, pool_pre_ping=True)
+        return engine, engine
+
+    if not is_sqlite_file(url):
+        engine = create_async_engine(url, echo=False, future=True, poolclass=StaticPool)
+        return engine, engine
+
+    database = url.database
+    os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+
+    write_engine = create_async_engine(url, echo=False, future=True, pool_size=1, max_overflow=0)
+    read_engine = create_async_engine(
+        url, echo=False, future=True, pool_size=SQLITE_READ_POOL_SIZE, max_overflow=0
+    )
+    event.listen(write_engine.sync_engine, "connect", lambda conn, record: set_sqlite_pragmas(conn))
+    event.listen(read_engine.sync_engine, "connect", lambda conn, record: set_sqlite_pragmas(conn, read_only=True))
+    return write_engine, read_engine
+
+
+def create_postgres_engine(url: URL) -> AsyncEngine:
+    """
+    Create an async PostgreSQL engine with a sized pool.
+
+    With asyncpg, prepared statements are cached both by SQLAlchemy and by
+    asyncpg on each connection, so repeated queries skip parsing and
+    planning. Connections are checked before use and recycled
+    periodically so restarts and idle timeouts on the server side do not
+    surface as request errors.
+    """
+    connect_args = {}
+    if url.get_driver_name() == "asyncpg":
+        if "prepared_statement_cache_size" not in url.query:
+            url = url.update_query_dict({"prepared_statement_cache_size": str(PG_STATEMENT_CACHE_SIZE)})
+        connect_args = {
+            "statement_cache_size": PG_STATEMENT_CACHE_SIZE,
+            "command_timeout": PG_COMMAND_TIMEOUT,
+            "server_settings": {"application_name": PG_APPLICATION_NAME},
+        }
+    return create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        pool_size=PG_POOL_SIZE,
+        max_overflow=PG_MAX_OVERFLOW,
+        pool_timeout=PG_POOL_TIMEOUT,
+        pool_recycle=PG_POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+    )
+
+
+# Create async engines: async_engine for writes, read_engine for read-only requests
+async_engine, read_engine = create_engines(DATABASE_URL)
+
+# Synchronous engine and session factory, created on first use
+_sync_engine: Optional[Engine] = None
+_sync_sessionmaker: Optional[sessionmaker] = None
+_sync_lock = threading.Lock()
 
 async def init_db():
     """
@@ -19,29 +195,125 @@ async def init_db():
     """
     # Import models to ensure they are registered with SQLModel
     from models import User, Query, Response, File
-    
+    from db.migrations import create_missing_indexes, enable_sqlite_autoincrement
+    from db.search import create_search_index
+
     async with async_engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+        # Tables that already existed may predate AUTOINCREMENT and newer indexes
+        await conn.run_sync(enable_sqlite_autoincrement)
+        await conn.run_sync(create_missing_indexes)
+        await conn.run_sync(create_search_index)
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """
-    Dependency for getting an async database session.
+    Dependency for getting an async database session that can write.
+
+    Objects stay loaded after commit, so a handler can end its transaction
+    (and free the writer connection) before slow work such as an LLM call.
+    """
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for getting an async database session for read-only requests.
     """
-    async with AsyncSession(async_engine) as session:
+    async with AsyncSession(read_engine) as session:
         yield session
 
-def get_sync_engine():
+def get_sync_engine() -> Engine:
+    """
+    Get the process-wide synchronous engine for operations that don't
+    support async.
+
+    The engine is created on first use with the same SQLite tuning as the
+    async write engine and kept for the life of the process; dispose of it
+    with dispose_engines().
+    """
+    global _sync_engine
+    if _sync_engine is None:
+        with _sync_lock:
+            if _sync_engine is None:
+                _sync_engine = create_sync_engine(DATABASE_URL)
+    return _sync_engine
+
+
+def create_sync_engine(url: Union[str, URL]) -> Engine:
+    """
+    Create a synchronous engine for an async database URL.
+    """
+    sync_url = sync_database_url(url)
+    if sync_url.get_backend_name() != "sqlite":
+        return create_engine(
+            sync_url, echo=False, pool_size=SYNC_POOL_SIZE, pool_recycle=PG_POOL_RECYCLE, pool_pre_ping=True
+        )
+
+    if not is_sqlite_file(sync_url):
+        # One shared connection, or every checkout would see a new empty database
+        return create_engine(
+            sync_url, echo=False, poolclass=StaticPool, connect_args={"check_same_thread": False}
+        )
+
+    engine = create_engine(
+        sync_url, echo=False, pool_size=SYNC_POOL_SIZE, connect_args={"check_same_thread": False}
+    )
+    event.listen(engine, "connect", lambda conn, record: set_sqlite_pragmas(conn))
+    return engine
+
+
+def get_sync_sessionmaker() -> sessionmaker:
     """
-    Get a synchronous SQLite engine for operations that don't support async.
+    Get the process-wide factory for synchronous sessions.
     """
-    # Convert async URL to sync URL for synchronous operations
-    sync_url = DATABASE_URL.replace("+aiosqlite", "")
-    return create_engine(sync_url, echo=False)
+    global _sync_sessionmaker
+    if _sync_sessionmaker is None:
+        _sync_sessionmaker = sessionmaker(bind=get_sync_engine(), class_=Session)
+    return _sync_sessionmaker
+
 
 def get_sync_session():
     """
     Get a synchronous database session.
     """
-    engine = get_sync_engine()
-    with Session(engine) as session:
+    with get_sync_sessionmaker()() as session:
         yield session
+
+
+class InvalidCursorError(ValueError):
+    """
+    Raised when a list or search cursor cannot be decoded.
+    """
+
+
+async def stream_rows(statement, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[Row]:
+    """
+    Iterate over a large result without loading it into memory.
+
+    The statement runs on a read connection with a server-side cursor
+    (a named cursor on PostgreSQL), and rows are fetched batch_size at a
+    time as the caller consumes them.
+
+    Args:
+        statement: A Core select
+        batch_size: Rows fetched per round trip
+    """
+    async with read_engine.connect() as conn:
+        result = await conn.stream(statement.execution_options(yield_per=batch_size))
+        async for row in result:
+            yield row
+
+
+async def dispose_engines() -> None:
+    """
+    Close the pooled connections of all engines, on application shutdown.
+    """
+    global _sync_engine, _sync_sessionmaker
+    with _sync_lock:
+        if _sync_engine is not None:
+            _sync_engine.dispose()
+        _sync_engine = None
+        _sync_sessionmaker = None
+    await async_engine.dispose()
+    if read_engine is not async_engine:
+        await read_engine.dispose()
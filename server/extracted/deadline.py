@@ -0,0 +1,117 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Default request deadlines per endpoint (seconds, 0 disables)
+QUERY_DEADLINE_SECONDS = float(os.getenv("QUERY_DEADLINE_SECONDS", 20.0))
+REVIEW_DEADLINE_SECONDS = float(os.getenv("REVIEW_DEADLINE_SECONDS", 60.0))
+# Upper bound for deadlines requested by clients
+MAX_REQUEST_DEADLINE_SECONDS = float(os.getenv("MAX_REQUEST_DEADLINE_SECONDS", 120.0))
+
+# Header clients use to ask for a tighter (or looser) budget, in seconds
+DEADLINE_HEADER = "X-Request-Deadline"
+
+# Minimum budget (seconds) a stage needs to call the LLM; below it the stage degrades
+MIN_STAGE_BUDGETS = {
+    "enhance": float(os.getenv("DEADLINE_MIN_ENHANCE", 3.0)),
+    "score": float(os.getenv("DEADLINE_MIN_SCORE", 2.0)),
+    "respond": float(os.getenv("DEADLINE_MIN_RESPOND", 8.0)),
+    "assess": float(os.getenv("DEADLINE_MIN_ASSESS", 4.0)),
+}
+
+# Absolute deadline on the monotonic clock, None when unbounded
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+# Stages that ran degraded within the current deadline scope
+_degraded: ContextVar[Optional[List[str]]] = ContextVar("degraded_stages", default=None)
+
+
+def resolve_deadline(header_value: Optional[str], default: float) -> Optional[float]:
+    """
+    Work out the deadline for a request.
+
+    Args:
+        header_value: The X-Request-Deadline header, if sent
+        default: The endpoint's default deadline in seconds
+
+    Returns:
+        Seconds until the deadline, capped at MAX_REQUEST_DEADLINE_SECONDS,
+        or None if the request has no deadline
+    """
+    seconds = default
+    if header_value:
+        try:
+            seconds = float(header_value)
+        except ValueError:
+            pass
+    if seconds <= 0:
+        return None
+    return min(seconds, MAX_REQUEST_DEADLINE_SECONDS)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Run a block under a request deadline.
+
+    Tasks created inside the block inherit the deadline. Degraded stages are
+    collected per scope; read them with degraded_stages().
+
+    Args:
+        seconds: Seconds from now until the deadline, None for no deadline
+    """
+    deadline_token = _deadline.set(time.monotonic() + seconds if seconds is not None else None)
+    degraded_token = _degraded.set([])
+    try:
+        yield
+    finally:
+        _degraded.reset(degraded_token)
+        _deadline.reset(deadline_token)
+
+
+def remaining() -> Optional[float]:
+    """
+    Get the time left until the current deadline.
+
+    Returns:
+        Seconds remaining (negative once passed), or None without a deadline
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def has_budget(stage: str) -> bool:
+    """
+    Check whether enough time is left for a stage to call the LLM.
+
+    Args:
+        stage: The stage name (enhance, score, respond, assess)
+
+    Returns:
+        True without a deadline or if at least the stage's minimum budget remains
+    """
+    left = remaining()
+    return left is None or left >= MIN_STAGE_BUDGETS.get(stage, 0.0)
+
+
+def record_degraded(stage: str) -> None:
+    """
+    Note that a stage ran degraded in the current scope.
+    """
+    stages = _degraded.get()
+    if stages is not None and stage not in stages:
+        stages.append(stage)
+
+
+def degraded_stages() -> List[str]:
+    """
+    Get the stages that ran degraded in the current scope, in order.
+    """
+    return list(_degraded.get() or [])
@@ -1,9 +1,13 @@
 import os
 import json
 from typing import Dict, Any, Optional
-import httpx
 from dotenv import load_dotenv
 
+from agents.llm_client import post_chat_completion
+from agents.cache import get_agent_cache, make_cache_key
+from agents.resilience import LLMUnavailableError
+from agents.deadline import has_budget, record_degraded
+
 # Load environment variables
 load_dotenv()
 
@@ -14,6 +18,10 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
 # MCP configuration
 MCP_ENABLED = os.getenv("MCP_ENABLED", "True").lower() == "true"
 
+# Prompt settings, part of the result cache key
+PROMPT_VERSION = "1"
+TEMPERATURE = 0.3  # Lower temperature for more focused responses
+
 
 async def enhance_query(query_text: str) -> str:
     """
@@ -22,16 +30,45 @@ async def enhance_query(query_text: str) -> str:
     This function uses either direct OpenAI API calls or MCP orchestration
     to improve the query by adding medical context and clarifying ambiguities.
     
+    Results are served from the agent cache when the same normalized query
+    has already been enhanced with the same model and prompt version. If the
+    LLM endpoint is unavailable the local MCP path is used instead, and if
+    the request deadline leaves too little time enhancement is skipped.
+    
     Args:
         query_text: The original query text from the user
         
     Returns:
         Enhanced query text with medical context
     """
-    if MCP_ENABLED:
+    model = "mcp" if MCP_ENABLED else OPENAI_MODEL
+    key = make_cache_key("enhancer", query_text, model, TEMPERATURE, PROMPT_VERSION)
+    cache = get_agent_cache()
+    
+    if not MCP_ENABLED and not has_budget("enhance"):
+        # Not enough time left for a round trip; use a cached result or skip
+        cached = await cache.get("enhancer", key, default=None) if cache.enabled else None
+        if cached is not None:
+            return cached
+        record_degraded("enhance")
+        return query_text
+    
+    async def compute() -> str:
+        if MCP_ENABLED:
+            return await enhance_query_with_mcp(query_text)
+        else:
+            return await enhance_query_with_openai(query_text)
+    
+    try:
+        # The original query is returned as a fallback on API errors; don't cache it
+        return await cache.get_or_compute(
+            "enhancer", key, compute, is_fallback=lambda result: result == query_text
+        )
+    except LLMUnavailableError as e:
+        # Fail fast to the local path while the LLM endpoint is unhealthy
+        print(f"OpenAI unavailable, enhancing locally: {e}")
+        record_degraded("enhance")
         return await enhance_query_with_mcp(query_text)
-    else:
-        return await enhance_query_with_openai(query_text)
 
 
 async def enhance_query_with_openai(query_text: str) -> str:
@@ -56,25 +93,16 @@ async def enhance_query_with_openai(query_text: str) -> str:
         "advice - only enhance the query. Return only the enhanced query without explanations."
     )
     
-    # Make the API request
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {OPENAI_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": OPENAI_MODEL,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": query_text}
-                ],
-                "temperature": 0.3,  # Lower temperature for more focused responses
-                "max_tokens": 500
-            },
-            timeout=30.0  # 30 second timeout
-        )
+    # Make the API request over the shared HTTP client
+    response = await post_chat_completion("enhancer", {
+        "model": OPENAI_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": query_text}
+        ],
+        "temperature": TEMPERATURE,
+        "max_tokens": 500
+    })
     
     # Parse the response
     if response.status_code == 200:
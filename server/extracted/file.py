@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File as FastAPIFile, Header
 from fastapi.responses import FileResponse
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
@@ -10,7 +11,7 @@ from datetime import datetime, timedelta
 import shutil
 import magic
 
-from db.database import get_session
+from db.database import get_read_session, get_session
 from models import File, Query, RoleEnum
 
 router = APIRouter()
@@ -76,7 +77,7 @@ async def upload_file(
     Files are stored with hashed filenames and are automatically purged after a set time.
     """
     # Check if query exists
-    query_result = await session.exec(Query.select.where(Query.query_id == query_id))
+    query_result = await session.exec(select(Query).where(Query.query_id == query_id))
     query = query_result.first()
     
     if not query:
@@ -155,14 +156,14 @@ async def upload_file(
 @router.get("/query/{query_id}", response_model=List[FileResponse])
 async def get_files_for_query(
     query_id: str,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     role: RoleEnum = Depends(verify_role)
 ):
     """
     Get all files associated with a specific query.
     """
     # Check if query exists
-    query_result = await session.exec(Query.select.where(Query.query_id == query_id))
+    query_result = await session.exec(select(Query).where(Query.query_id == query_id))
     query = query_result.first()
     
     if not query:
@@ -172,7 +173,7 @@ async def get_files_for_query(
         )
     
     # Get files for the query
-    files_result = await session.exec(File.select.where(File.query_id == query.id))
+    files_result = await session.exec(select(File).where(File.query_id == query.id))
     files = files_result.all()
     
     return [
@@ -191,14 +192,14 @@ async def get_files_for_query(
 @router.get("/{file_id}/download")
 async def download_file(
     file_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     role: RoleEnum = Depends(verify_role)
 ):
     """
     Download a specific file by its ID.
     """
     # Get file from database
-    file_result = await session.exec(File.select.where(File.id == file_id))
+    file_result = await session.exec(select(File).where(File.id == file_id))
     file = file_result.first()
     
     if not file:
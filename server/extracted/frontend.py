@@ -1,6 +1,7 @@
 import streamlit as st
 import httpx
 import os
+import re
 import json
 from datetime import datetime
 from dotenv import load_dotenv
@@ -13,9 +14,10 @@ load_dotenv()
 API_HOST = os.getenv("API_HOST", "localhost")
 API_PORT = os.getenv("API_PORT", "8000")
 API_URL = f"http://{API_HOST}:{API_PORT}/api"
+METRICS_URL = f"http://{API_HOST}:{API_PORT}/metrics"
 
-# Demo mode flag - set to True when backend is not available
-DEMO_MODE = True  # Change to False when backend is ready
+# Demo mode shows sample data instead of calling the backend
+DEMO_MODE = os.getenv("DEMO_MODE", "False").lower() == "true"
 
 # File upload configuration
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 5 * 1024 * 1024))  # 5MB default
@@ -314,36 +316,122 @@ def admin_view():
     """Render the admin view for system monitoring and management."""
     st.header("System Status")
     
-    if DEMO_MODE:
-        st.info("🔧 Demo Mode: Showing sample system metrics")
+    if not DEMO_MODE:
+        metrics_admin_view()
+        return
+    
+    st.info("🔧 Demo Mode: Showing sample system metrics")
     
     # System metrics
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Active Queries", "42" if DEMO_MODE else "N/A")
+        st.metric("Active Queries", "42")
     
     with col2:
-        st.metric("Pending Reviews", "7" if DEMO_MODE else "N/A")
+        st.metric("Pending Reviews", "7")
     
     with col3:
-        st.metric("Response Time (avg)", "1.2s" if DEMO_MODE else "N/A")
+        st.metric("Response Time (avg)", "1.2s")
     
     # Agent status
     st.subheader("Agent Status")
     
-    if DEMO_MODE:
-        agent_data = {
-            "Query Enhancement Agent": {"status": "Demo", "latency": "N/A"},
-            "Safety Scoring Agent": {"status": "Demo", "latency": "N/A"},
-            "Triage Agent": {"status": "Demo", "latency": "N/A"},
-            "Doctor Approval Agent": {"status": "Demo", "latency": "N/A"}
-        }
-        
-        for agent, data in agent_data.items():
-            st.write(f"**{agent}:** {data['status']} (Latency: {data['latency']})")
-    else:
-        st.info("Connect backend to see real agent status")
+    agent_data = {
+        "Query Enhancement Agent": {"status": "Demo", "latency": "N/A"},
+        "Safety Scoring Agent": {"status": "Demo", "latency": "N/A"},
+        "Triage Agent": {"status": "Demo", "latency": "N/A"},
+        "Doctor Approval Agent": {"status": "Demo", "latency": "N/A"}
+    }
+    
+    for agent, data in agent_data.items():
+        st.write(f"**{agent}:** {data['status']} (Latency: {data['latency']})")
+
+METRIC_LINE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)$')
+METRIC_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+def fetch_metrics():
+    """Fetch /metrics and parse it into {name: [(labels, value), ...]}"""
+    try:
+        response = httpx.get(METRICS_URL, timeout=5.0)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        return None, str(e)
+    
+    samples = {}
+    for line in response.text.splitlines():
+        match = METRIC_LINE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        samples.setdefault(name, []).append((dict(METRIC_LABEL.findall(labels or "")), float(value)))
+    return samples, None
+
+def metric_total(samples, name, **labels):
+    """Sum the samples of a metric whose labels match"""
+    return sum(
+        value for sample_labels, value in samples.get(name, [])
+        if all(sample_labels.get(k) == v for k, v in labels.items())
+    )
+
+def agent_latency(samples, agent):
+    """Average LLM call latency of an agent, or None without calls"""
+    count = metric_total(samples, "agent_llm_call_duration_seconds_count", agent=agent)
+    if not count:
+        return None
+    return metric_total(samples, "agent_llm_call_duration_seconds_sum", agent=agent) / count
+
+def metrics_admin_view():
+    """Render system metrics read from the backend's /metrics endpoint."""
+    samples, error = fetch_metrics()
+    if error:
+        st.error(f"Error loading metrics: {error}")
+        return
+    
+    active = metric_total(samples, "queries", status="pending") + metric_total(samples, "queries", status="processing")
+    # Query submissions only, not listing them
+    request_count = metric_total(samples, "http_request_duration_seconds_count", method="POST", route="/api/query/")
+    request_time = metric_total(samples, "http_request_duration_seconds_sum", method="POST", route="/api/query/")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Active Queries", int(active))
+    with col2:
+        st.metric("Pending Reviews", int(metric_total(samples, "pending_reviews")))
+    with col3:
+        st.metric("Urgent Queries", int(metric_total(samples, "urgent_queries")))
+    with col4:
+        st.metric("Response Time (avg)", f"{request_time / request_count:.2f}s" if request_count else "N/A")
+    
+    st.subheader("Agent Status")
+    breaker_open = metric_total(samples, "llm_circuit_open") > 0
+    st.write(f"**LLM circuit:** {'Open' if breaker_open else 'Closed'} "
+             f"(Concurrency limit: {int(metric_total(samples, 'llm_concurrency', kind='limit'))}, "
+             f"Queued for workers: {int(metric_total(samples, 'worker_queue_depth'))})")
+    
+    agents = {
+        "Query Enhancement Agent": "enhancer",
+        "Safety Scoring Agent": "scorer",
+        "Response Agent": "responder",
+        "Fused Assessment Agent": "assessor",
+    }
+    for label, agent in agents.items():
+        latency = agent_latency(samples, agent)
+        errors = sum(metric_total(samples, "agent_llm_calls_total", agent=agent, outcome=outcome)
+                     for outcome in ("error", "rate_limited", "unavailable"))
+        hits = metric_total(samples, "agent_cache_hits_total", agent=agent)
+        misses = metric_total(samples, "agent_cache_misses_total", agent=agent)
+        hit_rate = f"{hits / (hits + misses):.0%}" if hits + misses else "N/A"
+        st.write(
+            f"**{label}:** Latency: {f'{latency:.2f}s' if latency is not None else 'N/A'}, "
+            f"Errors: {int(errors)}, Cache hit rate: {hit_rate}"
+        )
+    
+    st.subheader("Database")
+    statements = metric_total(samples, "db_query_duration_seconds_count")
+    db_time = metric_total(samples, "db_query_duration_seconds_sum")
+    st.write(f"**Statements:** {int(statements)} "
+             f"(avg {1000 * db_time / statements:.2f} ms)" if statements else "**Statements:** 0")
 
 # Main app logic
 def main():
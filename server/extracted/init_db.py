@@ -1,10 +1,12 @@
 import logging
 import asyncio
 from sqlmodel import SQLModel
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlmodel.ext.asyncio.session import AsyncSession
 import os
 from pathlib import Path
 
+from db.database import async_engine
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -12,12 +14,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Database URL - using in-memory SQLite for demo purposes
-DATABASE_URL = "sqlite+aiosqlite:///:memory:"
-
-# Create async engine
-async_engine = create_async_engine(DATABASE_URL, echo=True)
-
 # Initialize database
 async def init_db():
     """Initialize the database by creating all tables."""
@@ -30,6 +26,18 @@ async def init_db():
         await conn.run_sync(SQLModel.metadata.create_all)
     logger.info("Database tables created successfully")
     
+    # Add indexes introduced since existing tables were created
+    from db.migrations import migrate_indexes
+    created = await migrate_indexes(async_engine)
+    if created:
+        logger.info("Created %d missing index(es)", len(created))
+    
+    # Full-text search index, filled from existing rows when first created
+    from db.search import create_search_index
+    async with async_engine.begin() as conn:
+        if await conn.run_sync(create_search_index):
+            logger.info("Created the full-text search index")
+    
     # Check if we should seed the database with sample data
     if os.environ.get("SEED_DB", "false").lower() == "true":
         logger.info("Seeding database with sample data...")
@@ -50,10 +58,14 @@ async def reset_db():
     # Import models to ensure they are registered with SQLModel
     from models import User, Query, Response, File
     
+    from db.search import create_search_index, drop_search_index
+    
     logger.info("Resetting database...")
     async with async_engine.begin() as conn:
+        await conn.run_sync(drop_search_index)
         await conn.run_sync(SQLModel.metadata.drop_all)
         await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(create_search_index)
     logger.info("Database reset successfully")
 
 # Run the initialization if this script is executed directly
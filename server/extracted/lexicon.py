@@ -0,0 +1,164 @@
+import os
+import re
+import json
+from typing import Dict, Iterable, List, Optional, Set
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Weighted risk lexicon used by the local safety scorer
+SAFETY_LEXICON_PATH = os.getenv(
+    "SAFETY_LEXICON_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "safety_lexicon.json")
+)
+
+
+def _normalize_term(term: str) -> str:
+    return " ".join(term.lower().split())
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """
+    Build a regex alternation factored on common prefixes.
+
+    Python's re engine tries alternatives one by one, so "pain|painful|pains"
+    re-scans the shared prefix for every branch. Factoring the terms into a
+    character trie ("pain(?:ful|s)?") lets one pass over the text rule out
+    most branches after the first character.
+    """
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for word_index, word in enumerate(term.split()):
+            if word_index:
+                node = node.setdefault(" ", {})
+            for char in word:
+                node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+class SafetyLexicon:
+    """
+    Weighted risk lexicon compiled into a single regular expression.
+
+    Terms match on word boundaries, case-insensitively, and multi-word terms
+    tolerate any whitespace between words. The alternation is factored into
+    a prefix trie, so scan cost grows with text length rather than with the
+    number of terms. Each distinct matched term with
+    weight w multiplies the baseline safety score by (1 - w), so one
+    high-risk term (w=0.75) takes the default baseline of 0.8 down to 0.2
+    and several medium-risk terms compound.
+    """
+
+    def __init__(self, terms: Dict[str, float], baseline: float = 0.8):
+        self.baseline = baseline
+        self.weights = {_normalize_term(term): float(weight) for term, weight in terms.items()}
+        self.pattern = self._compile(self.weights)
+
+    @staticmethod
+    def _compile(weights: Dict[str, float]) -> Optional["re.Pattern[str]"]:
+        if not weights:
+            return None
+        # Texts are lowercased before scanning, which is much faster than IGNORECASE
+        return re.compile(r"\b(?:" + _trie_pattern(weights) + r")\b")
+
+    @classmethod
+    def from_file(cls, path: str) -> "SafetyLexicon":
+        """
+        Load a lexicon from a JSON file of the form
+        {"baseline": 0.8, "terms": {"term": weight, ...}}.
+
+        Args:
+            path: Path to the lexicon file
+
+        Returns:
+            The compiled lexicon
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("terms", {}), baseline=data.get("baseline", 0.8))
+
+    def matches(self, text: str) -> Set[str]:
+        """
+        Find the distinct lexicon terms present in a text.
+
+        Args:
+            text: The text to scan
+
+        Returns:
+            Set of normalized matched terms
+        """
+        if self.pattern is None:
+            return set()
+        return self._terms(self.pattern.findall(text.lower()))
+
+    def _terms(self, found: List[str]) -> Set[str]:
+        weights = self.weights
+        # Only multi-word matches with unusual whitespace need normalizing
+        return {match if match in weights else _normalize_term(match) for match in found}
+
+    def _combine(self, found: List[str]) -> float:
+        score = self.baseline
+        if found:
+            for term in self._terms(found):
+                score *= 1.0 - self.weights[term]
+        return max(0.0, min(1.0, score))
+
+    def score(self, text: str) -> float:
+        """
+        Compute the combined safety score for a text.
+
+        Args:
+            text: The text to score
+
+        Returns:
+            Safety score between 0.0 (high risk) and 1.0 (low risk)
+        """
+        if self.pattern is None:
+            return self._combine([])
+        return self._combine(self.pattern.findall(text.lower()))
+
+    def score_many(self, texts: Iterable[str]) -> List[float]:
+        """
+        Score a batch of texts.
+
+        Args:
+            texts: The texts to score
+
+        Returns:
+            One safety score per text, in order
+        """
+        if self.pattern is None:
+            return [self._combine([]) for _ in texts]
+        findall = self.pattern.findall
+        combine = self._combine
+        return [combine(findall(text.lower())) for text in texts]
+
+
+_lexicon: Optional[SafetyLexicon] = None
+
+
+def get_safety_lexicon() -> SafetyLexicon:
+    """
+    Get the process-wide safety lexicon, compiling it on first use.
+
+    Returns:
+        The compiled SafetyLexicon loaded from SAFETY_LEXICON_PATH
+    """
+    global _lexicon
+    if _lexicon is None:
+        _lexicon = SafetyLexicon.from_file(SAFETY_LEXICON_PATH)
+    return _lexicon
@@ -0,0 +1,312 @@
+import os
+import json
+import time
+import logging
+import importlib.util
+from typing import AsyncIterator, Dict, Any, Optional
+import httpx
+from dotenv import load_dotenv
+
+from agents.resilience import LLMUnavailableError, llm_breaker, llm_limiter
+from agents.deadline import remaining
+from metrics import agent_call_duration, agent_calls
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Get OpenAI API key from environment variables
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Point at any OpenAI-compatible endpoint, e.g. mock_llm_server.py for local load tests
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+OPENAI_CHAT_COMPLETIONS_URL = f"{OPENAI_BASE_URL}/chat/completions"
+
+# Connection pool configuration for the shared client
+LLM_HTTP2_ENABLED = os.getenv("LLM_HTTP2_ENABLED", "True").lower() == "true"
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 100))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", 20))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", 60.0))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", 5.0))
+
+# Per-agent read timeouts (seconds)
+AGENT_TIMEOUTS = {
+    "enhancer": float(os.getenv("ENHANCER_TIMEOUT", 30.0)),
+    "scorer": float(os.getenv("SCORER_TIMEOUT", 30.0)),
+    "responder": float(os.getenv("RESPONDER_TIMEOUT", 60.0)),
+    "assessor": float(os.getenv("ASSESSOR_TIMEOUT", 45.0)),
+}
+DEFAULT_AGENT_TIMEOUT = 30.0
+
+# App-scoped client, installed by main.lifespan
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Create the pooled async HTTP client shared by all LLM agents.
+
+    HTTP/2 is only enabled when the optional ``h2`` package is installed;
+    otherwise the client falls back to HTTP/1.1 keep-alive connections.
+
+    Returns:
+        A configured httpx.AsyncClient
+    """
+    http2 = LLM_HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+    if LLM_HTTP2_ENABLED and not http2:
+        logger.warning("LLM_HTTP2_ENABLED is set but the 'h2' package is not installed, using HTTP/1.1")
+
+    limits = httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=limits,
+        timeout=httpx.Timeout(DEFAULT_AGENT_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+    )
+
+
+def set_http_client(client: Optional[httpx.AsyncClient]) -> None:
+    """
+    Install the shared HTTP client used by all agents.
+
+    Args:
+        client: The client to share, or None to clear it
+    """
+    global _http_client
+    _http_client = client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client.
+
+    The client is normally created in main.lifespan. Scripts and tests that
+    call the agents without starting the app get a lazily created client.
+
+    Returns:
+        The shared httpx.AsyncClient
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """
+    Close the shared HTTP client and release its pooled connections.
+    """
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def get_agent_timeout(agent: str) -> httpx.Timeout:
+    """
+    Get the request timeout for an agent.
+
+    Args:
+        agent: The agent name (enhancer, scorer, responder, assessor)
+
+    Returns:
+        Timeout with the agent's read budget, capped by the time left until
+        the request deadline, and the shared connect timeout
+    """
+    read = AGENT_TIMEOUTS.get(agent, DEFAULT_AGENT_TIMEOUT)
+    left = remaining()
+    if left is not None:
+        read = max(0.0, min(read, left))
+    return httpx.Timeout(read, connect=min(LLM_CONNECT_TIMEOUT, read) if left is not None else LLM_CONNECT_TIMEOUT)
+
+
+def check_deadline(agent: str) -> None:
+    """
+    Fail fast when the request deadline has already passed.
+
+    Raises:
+        LLMUnavailableError: If no time is left
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        raise LLMUnavailableError(f"Request deadline exceeded, {agent} call not attempted")
+
+
+def cut_by_deadline(error: Exception) -> bool:
+    """
+    Check whether a timeout was caused by the request deadline rather than
+    a slow endpoint, so it does not count against the endpoint's health.
+    """
+    left = remaining()
+    return isinstance(error, httpx.TimeoutException) and left is not None and left <= 0
+
+
+async def post_chat_completion(agent: str, payload: Dict[str, Any]) -> httpx.Response:
+    """
+    Send a chat completion request over the shared HTTP client.
+
+    Calls pass through the shared circuit breaker and adaptive concurrency
+    limiter. Rate limits (429) and server errors are returned to the caller
+    as usual but count as failures for both.
+
+    Args:
+        agent: The calling agent name, used to select the timeout
+        payload: The chat completion request body
+
+    Returns:
+        The raw HTTP response
+
+    Raises:
+        LLMUnavailableError: If the request deadline has passed, the circuit
+            is open, no concurrency slot became available, or the request
+            failed in transport
+    """
+    try:
+        check_deadline(agent)
+        await llm_limiter.acquire(timeout=remaining())
+    except LLMUnavailableError:
+        agent_calls.inc(agent, "unavailable")
+        raise
+
+    # Set while the breaker admitted the call and has not seen its outcome
+    pending = False
+    try:
+        pending = llm_breaker.allow()
+        if not pending:
+            agent_calls.inc(agent, "unavailable")
+            raise LLMUnavailableError(f"LLM circuit is open, {agent} call not attempted")
+        client = get_http_client()
+        start = time.monotonic()
+        try:
+            response = await client.post(
+                OPENAI_CHAT_COMPLETIONS_URL,
+                headers={
+                    "Authorization": f"Bearer {OPENAI_API_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json=payload,
+                timeout=get_agent_timeout(agent)
+            )
+        except httpx.HTTPError as e:
+            agent_calls.inc(agent, "error")
+            if not cut_by_deadline(e):
+                pending = False
+                llm_breaker.record_failure()
+                llm_limiter.on_drop()
+            raise LLMUnavailableError(f"{agent} request failed: {e!r}") from e
+
+        latency = time.monotonic() - start
+        agent_call_duration.observe(latency, agent)
+        pending = False
+        if response.status_code == 429 or response.status_code >= 500:
+            agent_calls.inc(agent, "rate_limited" if response.status_code == 429 else "error")
+            llm_breaker.record_failure()
+            llm_limiter.on_drop()
+        else:
+            agent_calls.inc(agent, "ok" if response.status_code == 200 else "error")
+            llm_breaker.record_success()
+            llm_limiter.on_success(latency)
+        return response
+    finally:
+        if pending:
+            llm_breaker.abandon()
+        llm_limiter.release()
+
+
+async def stream_chat_completion(agent: str, payload: Dict[str, Any]) -> AsyncIterator[str]:
+    """
+    Stream a chat completion over the shared HTTP client.
+
+    Yields the content deltas as they arrive. Closing or cancelling the
+    iterator closes the upstream connection, which aborts the generation.
+    The call holds a concurrency slot until the stream ends; its time to
+    first token is what the limiter sees as latency.
+
+    Args:
+        agent: The calling agent name, used to select the timeout
+        payload: The chat completion request body, without ``stream``
+
+    Yields:
+        Content deltas of the assistant message
+
+    Raises:
+        LLMUnavailableError: If the circuit is open, no concurrency slot
+            became available, the endpoint returned an error, or the
+            stream failed in transport
+    """
+    try:
+        check_deadline(agent)
+        await llm_limiter.acquire(timeout=remaining())
+    except LLMUnavailableError:
+        agent_calls.inc(agent, "unavailable")
+        raise
+
+    # Set while the breaker admitted the call and has not seen its outcome
+    pending = False
+    try:
+        pending = llm_breaker.allow()
+        if not pending:
+            agent_calls.inc(agent, "unavailable")
+            raise LLMUnavailableError(f"LLM circuit is open, {agent} call not attempted")
+        client = get_http_client()
+        start = time.monotonic()
+        first_token = True
+        try:
+            async with client.stream(
+                "POST",
+                OPENAI_CHAT_COMPLETIONS_URL,
+                headers={
+                    "Authorization": f"Bearer {OPENAI_API_KEY}",
+                    "Content-Type": "application/json",
+                    "Accept": "text/event-stream"
+                },
+                json={**payload, "stream": True},
+                timeout=get_agent_timeout(agent)
+            ) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    agent_calls.inc(agent, "rate_limited" if response.status_code == 429 else "error")
+                    if response.status_code == 429 or response.status_code >= 500:
+                        pending = False
+                        llm_breaker.record_failure()
+                        llm_limiter.on_drop()
+                    raise LLMUnavailableError(
+                        f"{agent} stream failed: {response.status_code} - {response.text}"
+                    )
+
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or []
+                    content = choices[0].get("delta", {}).get("content") if choices else None
+                    if content:
+                        if first_token:
+                            first_token = False
+                            pending = False
+                            llm_breaker.record_success()
+                            llm_limiter.on_success(time.monotonic() - start)
+                        yield content
+            if first_token:
+                # Completed without any content
+                pending = False
+                llm_breaker.record_success()
+                llm_limiter.on_success(time.monotonic() - start)
+            agent_calls.inc(agent, "ok")
+            agent_call_duration.observe(time.monotonic() - start, agent)
+        except (httpx.HTTPError, ValueError) as e:
+            agent_calls.inc(agent, "error")
+            if not cut_by_deadline(e):
+                pending = False
+                llm_breaker.record_failure()
+                llm_limiter.on_drop()
+            raise LLMUnavailableError(f"{agent} stream failed: {e!r}") from e
+    finally:
+        if pending:
+            llm_breaker.abandon()
+        llm_limiter.release()
@@ -1,4 +1,147 @@
-from app.cli import run_cli
+import os
+from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.openapi.utils import get_openapi
+from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+
+# Load environment variables
+load_dotenv()
+
+# Import database initialization
+from db.init_db import init_db
+
+# Import the shared HTTP client used by the AI agents
+from agents.llm_client import create_http_client, set_http_client, close_http_client
+from agents.worker import query_worker_pool
+from agents.resilience import get_resilience_state
+from db.archive import archive_scheduler
+
+# Import metrics collection
+import metrics
+from db.database import async_engine, read_engine, get_read_session, dispose_engines
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Import routes
+from routes import query, file, triage, review
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Lifecycle manager for the FastAPI application.
+    Initializes the database, the pooled agent HTTP client, the
+    background query workers and the archival job on startup.
+    """
+    # Initialize the database on startup
+    await init_db()
+    
+    # Share one keep-alive HTTP client across all agents
+    app.state.http_client = create_http_client()
+    set_http_client(app.state.http_client)
+    
+    # Start the background agent pipeline workers
+    query_worker_pool.start()
+    
+    # Periodically archive closed queries, if ARCHIVE_INTERVAL_SECONDS is set
+    archive_scheduler.start()
+    yield
+    # Stop workers before closing pooled agent and database connections on shutdown
+    await archive_scheduler.stop()
+    await query_worker_pool.stop()
+    await close_http_client()
+    await dispose_engines()
+
+
+# Create FastAPI app
+app = FastAPI(
+    title="Medical AI Assistant API",
+    description="API for a medical AI assistant using multiple agents and MCP orchestration",
+    version="0.1.0",
+    lifespan=lifespan,
+)
+
+# Record request latency per route and database statement timings
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(async_engine.sync_engine)
+metrics.instrument_engine(read_engine.sync_engine)
+
+# Configure CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # For demo purposes only, restrict in production
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+# Custom OpenAPI schema
+def custom_openapi():
+    if app.openapi_schema:
+        return app.openapi_schema
+    
+    openapi_schema = get_openapi(
+        title=app.title,
+        version=app.version,
+        description=app.description,
+        routes=app.routes,
+    )
+    
+    # Add security schemes
+    openapi_schema["components"]["securitySchemes"] = {
+        "RoleHeader": {
+            "type": "apiKey",
+            "in": "header",
+            "name": "X-User-Role",
+            "description": "Role-based access header (patient, doctor, admin)"
+        }
+    }
+    
+    app.openapi_schema = openapi_schema
+    return app.openapi_schema
+
+
+app.openapi = custom_openapi
+
+# Include routers
+app.include_router(query.router, prefix="/api/query", tags=["Query"])
+app.include_router(file.router, prefix="/api/file", tags=["File"])
+app.include_router(triage.router, prefix="/api/triage", tags=["Triage"])
+app.include_router(review.router, prefix="/api/review", tags=["Review"])
+
+
+@app.get("/", tags=["Health"])
+async def health_check():
+    """
+    Health check endpoint to verify the API is running.
+    """
+    return {"status": "healthy", "message": "Medical AI Assistant API is running"}
+
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def get_metrics(session: AsyncSession = Depends(get_read_session)):
+    """
+    Expose metrics in the Prometheus text format.
+    """
+    await metrics.refresh_queue_gauges(session)
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/api/health/agents", tags=["Health"])
+async def agent_health():
+    """
+    Report the state of the shared LLM concurrency limiter and circuit breaker.
+    """
+    return get_resilience_state()
+
 
 if __name__ == "__main__":
-    run_cli()
+    import uvicorn
+    
+    host = os.getenv("API_HOST", "0.0.0.0")
+    port = int(os.getenv("API_PORT", 8000))
+    debug = os.getenv("DEBUG", "False").lower() == "true"
+    
+    uvicorn.run("main:app", host=host, port=port, reload=debug)
@@ -0,0 +1,377 @@
+"""
+Prometheus text-format metrics for the API, the agents and the database.
+
+Counters and histograms are plain dicts keyed by label tuples. Updates run
+on the event loop (or a single DB thread) without locks, so the hot path
+costs a dict lookup and an add. Values that are cheap to read at scrape
+time, such as cache hit counts or queue depths, are collected then instead
+of being updated on every request.
+"""
+
+import time
+import math
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+
+# Latency buckets in seconds, from fast cache hits to slow LLM calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """
+    Base class for a metric family with a fixed set of label names.
+    """
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines)
+
+    def _labels(self, key: Labels) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+
+def _collect(values: Dict[Labels, float], callback: Optional[Callable[[], Dict[Labels, float]]]) -> Dict[Labels, float]:
+    if callback is None:
+        return values
+    try:
+        return callback()
+    except Exception:
+        return {}
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing counter, incremented directly or read from a
+    callback at scrape time.
+    """
+    type = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        callback: Optional[Callable[[], Dict[Labels, float]]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+        self.callback = callback
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> List[Sample]:
+        values = _collect(self._values, self.callback)
+        return [(f"{self.name}_total", self._labels(key), value) for key, value in values.items()]
+
+
+class Gauge(Metric):
+    """
+    Value that can go up and down, set directly or read from a callback at
+    scrape time.
+    """
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        callback: Optional[Callable[[], Dict[Labels, float]]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+        self.callback = callback
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> List[Sample]:
+        values = _collect(self._values, self.callback)
+        return [(self.name, self._labels(key), value) for key, value in values.items()]
+
+
+class Histogram(Metric):
+    """
+    Cumulative histogram with fixed buckets.
+    """
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: bucket counts (last one is +Inf), sum, count
+        self._counts: Dict[Labels, List[int]] = {}
+        self._sums: Dict[Labels, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[labels] = self._sums.get(labels, 0.0) + value
+
+    def count(self, *labels: str) -> int:
+        return sum(self._counts.get(labels, ()))
+
+    def sum(self, *labels: str) -> float:
+        return self._sums.get(labels, 0.0)
+
+    def samples(self) -> List[Sample]:
+        samples: List[Sample] = []
+        for key, counts in self._counts.items():
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append((f"{self.name}_sum", labels, self._sums[key]))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class Registry:
+    """
+    Collection of metric families rendered together.
+    """
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# HTTP
+http_request_duration = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+))
+
+# Agents
+agent_call_duration = REGISTRY.register(Histogram(
+    "agent_llm_call_duration_seconds", "Latency of LLM calls by agent", ("agent",)
+))
+agent_calls = REGISTRY.register(Counter(
+    "agent_llm_calls", "LLM calls by agent and outcome (ok, error, rate_limited, unavailable)", ("agent", "outcome")
+))
+pipeline_stage_duration = REGISTRY.register(Histogram(
+    "pipeline_stage_duration_seconds", "Wall time of pipeline stages", ("pipeline", "stage", "status")
+))
+
+# Database
+db_query_duration = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "Database statement latency by operation", ("operation",), buckets=DB_BUCKETS
+))
+db_errors = REGISTRY.register(Counter(
+    "db_errors", "Database statements that raised", ("operation",)
+))
+
+# Queue depths, refreshed from the database when /metrics is scraped
+queries_by_status = REGISTRY.register(Gauge(
+    "queries", "Queries by status", ("status",)
+))
+pending_reviews = REGISTRY.register(Gauge(
+    "pending_reviews", "Queries waiting for a doctor's review"
+))
+urgent_queries = REGISTRY.register(Gauge(
+    "urgent_queries", "Urgent queries not yet approved or rejected"
+))
+
+
+def _cache_hits() -> Dict[Labels, float]:
+    from agents.cache import get_agent_cache
+    agents = get_agent_cache().stats()["agents"]
+    return {(agent,): stats["hits"] for agent, stats in agents.items()}
+
+
+def _cache_misses() -> Dict[Labels, float]:
+    from agents.cache import get_agent_cache
+    agents = get_agent_cache().stats()["agents"]
+    return {(agent,): stats["misses"] for agent, stats in agents.items()}
+
+
+def _worker_queue() -> Dict[Labels, float]:
+    from agents.worker import query_worker_pool
+    return {(): query_worker_pool.queue.qsize()}
+
+
+def _limiter() -> Dict[Labels, float]:
+    from agents.resilience import llm_limiter
+    state = llm_limiter.state()
+    return {("limit",): state["limit"], ("in_flight",): state["in_flight"], ("waiting",): state["waiting"]}
+
+
+def _breaker_open() -> Dict[Labels, float]:
+    from agents.resilience import CircuitBreaker, llm_breaker
+    return {(): float(llm_breaker.state != CircuitBreaker.CLOSED)}
+
+
+# Collected at scrape time from state the components already keep
+REGISTRY.register(Counter("agent_cache_hits", "Agent cache hits by agent", ("agent",), callback=_cache_hits))
+REGISTRY.register(Counter("agent_cache_misses", "Agent cache misses by agent", ("agent",), callback=_cache_misses))
+REGISTRY.register(Gauge("worker_queue_depth", "Queries queued for background processing", callback=_worker_queue))
+REGISTRY.register(Gauge("llm_concurrency", "Adaptive LLM concurrency limiter state", ("kind",), callback=_limiter))
+REGISTRY.register(Gauge("llm_circuit_open", "1 while the LLM circuit breaker is open or half-open", callback=_breaker_open))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template.
+
+    The route template (e.g. ``/api/query/{query_id}``) is used rather than
+    the raw path to keep label cardinality bounded. Unmatched requests are
+    recorded as ``unmatched``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            http_request_duration.observe(
+                time.perf_counter() - start, scope["method"], path, str(status_code)
+            )
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Record statement counts and latencies for an engine.
+
+    Pass ``async_engine.sync_engine`` for async engines.
+
+    Args:
+        engine: The SQLAlchemy engine to instrument
+    """
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info["query_start"].pop()
+    db_query_duration.observe(time.perf_counter() - start, _operation(statement))
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start"):
+        connection.info["query_start"].pop()
+    db_errors.inc(_operation(exception_context.statement or ""))
+
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+async def refresh_queue_gauges(session: Any) -> None:
+    """
+    Refresh the query status gauges with one grouped count.
+
+    Args:
+        session: An async database session
+    """
+    from models import Query, StatusEnum, TriageLevelEnum
+
+    rows = await session.exec(
+        select(Query.status, Query.triage_level, func.count()).group_by(Query.status, Query.triage_level)
+    )
+    by_status: Dict[str, float] = {s.value: 0 for s in StatusEnum}
+    urgent = 0
+    open_statuses = (StatusEnum.PENDING, StatusEnum.PROCESSING, StatusEnum.NEEDS_REVIEW)
+    for status, triage_level, count in rows:
+        status = StatusEnum(status)
+        by_status[status.value] = by_status.get(status.value, 0) + count
+        if triage_level is not None and TriageLevelEnum(triage_level) == TriageLevelEnum.URGENT and status in open_statuses:
+            urgent += count
+
+    for status, count in by_status.items():
+        queries_by_status.set(count, status)
+    pending_reviews.set(by_status[StatusEnum.NEEDS_REVIEW.value])
+    urgent_queries.set(urgent)
+
+
+def render() -> str:
+    """
+    Render all metrics in the Prometheus text exposition format.
+    """
+    return REGISTRY.render()
@@ -0,0 +1,166 @@
+"""
+Migrations for databases created before a schema change to the models.
+
+``SQLModel.metadata.create_all`` only creates indexes together with a new
+table, so tables that already exist keep their old set of indexes. On
+startup the indexes declared on the models are compared with the ones in
+the database and the missing ones are created. Existing indexes are left
+alone, so running the migration repeatedly is safe.
+
+SQLite tables declared with ``sqlite_autoincrement`` that were created
+without it are rebuilt with AUTOINCREMENT, so keys of archived rows are
+not handed out again. Run it before the indexes and search triggers are
+created, since dropping the old table drops those as well.
+
+Run it by hand against DATABASE_URL with:
+
+    python -m db.migrations
+"""
+
+import asyncio
+import logging
+from typing import List
+
+from sqlalchemy import func, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.exc import DatabaseError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+
+logger = logging.getLogger(__name__)
+
+
+def create_missing_indexes(connection: Connection) -> List[str]:
+    """
+    Create the model indexes missing from existing tables.
+
+    Each index is created in its own savepoint, so an index that cannot be
+    built (e.g. a unique index over duplicate values) is logged and skipped
+    without blocking the others. Tables that were created are analyzed so
+    the query planner picks up the new indexes.
+
+    Args:
+        connection: A synchronous connection inside a transaction
+
+    Returns:
+        Names of the indexes that were created
+    """
+    inspector = inspect(connection)
+    created: List[str] = []
+    analyze: List[str] = []
+
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name in existing:
+                continue
+            try:
+                with connection.begin_nested():
+                    index.create(connection, checkfirst=True)
+            except DatabaseError as e:
+                logger.error("Could not create index %s on %s: %s", index.name, table.name, e.orig)
+                continue
+            logger.info("Created index %s on %s", index.name, table.name)
+            created.append(index.name)
+            if table.name not in analyze:
+                analyze.append(table.name)
+
+    for table_name in analyze:
+        connection.exec_driver_sql(f'ANALYZE "{table_name}"')
+    return created
+
+
+def enable_sqlite_autoincrement(connection: Connection) -> List[str]:
+    """
+    Rebuild SQLite tables that should use AUTOINCREMENT but were created
+    without it.
+
+    Rows are copied into a new table with the same keys and the old table is
+    dropped, together with its indexes and triggers. The key sequence starts
+    after the highest key in the table and in its ``<table>_archive``
+    counterpart. Live rows that already reuse an archived key are logged;
+    the archival job leaves them in place.
+
+    Args:
+        connection: A synchronous connection inside a transaction, with
+            foreign key enforcement off (the SQLite default)
+
+    Returns:
+        Names of the tables that were rebuilt
+    """
+    if connection.dialect.name != "sqlite":
+        return []
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    rebuilt: List[str] = []
+
+    for table in SQLModel.metadata.sorted_tables:
+        if not table.dialect_options["sqlite"]["autoincrement"] or not inspector.has_table(table.name):
+            continue
+        sql = connection.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table.name,)
+        ).scalar()
+        if "AUTOINCREMENT" in sql.upper():
+            continue
+
+        name = preparer.format_table(table)
+        rebuild = preparer.quote(f"{table.name}_rebuild")
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        columns = ", ".join(preparer.quote(column.name) for column in table.c if column.name in existing)
+        ddl = str(CreateTable(table).compile(dialect=connection.dialect))
+        connection.exec_driver_sql(ddl.replace(f"CREATE TABLE {name}", f"CREATE TABLE {rebuild}", 1))
+        connection.exec_driver_sql(f"INSERT INTO {rebuild} ({columns}) SELECT {columns} FROM {name}")
+        connection.exec_driver_sql(f"DROP TABLE {name}")
+        connection.exec_driver_sql(f"ALTER TABLE {rebuild} RENAME TO {name}")
+
+        # Archived rows keep their keys, so the sequence must start past them too
+        last = connection.execute(select(func.max(table.c.id))).scalar() or 0
+        archive = SQLModel.metadata.tables.get(f"{table.name}_archive")
+        if archive is not None and inspector.has_table(archive.name):
+            last = max(last, connection.execute(select(func.max(archive.c.id))).scalar() or 0)
+            reused = connection.execute(
+                select(func.count()).select_from(table.join(archive, table.c.id == archive.c.id))
+            ).scalar()
+            if reused:
+                logger.warning("%d %s rows reuse keys of archived rows and will not be archived", reused, table.name)
+        connection.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name = ?", (table.name,))
+        connection.exec_driver_sql("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table.name, last))
+        logger.info("Rebuilt %s with AUTOINCREMENT", table.name)
+        rebuilt.append(table.name)
+    return rebuilt
+
+
+async def migrate_indexes(engine: AsyncEngine) -> List[str]:
+    """
+    Bring the indexes of an existing database up to date with the models,
+    after rebuilding SQLite tables that lack AUTOINCREMENT.
+
+    Args:
+        engine: The async engine of the database to migrate
+
+    Returns:
+        Names of the indexes that were created
+    """
+    # Import models to ensure they are registered with SQLModel
+    from models import User, Query, Response, File
+
+    async with engine.begin() as conn:
+        await conn.run_sync(enable_sqlite_autoincrement)
+        return await conn.run_sync(create_missing_indexes)
+
+
+if __name__ == "__main__":
+    from sqlalchemy.engine import make_url
+    from db.database import DATABASE_URL, async_engine
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    async def main() -> None:
+        created = await migrate_indexes(async_engine)
+        print(f"{make_url(DATABASE_URL).render_as_string(hide_password=True)}: created {len(created)} index(es)" + (f": {', '.join(created)}" if created else ""))
+        await async_engine.dispose()
+
+    asyncio.run(main())
@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+"""
+Local OpenAI-compatible stand-in server for load and latency testing.
+
+Serves ``POST /v1/chat/completions`` with deterministic canned outputs for
+each agent (enhancer, scorer, batch scorer, fused assessor, responder) and
+configurable latency, error and rate-limit behaviour. Requests with
+``"stream": true`` get the same output as ``chat.completion.chunk``
+events. Point the agents at it with:
+
+    MCP_ENABLED=False OPENAI_API_KEY=local OPENAI_BASE_URL=http://localhost:8001/v1
+
+Run it with ``python mock_llm_server.py --port 8001 --latency-ms 300`` or,
+for tests, mount ``create_app()`` on an ``httpx.ASGITransport``.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+from dataclasses import dataclass, asdict, fields
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from agents.lexicon import get_safety_lexicon
+
+
+@dataclass
+class MockSettings:
+    """
+    Behaviour of the stand-in server. All fields can be set from MOCK_LLM_*
+    environment variables or updated at runtime via POST /_mock/config.
+    """
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    # fixed, uniform (latency +/- jitter), normal (jitter is the stddev),
+    # lognormal (median latency, spread jitter / latency) or exponential (mean latency)
+    latency_distribution: str = "fixed"
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after_seconds: int = 1
+    # Delay between chunks of a streamed completion; latency_ms is the time to first chunk
+    stream_chunk_delay_ms: float = 0.0
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "MockSettings":
+        settings = cls()
+        for field in fields(cls):
+            value = os.getenv(f"MOCK_LLM_{field.name.upper()}")
+            if value is not None:
+                settings.update({field.name: value})
+        return settings
+
+    def update(self, values: Dict[str, Any]) -> None:
+        for field in fields(self):
+            if field.name in values and values[field.name] is not None:
+                value = values[field.name]
+                if field.name == "seed":
+                    value = int(value)
+                elif field.name == "latency_distribution":
+                    value = str(value)
+                else:
+                    value = type(getattr(self, field.name))(value)
+                setattr(self, field.name, value)
+
+
+def sample_latency(settings: MockSettings, rng: random.Random) -> float:
+    """
+    Draw a response delay in seconds from the configured distribution.
+    """
+    mean = settings.latency_ms
+    jitter = settings.latency_jitter_ms
+    distribution = settings.latency_distribution
+    if distribution == "uniform":
+        delay = rng.uniform(mean - jitter, mean + jitter)
+    elif distribution == "normal":
+        delay = rng.gauss(mean, jitter)
+    elif distribution == "lognormal" and mean > 0:
+        sigma = jitter / mean if jitter else 0.5
+        delay = mean * rng.lognormvariate(0.0, sigma)
+    elif distribution == "exponential" and mean > 0:
+        delay = rng.expovariate(1.0 / mean)
+    else:
+        delay = mean
+    return max(0.0, delay) / 1000
+
+
+def _stable_fraction(text: str) -> float:
+    """Map text to a deterministic value in [0, 1)."""
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+def _score(text: str) -> float:
+    return round(get_safety_lexicon().score(text), 2)
+
+
+def _triage(score: float) -> str:
+    if score < 0.3:
+        return "urgent"
+    if score < 0.5:
+        return "high"
+    if score < 0.7:
+        return "medium"
+    return "low"
+
+
+def canned_completion(messages: List[Dict[str, str]]) -> str:
+    """
+    Produce a deterministic reply based on which agent's prompt is in use.
+
+    Args:
+        messages: The chat messages of the request
+
+    Returns:
+        The assistant message content
+    """
+    system = next((m["content"] for m in messages if m.get("role") == "system"), "").lower()
+    user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+
+    if "safety scoring" in system and "json array" in system:
+        try:
+            queries = json.loads(user)
+        except ValueError:
+            queries = []
+        return json.dumps([_score(str(q)) for q in queries])
+    if "safety scoring" in system:
+        return str(_score(user))
+    if "assessment" in system:
+        score = _score(user)
+        return json.dumps({
+            "enhanced_query": f"Patient asks: {user} Relevant history and symptom duration should be clarified.",
+            "safety_score": score,
+            "triage_level": _triage(score),
+        })
+    if "enhancement" in system:
+        return f"Patient asks: {user} Relevant history and symptom duration should be clarified."
+    variant = int(_stable_fraction(user) * 3)
+    return (
+        f"Thank you for your question about: {user[:200]}\n\n"
+        "Here is some general information that may help. "
+        + ["Keep a record of your symptoms and when they occur. ",
+           "Stay hydrated and follow your current care plan. ",
+           "Monitor any changes and note what makes them better or worse. "][variant]
+        + "This information is not a substitute for professional medical advice; "
+        "please consult a healthcare professional about your situation."
+    )
+
+
+def completion_chunks(content: str, words_per_chunk: int = 2) -> List[str]:
+    """
+    Split a completion into the deltas of a streamed response.
+    """
+    words = content.split(" ")
+    return [
+        " ".join(words[i:i + words_per_chunk]) + (" " if i + words_per_chunk < len(words) else "")
+        for i in range(0, len(words), words_per_chunk)
+    ]
+
+
+def create_app(settings: Optional[MockSettings] = None) -> FastAPI:
+    """
+    Create the stand-in server application.
+
+    Args:
+        settings: Behaviour settings, read from the environment if omitted
+
+    Returns:
+        FastAPI application serving the chat completions API
+    """
+    app = FastAPI(title="Mock LLM Server", description="OpenAI-compatible stand-in for agent load tests")
+    app.state.settings = settings or MockSettings.from_env()
+    app.state.rng = random.Random(app.state.settings.seed)
+    app.state.stats = {"requests": 0, "errors": 0, "rate_limited": 0, "streams": 0, "streams_completed": 0}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        settings: MockSettings = app.state.settings
+        rng: random.Random = app.state.rng
+        stats = app.state.stats
+        stats["requests"] += 1
+
+        body = await request.json()
+        delay = sample_latency(settings, rng)
+        if delay:
+            await asyncio.sleep(delay)
+
+        roll = rng.random()
+        if roll < settings.rate_limit_rate:
+            stats["rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                headers={"Retry-After": str(settings.retry_after_seconds)},
+            )
+        if roll < settings.rate_limit_rate + settings.error_rate:
+            stats["errors"] += 1
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"message": "Simulated upstream failure", "type": "server_error"}},
+            )
+
+        messages = body.get("messages", [])
+        content = canned_completion(messages)
+        if body.get("stream"):
+            stats["streams"] += 1
+            return StreamingResponse(
+                stream_completion(content, body.get("model", "mock"), f"chatcmpl-mock-{stats['requests']}"),
+                media_type="text/event-stream",
+            )
+        prompt_tokens = sum(len(m.get("content", "").split()) for m in messages)
+        completion_tokens = len(content.split())
+        return {
+            "id": f"chatcmpl-mock-{stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    async def stream_completion(content: str, model: str, completion_id: str):
+        settings: MockSettings = app.state.settings
+        created = int(time.time())
+
+        def chunk(delta: Dict[str, str], finish_reason: Optional[str] = None) -> str:
+            return "data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }) + "\n\n"
+
+        yield chunk({"role": "assistant"})
+        for piece in completion_chunks(content):
+            if settings.stream_chunk_delay_ms:
+                await asyncio.sleep(settings.stream_chunk_delay_ms / 1000)
+            yield chunk({"content": piece})
+        yield chunk({}, finish_reason="stop")
+        yield "data: [DONE]\n\n"
+        app.state.stats["streams_completed"] += 1
+
+    @app.get("/_mock/config")
+    async def get_config():
+        return asdict(app.state.settings)
+
+    @app.post("/_mock/config")
+    async def update_config(values: Dict[str, Any]):
+        app.state.settings.update(values)
+        if "seed" in values:
+            app.state.rng = random.Random(app.state.settings.seed)
+        return asdict(app.state.settings)
+
+    @app.get("/_mock/stats")
+    async def get_stats():
+        return app.state.stats
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the OpenAI-compatible stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float)
+    parser.add_argument("--latency-jitter-ms", type=float)
+    parser.add_argument("--latency-distribution", choices=["fixed", "uniform", "normal", "lognormal", "exponential"])
+    parser.add_argument("--error-rate", type=float)
+    parser.add_argument("--rate-limit-rate", type=float)
+    parser.add_argument("--stream-chunk-delay-ms", type=float)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    mock_settings = MockSettings.from_env()
+    mock_settings.update(vars(args))
+    uvicorn.run(create_app(mock_settings), host=args.host, port=args.port, log_level="warning")
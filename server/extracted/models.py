@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from typing import Optional, List
 from datetime import datetime
 import enum
@@ -36,6 +37,16 @@ class TriageLevelEnum(str, enum.Enum):
     URGENT = "urgent"
 
 
+class QueryAssessment(SQLModel):
+    """
+    Schema for a combined enhancement, safety score and triage assessment
+    returned by the fused agent.
+    """
+    enhanced_query: str = Field(min_length=1)
+    safety_score: float = Field(ge=0.0, le=1.0)
+    triage_level: TriageLevelEnum
+
+
 class UserBase(SQLModel):
     """
     Base model for user data.
@@ -73,8 +84,17 @@ class Query(QueryBase, table=True):
     """
     Query model for database storage.
     """
+    __table_args__ = (
+        # Status lists (pending reviews, filters) ordered by age
+        Index("ix_query_status_created_at", "status", "created_at"),
+        # Triage dashboards, e.g. open urgent queries
+        Index("ix_query_triage_level_status", "triage_level", "status"),
+        # Never reuse the keys of archived rows
+        {"sqlite_autoincrement": True},
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
-    query_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    query_id: str = Field(default_factory=lambda: str(uuid.uuid4()), unique=True, index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
@@ -98,6 +118,12 @@ class Response(ResponseBase, table=True):
     """
     Response model for database storage.
     """
+    __table_args__ = (
+        # Latest response for a query
+        Index("ix_response_query_id_created_at", "query_id", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -123,9 +149,59 @@ class File(FileBase, table=True):
     """
     File model for database storage.
     """
+    __table_args__ = (
+        Index("ix_file_query_id", "query_id"),
+        {"sqlite_autoincrement": True},
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    expiry_time: datetime
+    # Indexed for the expired file purge
+    expiry_time: datetime = Field(index=True)
     
     # Relationships
-    query: Query = Relationship(back_populates="files")
\ No newline at end of file
+    query: Query = Relationship(back_populates="files")
+
+
+class QueryArchive(QueryBase, table=True):
+    """
+    Closed query moved out of the live table by the archival job.
+    Keeps the primary key it had in the query table.
+    """
+    __tablename__ = "query_archive"
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    query_id: str = Field(unique=True, index=True)
+    created_at: datetime
+    updated_at: datetime
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ResponseArchive(ResponseBase, table=True):
+    """
+    Response of an archived query.
+    """
+    __tablename__ = "response_archive"
+    __table_args__ = (
+        Index("ix_response_archive_query_id", "query_id"),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    query_id: int = Field(foreign_key="query_archive.id")
+    created_at: datetime
+    updated_at: datetime
+
+
+class FileArchive(FileBase, table=True):
+    """
+    File metadata of an archived query.
+    """
+    __tablename__ = "file_archive"
+    __table_args__ = (
+        Index("ix_file_archive_query_id", "query_id"),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    query_id: int = Field(foreign_key="query_archive.id")
+    created_at: datetime
+    expiry_time: datetime
@@ -0,0 +1,147 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+Lists are ordered by ``(created_at, id)``. A page is read by seeking past
+the last row of the previous page instead of counting ``offset`` rows, so
+deep pages cost the same as the first one and rows inserted while a client
+pages through the list do not shift it.
+
+When more rows follow, the opaque cursor for the next page is returned in
+the ``X-Next-Cursor`` header, which keeps the list bodies unchanged. The
+``offset`` parameter keeps working for existing clients and is ignored
+once a cursor is given.
+"""
+
+import os
+import json
+import base64
+import binascii
+import enum
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response, status
+from fastapi import Query as QueryParam
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+
+from db.database import InvalidCursorError
+
+CURSOR_HEADER = "X-Next-Cursor"
+
+# Larger limits are served as a page of this size
+MAX_PAGE_LIMIT = int(os.getenv("MAX_PAGE_LIMIT", 100))
+
+Key = Tuple[datetime, int]
+
+
+class SortOrder(str, enum.Enum):
+    """
+    Sort order of a list by creation time.
+    """
+    ASC = "asc"
+    DESC = "desc"
+
+
+def encode_cursor(key: Key, order: SortOrder) -> str:
+    """
+    Encode the position after ``key`` as an opaque cursor.
+
+    The sort order is part of the cursor so it cannot be replayed against a
+    list sorted the other way.
+    """
+    created_at, row_id = key
+    payload = json.dumps([created_at.isoformat(), row_id, order.value], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Key, SortOrder]:
+    """
+    Decode a cursor made by encode_cursor.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id, order = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(created_at), int(row_id)), SortOrder(order)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from e
+
+
+@dataclass
+class Page:
+    """
+    Pagination parameters of a list request.
+    """
+    limit: int = 10
+    offset: int = 0
+    after: Optional[Key] = None
+    order: SortOrder = SortOrder.ASC
+
+    def apply(self, statement: Select, created_at: Any, row_id: Any) -> Select:
+        """
+        Order, seek and limit a statement.
+
+        One row more than the page is selected so finish() can tell whether
+        another page follows.
+
+        Args:
+            statement: The filtered select
+            created_at: The creation time column to order by
+            row_id: The unique id column breaking ties
+        """
+        descending = self.order == SortOrder.DESC
+        if self.after is not None:
+            key = tuple_(created_at, row_id)
+            statement = statement.where(key < tuple_(*self.after) if descending else key > tuple_(*self.after))
+        elif self.offset:
+            statement = statement.offset(self.offset)
+        if descending:
+            statement = statement.order_by(created_at.desc(), row_id.desc())
+        else:
+            statement = statement.order_by(created_at, row_id)
+        return statement.limit(self.limit + 1)
+
+    def finish(self, rows: Sequence[Any], response: Response, key: Callable[[Any], Key]) -> List[Any]:
+        """
+        Trim the extra row and set the next page cursor header.
+
+        Args:
+            rows: Rows of the statement built by apply()
+            response: The response to set X-Next-Cursor on
+            key: Gets (created_at, id) from a row
+        """
+        rows = list(rows)
+        if rows and len(rows) > self.limit > 0:
+            rows = rows[:self.limit]
+            response.headers[CURSOR_HEADER] = encode_cursor(key(rows[-1]), self.order)
+        return rows
+
+
+def get_page(
+    limit: int = QueryParam(10, ge=1),
+    offset: int = QueryParam(0, ge=0),
+    cursor: Optional[str] = None,
+    order: SortOrder = SortOrder.ASC
+) -> Page:
+    """
+    Dependency reading the limit, offset, cursor and order parameters.
+    A limit above MAX_PAGE_LIMIT is lowered to it; the rest of the list is
+    reached through X-Next-Cursor.
+    """
+    limit = min(limit, MAX_PAGE_LIMIT)
+    if not cursor:
+        return Page(limit=limit, offset=offset, order=order)
+    try:
+        after, cursor_order = decode_cursor(cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if cursor_order != order:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cursor was issued for order={cursor_order.value}, not order={order.value}"
+        )
+    return Page(limit=limit, after=after, order=order)
@@ -0,0 +1,236 @@
+import time
+import asyncio
+import inspect
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from agents.deadline import remaining
+from metrics import pipeline_stage_duration
+
+logger = logging.getLogger(__name__)
+
+# Stage status values
+STAGE_OK = "ok"
+STAGE_FALLBACK = "fallback"
+STAGE_FAILED = "failed"
+
+
+class PipelineError(Exception):
+    """
+    Raised when a pipeline definition is invalid or a stage fails without a
+    fallback.
+    """
+
+
+@dataclass
+class Stage:
+    """
+    One step of an agent pipeline.
+
+    ``inputs`` maps the keyword arguments of ``fn`` to names in the pipeline
+    context; a list means the argument and context names are the same.
+    The return value is stored under ``outputs``: a single name, or several
+    names if ``fn`` returns a tuple of the same length. A stage runs as soon
+    as all of its inputs are available.
+
+    Each attempt is limited to ``timeout`` seconds. Failed attempts are
+    retried ``retries`` times, waiting ``retry_backoff`` seconds doubled per
+    attempt. If every attempt fails, ``fallback`` is called with the same
+    arguments; without a fallback the pipeline fails. No retries are made
+    once the request deadline has passed.
+    """
+    name: str
+    fn: Callable[..., Awaitable[Any]]
+    inputs: Union[Mapping[str, str], Sequence[str]] = ()
+    outputs: Union[str, Sequence[str]] = ()
+    timeout: Optional[float] = None
+    retries: int = 0
+    retry_backoff: float = 0.0
+    fallback: Optional[Callable[..., Any]] = None
+
+    def __post_init__(self):
+        if not isinstance(self.inputs, Mapping):
+            self.inputs = {name: name for name in self.inputs}
+        if isinstance(self.outputs, str):
+            self.outputs = (self.outputs,)
+        self.outputs = tuple(self.outputs)
+
+
+@dataclass
+class StageResult:
+    """
+    Outcome and wall time of one stage run.
+    """
+    name: str
+    status: str
+    attempts: int
+    duration: float
+    error: Optional[str] = None
+
+
+@dataclass
+class PipelineRun:
+    """
+    The final context of a pipeline run and the per-stage results.
+    """
+    context: Dict[str, Any]
+    stages: Dict[str, StageResult] = field(default_factory=dict)
+    duration: float = 0.0
+
+    def timings(self) -> Dict[str, float]:
+        return {name: result.duration for name, result in self.stages.items()}
+
+    def degraded(self) -> List[str]:
+        return [name for name, result in self.stages.items() if result.status != STAGE_OK]
+
+
+class Pipeline:
+    """
+    A DAG of agent stages connected by named values.
+
+    Independent stages run concurrently. The definition is validated when the
+    pipeline is created: output names must be unique and the stages must not
+    form a cycle.
+    """
+
+    def __init__(self, name: str, stages: List[Stage]):
+        self.name = name
+        self.stages = stages
+        self._producers: Dict[str, Stage] = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self._producers:
+                    raise PipelineError(
+                        f"{output!r} is produced by both {self._producers[output].name!r} and {stage.name!r}"
+                    )
+                self._producers[output] = stage
+        self._check_acyclic()
+
+    def _check_acyclic(self) -> None:
+        visiting, done = set(), set()
+
+        def visit(stage: Stage) -> None:
+            if stage.name in done:
+                return
+            if stage.name in visiting:
+                raise PipelineError(f"Pipeline {self.name!r} has a cycle through {stage.name!r}")
+            visiting.add(stage.name)
+            for source in stage.inputs.values():
+                if source in self._producers:
+                    visit(self._producers[source])
+            visiting.discard(stage.name)
+            done.add(stage.name)
+
+        for stage in self.stages:
+            visit(stage)
+
+    async def run(
+        self,
+        inputs: Dict[str, Any],
+        on_stage_complete: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None
+    ) -> PipelineRun:
+        """
+        Run the pipeline.
+
+        Args:
+            inputs: Initial context values
+            on_stage_complete: Optional callback awaited after each stage with
+                the stage name and the context so far. Callbacks never run
+                concurrently, so they can share a database session.
+
+        Returns:
+            PipelineRun with the final context and per-stage results
+
+        Raises:
+            PipelineError: If a stage's inputs can never be satisfied or a
+                stage fails without a fallback
+        """
+        started = time.monotonic()
+        run = PipelineRun(context=dict(inputs))
+        pending = {stage.name: stage for stage in self.stages}
+        running: Dict["asyncio.Task[Any]", Stage] = {}
+
+        for stage in self.stages:
+            missing = [s for s in stage.inputs.values() if s not in inputs and s not in self._producers]
+            if missing:
+                raise PipelineError(f"Stage {stage.name!r} needs {', '.join(missing)}, which nothing provides")
+
+        try:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(source in run.context for source in stage.inputs.values()):
+                        del pending[name]
+                        task = asyncio.ensure_future(self._run_stage(stage, run.context))
+                        running[task] = stage
+
+                if not running:
+                    raise PipelineError(f"Stages {', '.join(pending)} can never run")
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage = running.pop(task)
+                    values, result = task.result()
+                    run.stages[stage.name] = result
+                    pipeline_stage_duration.observe(result.duration, self.name, stage.name, result.status)
+                    if result.status == STAGE_FAILED:
+                        raise PipelineError(f"Stage {stage.name!r} failed: {result.error}")
+                    run.context.update(values)
+                    if on_stage_complete is not None:
+                        await on_stage_complete(stage.name, run.context)
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        run.duration = time.monotonic() - started
+        logger.debug(
+            "Pipeline %s finished in %.3fs: %s", self.name, run.duration,
+            {name: (result.status, round(result.duration, 3)) for name, result in run.stages.items()}
+        )
+        return run
+
+    async def _run_stage(self, stage: Stage, context: Dict[str, Any]) -> Tuple[Dict[str, Any], StageResult]:
+        kwargs = {arg: context[source] for arg, source in stage.inputs.items()}
+        started = time.monotonic()
+        error: Optional[BaseException] = None
+        attempts = 0
+
+        for attempt in range(stage.retries + 1):
+            attempts = attempt + 1
+            try:
+                value = await asyncio.wait_for(stage.fn(**kwargs), stage.timeout)
+                return self._outputs(stage, value), StageResult(
+                    stage.name, STAGE_OK, attempts, time.monotonic() - started
+                )
+            except Exception as e:
+                error = e
+                logger.warning("Stage %s attempt %d failed: %r", stage.name, attempts, e)
+                left = remaining()
+                if left is not None and left <= 0:
+                    break
+                if attempt < stage.retries and stage.retry_backoff:
+                    await asyncio.sleep(stage.retry_backoff * 2 ** attempt)
+
+        if stage.fallback is not None:
+            try:
+                value = stage.fallback(**kwargs)
+                if inspect.isawaitable(value):
+                    value = await value
+                return self._outputs(stage, value), StageResult(
+                    stage.name, STAGE_FALLBACK, attempts, time.monotonic() - started, repr(error)
+                )
+            except Exception as e:
+                error = e
+
+        return {}, StageResult(stage.name, STAGE_FAILED, attempts, time.monotonic() - started, repr(error))
+
+    @staticmethod
+    def _outputs(stage: Stage, value: Any) -> Dict[str, Any]:
+        if not stage.outputs:
+            return {}
+        if len(stage.outputs) == 1:
+            return {stage.outputs[0]: value}
+        if len(stage.outputs) != len(value):
+            raise PipelineError(f"Stage {stage.name!r} returned {len(value)} values for {len(stage.outputs)} outputs")
+        return dict(zip(stage.outputs, value))
@@ -0,0 +1,322 @@
+import os
+import re
+import logging
+import importlib.util
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Context windows (tokens) of the models the responder may be pointed at
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Prompt budget configuration. The cap keeps latency and cost bounded well
+# below the context window of large models.
+RESPONDER_PROMPT_TOKEN_BUDGET = int(os.getenv("RESPONDER_PROMPT_TOKEN_BUDGET", 6000))
+RESPONDER_RECENT_TURNS = int(os.getenv("RESPONDER_RECENT_TURNS", 6))
+RESPONDER_SUMMARY_MAX_TOKENS = int(os.getenv("RESPONDER_SUMMARY_MAX_TOKENS", 400))
+RESPONDER_SUMMARY_TURN_TOKENS = int(os.getenv("RESPONDER_SUMMARY_TURN_TOKENS", 40))
+RESPONDER_MIN_FILE_TOKENS = int(os.getenv("RESPONDER_MIN_FILE_TOKENS", 50))
+
+# Fixed per-message overhead of the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_STOPWORDS = frozenset(
+    "the and for are but not you your with this that have has had was were what when where "
+    "which who how why can could should would will about from into any all been does did "
+    "there their them they its it's also just than then some more most very".split()
+)
+
+_encoders: Dict[str, Any] = {}
+_tiktoken_available = importlib.util.find_spec("tiktoken") is not None
+
+
+def _get_encoder(model: str) -> Optional[Any]:
+    if not _tiktoken_available:
+        return None
+    if model not in _encoders:
+        import tiktoken
+        try:
+            _encoders[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encoders[model] = tiktoken.get_encoding("cl100k_base")
+    return _encoders[model]
+
+
+def tokenizer_name() -> str:
+    return "tiktoken" if _tiktoken_available else "approx"
+
+
+def count_tokens(text: str, model: str) -> int:
+    """
+    Count the tokens of a text locally.
+
+    Uses tiktoken when it is installed, otherwise an estimate of one token
+    per four characters, which errs slightly high for English prose.
+
+    Args:
+        text: The text to count
+        model: The model whose tokenizer to use
+
+    Returns:
+        Number of tokens
+    """
+    if not text:
+        return 0
+    encoder = _get_encoder(model)
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return (len(text) + 3) // 4
+
+
+def count_message_tokens(messages: List[Dict[str, str]], model: str) -> int:
+    """
+    Count the prompt tokens of a list of chat messages.
+    """
+    return sum(count_tokens(m.get("content", ""), model) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """
+    Cut a text down to at most ``max_tokens`` tokens.
+
+    Args:
+        text: The text to truncate
+        max_tokens: The token limit
+        model: The model whose tokenizer to use
+
+    Returns:
+        The text, truncated with an ellipsis if it was too long
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    encoder = _get_encoder(model)
+    if encoder is not None:
+        return encoder.decode(encoder.encode(text)[:max_tokens - 1]).rstrip() + "…"
+    cut = text[:max(0, (max_tokens - 1) * 4)]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip() + "…"
+
+
+def get_prompt_budget(model: str, max_completion_tokens: int) -> int:
+    """
+    Get the prompt token budget for a model.
+
+    Args:
+        model: The model name
+        max_completion_tokens: Tokens reserved for the completion
+
+    Returns:
+        The smaller of RESPONDER_PROMPT_TOKEN_BUDGET and what the model's
+        context window leaves after the completion
+    """
+    window = MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+    return max(0, min(RESPONDER_PROMPT_TOKEN_BUDGET, window - max_completion_tokens))
+
+
+def _keywords(text: str) -> set:
+    return {w for w in _WORD_RE.findall(text.lower()) if len(w) > 2 and w not in _STOPWORDS}
+
+
+def rank_file_summaries(query_text: str, file_summaries: List[str]) -> List[int]:
+    """
+    Order file summaries by keyword overlap with the query.
+
+    Args:
+        query_text: The user query
+        file_summaries: The file content summaries
+
+    Returns:
+        Indices into file_summaries, most relevant first. Ties keep the
+        original order.
+    """
+    query_words = _keywords(query_text)
+
+    def relevance(index: int) -> Tuple[float, int]:
+        words = _keywords(file_summaries[index])
+        overlap = len(query_words & words) / len(query_words) if query_words else 0.0
+        return (-overlap, index)
+
+    return sorted(range(len(file_summaries)), key=relevance)
+
+
+def summarize_turns(turns: List[Dict[str, str]], max_tokens: int, model: str) -> str:
+    """
+    Compress conversation turns into a short running summary.
+
+    Each turn is reduced to its first sentence, capped at
+    RESPONDER_SUMMARY_TURN_TOKENS. If the result is still over the limit the
+    oldest lines are dropped first.
+
+    Args:
+        turns: The turns to compress, oldest first
+        max_tokens: The token limit for the summary
+        model: The model whose tokenizer to use
+
+    Returns:
+        The summary text, empty if nothing fits
+    """
+    lines = []
+    for turn in turns:
+        content = " ".join(turn.get("content", "").split())
+        if not content:
+            continue
+        first_sentence = _SENTENCE_RE.split(content, 1)[0]
+        speaker = "User" if turn.get("role") == "user" else "Assistant"
+        lines.append(f"- {speaker}: {truncate_to_tokens(first_sentence, RESPONDER_SUMMARY_TURN_TOKENS, model)}")
+
+    header = "Summary of earlier conversation:"
+    used = count_tokens(header, model)
+    kept: List[str] = []
+    for line in reversed(lines):
+        cost = count_tokens(line, model) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    if not kept:
+        return ""
+    return "\n".join([header] + kept[::-1])
+
+
+@dataclass
+class PromptPlan:
+    """
+    The assembled messages and the budgeting decisions behind them.
+    """
+    messages: List[Dict[str, str]]
+    decisions: Dict[str, Any] = field(default_factory=dict)
+
+
+def build_response_prompt(
+    system_prompt: str,
+    query_text: str,
+    model: str,
+    max_completion_tokens: int,
+    file_summaries: Optional[List[str]] = None,
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+    budget: Optional[int] = None,
+) -> PromptPlan:
+    """
+    Assemble the responder prompt within a token budget.
+
+    The system prompt and the query are always kept. The most recent
+    RESPONDER_RECENT_TURNS turns of the conversation are kept verbatim as long
+    as they fit, older turns are compressed into a running summary, and file
+    summaries are added most relevant first, truncating or dropping those
+    that do not fit.
+
+    Args:
+        system_prompt: The responder system prompt
+        query_text: The query text to respond to
+        model: The model the prompt is for
+        max_completion_tokens: Tokens reserved for the completion
+        file_summaries: Optional list of file content summaries
+        conversation_history: Optional conversation history, oldest first
+        budget: Prompt token budget, derived from the model if omitted
+
+    Returns:
+        PromptPlan with the messages and the budgeting decisions
+    """
+    file_summaries = file_summaries or []
+    history = [turn for turn in (conversation_history or []) if turn.get("content")]
+    if budget is None:
+        budget = get_prompt_budget(model, max_completion_tokens)
+
+    def message_cost(content: str) -> int:
+        return count_tokens(content, model) + MESSAGE_OVERHEAD_TOKENS
+
+    files_header = "\n\nAttached Files:\n"
+    used = message_cost(system_prompt) + message_cost(query_text)
+    remaining = budget - used
+
+    # Most recent turns, verbatim
+    recent: List[Dict[str, str]] = []
+    for turn in reversed(history[-RESPONDER_RECENT_TURNS:] if RESPONDER_RECENT_TURNS > 0 else []):
+        cost = message_cost(turn["content"])
+        if cost > remaining:
+            break
+        recent.append(turn)
+        remaining -= cost
+    recent.reverse()
+    older = history[:len(history) - len(recent)]
+
+    # Reserve room for the running summary before spending the rest on files
+    summary_budget = min(RESPONDER_SUMMARY_MAX_TOKENS, remaining // 4) if older else 0
+    remaining -= summary_budget
+
+    included_files: List[int] = []
+    truncated_files: List[int] = []
+    dropped_files: List[int] = []
+    file_parts: Dict[int, str] = {}
+    if file_summaries:
+        remaining -= count_tokens(files_header, model)
+        for index in rank_file_summaries(query_text, file_summaries):
+            part = f"File {index + 1}: {file_summaries[index]}"
+            cost = count_tokens(part, model) + 1
+            if cost <= remaining:
+                file_parts[index] = part
+                included_files.append(index)
+                remaining -= cost
+            elif remaining >= RESPONDER_MIN_FILE_TOKENS:
+                file_parts[index] = truncate_to_tokens(part, remaining - 1, model)
+                included_files.append(index)
+                truncated_files.append(index)
+                remaining = 0
+            else:
+                dropped_files.append(index)
+        if not file_parts:
+            remaining += count_tokens(files_header, model)
+
+    # The summary may use whatever the files left over, up to its cap
+    summary = ""
+    if older:
+        summary_budget = min(RESPONDER_SUMMARY_MAX_TOKENS, summary_budget + max(0, remaining))
+        summary = summarize_turns(older, summary_budget - MESSAGE_OVERHEAD_TOKENS, model)
+
+    messages = [{"role": "system", "content": system_prompt}]
+    if summary:
+        messages.append({"role": "system", "content": summary})
+    messages.extend(recent)
+
+    user_content = query_text
+    if file_parts:
+        # Keep the original file numbering so the model can refer to them
+        file_summary_text = "\n\n".join(file_parts[i] for i in sorted(file_parts))
+        user_content = f"{query_text}{files_header}{file_summary_text}"
+    messages.append({"role": "user", "content": user_content})
+
+    prompt_tokens = count_message_tokens(messages, model)
+    decisions = {
+        "model": model,
+        "tokenizer": tokenizer_name(),
+        "budget": budget,
+        "prompt_tokens": prompt_tokens,
+        "over_budget": prompt_tokens > budget,
+        "history_turns": len(history),
+        "verbatim_turns": len(recent),
+        "summarized_turns": len(older),
+        "summary_tokens": count_tokens(summary, model),
+        "files_total": len(file_summaries),
+        "files_included": sorted(included_files),
+        "files_truncated": truncated_files,
+        "files_dropped": sorted(dropped_files),
+    }
+    logger.debug("Responder prompt budget: %s", decisions)
+    return PromptPlan(messages=messages, decisions=decisions)
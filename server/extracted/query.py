@@ -1,16 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response
+from fastapi import Query as QueryParam
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from typing import List, Optional
-from pydantic import BaseModel
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field, ValidationError
+import os
+import json
+import asyncio
 
-from db.database import get_session
+from db.database import InvalidCursorError, get_read_session, get_session, stream_rows
+from db.archive import get_archived_query
+from db.search import (
+    SEARCH_MAX_CANDIDATES, InvalidSearchError, decode_search_cursor, encode_search_cursor,
+    search_statement, search_terms, search_window_statement
+)
 from models import Query, QueryBase, StatusEnum, RoleEnum, TriageLevelEnum
-from agents.enhancer import enhance_query
-from agents.scorer import calculate_safety_score
-from agents.triage import determine_triage_level
+from agents.worker import process_query, query_worker_pool
+from routes.pagination import CURSOR_HEADER, Page, get_page
+from agents.deadline import (
+    DEADLINE_HEADER, QUERY_DEADLINE_SECONDS, deadline_scope, degraded_stages, remaining, resolve_deadline
+)
 
 router = APIRouter()
 
+# Process queries in the background by default instead of inline
+QUERY_ASYNC_DEFAULT = os.getenv("QUERY_ASYNC_DEFAULT", "False").lower() == "true"
+
+# Bulk ingestion limits
+QUERY_BATCH_MAX_ITEMS = int(os.getenv("QUERY_BATCH_MAX_ITEMS", 100))
+QUERY_BATCH_CONCURRENCY = int(os.getenv("QUERY_BATCH_CONCURRENCY", 16))
+
 
 class QueryCreate(BaseModel):
     """
@@ -30,6 +52,48 @@ class QueryResponse(BaseModel):
     status: StatusEnum
     triage_level: Optional[TriageLevelEnum] = None
     safety_score: Optional[float] = None
+    degraded_stages: List[str] = []
+    archived: bool = False
+
+
+class QuerySearchResult(BaseModel):
+    """
+    Schema for a full-text search match, best first.
+    """
+    query_id: str
+    query_text: str
+    status: StatusEnum
+    triage_level: Optional[TriageLevelEnum] = None
+    created_at: datetime
+    archived: bool = False
+    score: float
+    snippet: str
+
+
+class QueryBatchCreate(BaseModel):
+    """
+    Schema for creating several queries at once. Items are validated one by
+    one so an invalid item only fails itself.
+    """
+    items: List[Dict[str, Any]] = Field(min_length=1)
+
+
+class QueryBatchItem(BaseModel):
+    """
+    Result for one item of a batch, in input order.
+    """
+    index: int
+    query: Optional[QueryResponse] = None
+    error: Optional[str] = None
+
+
+class QueryBatchResponse(BaseModel):
+    """
+    Schema for the bulk ingestion response.
+    """
+    items: List[QueryBatchItem]
+    succeeded: int
+    failed: int
 
 
 async def verify_role(x_user_role: Optional[str] = Header(None)):
@@ -49,9 +113,25 @@ async def verify_role(x_user_role: Optional[str] = Header(None)):
         )
 
 
+def wants_async(prefer: Optional[str]) -> bool:
+    """
+    Decide whether a request asked for background processing.
+    Honors the RFC 7240 "Prefer: respond-async" header, falling back to
+    the QUERY_ASYNC_DEFAULT setting.
+    """
+    if prefer:
+        preferences = [p.strip().lower() for p in prefer.split(",")]
+        if "respond-async" in preferences:
+            return True
+    return QUERY_ASYNC_DEFAULT
+
+
 @router.post("/", response_model=QueryResponse, status_code=status.HTTP_201_CREATED)
 async def create_query(
     query_data: QueryCreate,
+    response: Response,
+    prefer: Optional[str] = Header(None),
+    x_request_deadline: Optional[str] = Header(None, alias=DEADLINE_HEADER),
     session: AsyncSession = Depends(get_session),
     role: RoleEnum = Depends(verify_role)
 ):
@@ -61,22 +141,49 @@ async def create_query(
     1. Query Enhancement Agent
     2. Safety Scoring Agent
     3. Triage Agent
+    
+    With "Prefer: respond-async" (or QUERY_ASYNC_DEFAULT) the query is stored
+    as PENDING and 202 Accepted is returned immediately. The agents then run
+    on the background worker pool and the status moves to PROCESSING; poll
+    GET /api/query/{query_id} for progress. The final status is the same as
+    with inline processing (worker.final_status), and a query whose
+    processing failed ends as NEEDS_REVIEW. When the queue is full, 503 is
+    returned with Retry-After.
+    
+    Inline processing runs under a deadline of QUERY_DEADLINE_SECONDS or the
+    X-Request-Deadline header (seconds). Stages short of time degrade to
+    local results and are listed in degraded_stages.
     """
     # Create a new query
     query = Query(**query_data.dict())
     
-    # Process with AI agents
-    query.enhanced_query = await enhance_query(query.query_text)
-    query.safety_score = await calculate_safety_score(query.enhanced_query)
-    query.triage_level = await determine_triage_level(query.enhanced_query, query.safety_score)
+    if wants_async(prefer) and query_worker_pool.running:
+        if query_worker_pool.is_full():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Query processing queue is full, please retry later",
+                headers={"Retry-After": "5"}
+            )
+        
+        # Persist as pending and hand off to the worker pool
+        query.status = StatusEnum.PENDING
+        session.add(query)
+        await session.commit()
+        await session.refresh(query)
+        
+        if query_worker_pool.submit(query.id):
+            response.status_code = status.HTTP_202_ACCEPTED
+            response.headers["Location"] = f"/api/query/{query.query_id}"
+            return QueryResponse(
+                query_id=query.query_id,
+                query_text=query.query_text,
+                status=query.status
+            )
     
-    # Update status based on triage level
-    if query.triage_level == TriageLevelEnum.URGENT:
-        query.status = StatusEnum.NEEDS_REVIEW
-    elif query.safety_score and query.safety_score < 0.7:  # Safety threshold
-        query.status = StatusEnum.NEEDS_REVIEW
-    else:
-        query.status = StatusEnum.PROCESSING
+    # Process with AI agents within the request deadline
+    with deadline_scope(resolve_deadline(x_request_deadline, QUERY_DEADLINE_SECONDS)):
+        await process_query(query)
+        degraded = degraded_stages()
     
     # Save to database
     session.add(query)
@@ -89,22 +196,219 @@ async def create_query(
         enhanced_query=query.enhanced_query,
         status=query.status,
         triage_level=query.triage_level,
-        safety_score=query.safety_score
+        safety_score=query.safety_score,
+        degraded_stages=degraded
     )
 
 
+@router.post("/batch", response_model=QueryBatchResponse)
+async def create_queries_batch(
+    batch: QueryBatchCreate,
+    x_request_deadline: Optional[str] = Header(None, alias=DEADLINE_HEADER),
+    session: AsyncSession = Depends(get_session),
+    role: RoleEnum = Depends(verify_role)
+):
+    """
+    Create up to QUERY_BATCH_MAX_ITEMS queries in one request.
+    
+    All items run through the agents concurrently, so identical texts share
+    one cached agent call and safety scores are micro-batched together. The
+    processed queries are then inserted in a single transaction with a
+    savepoint per item: an item that fails validation, processing or its
+    insert reports an error without rolling back the others. Results are
+    returned in input order. The request deadline covers the whole batch, so
+    items still waiting for a slot when it passes run degraded.
+    """
+    if len(batch.items) > QUERY_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch of {len(batch.items)} items exceeds the limit of {QUERY_BATCH_MAX_ITEMS}"
+        )
+    
+    results: List[QueryBatchItem] = [QueryBatchItem(index=i) for i in range(len(batch.items))]
+    queries: Dict[int, Query] = {}
+    degraded: Dict[int, List[str]] = {}
+    deadline = resolve_deadline(x_request_deadline, QUERY_DEADLINE_SECONDS)
+    semaphore = asyncio.Semaphore(QUERY_BATCH_CONCURRENCY)
+    
+    async def process_item(index: int, item: Dict[str, Any]):
+        try:
+            query_data = QueryCreate.model_validate(item)
+        except ValidationError as e:
+            results[index].error = f"Invalid item: {e.errors()[0]['msg']}"
+            return
+        query = Query(**query_data.model_dump())
+        async with semaphore:
+            try:
+                # Only what is left of the batch deadline, so queued items degrade once it passes
+                with deadline_scope(remaining()):
+                    await process_query(query)
+                    degraded[index] = degraded_stages()
+            except Exception as e:
+                print(f"Batch item {index} failed: {e}")
+                results[index].error = "Processing failed"
+                return
+        queries[index] = query
+    
+    # Process with AI agents, all items sharing one deadline from the start of the request
+    with deadline_scope(deadline):
+        await asyncio.gather(*(process_item(i, item) for i, item in enumerate(batch.items)))
+    
+    # Save to database in one transaction, isolating each insert
+    saved = 0
+    for index, query in sorted(queries.items()):
+        try:
+            async with session.begin_nested():
+                session.add(query)
+        except SQLAlchemyError as e:
+            print(f"Batch item {index} could not be saved: {e}")
+            results[index].error = "Could not be saved"
+            continue
+        saved += 1
+        results[index].query = QueryResponse(
+            query_id=query.query_id,
+            query_text=query.query_text,
+            enhanced_query=query.enhanced_query,
+            status=query.status,
+            triage_level=query.triage_level,
+            safety_score=query.safety_score,
+            degraded_stages=degraded.get(index, [])
+        )
+    await session.commit()
+    
+    return QueryBatchResponse(
+        items=results,
+        succeeded=saved,
+        failed=len(results) - saved
+    )
+
+
+@router.get("/export")
+async def export_queries(
+    status_filter: Optional[StatusEnum] = QueryParam(None, alias="status"),
+    triage_level: Optional[TriageLevelEnum] = None,
+    role: RoleEnum = Depends(verify_role)
+):
+    """
+    Export queries as newline-delimited JSON, oldest first.
+    Rows are streamed from a server-side cursor, so exports of any size run
+    in constant memory. Only doctors and admins can export queries.
+    """
+    if role not in [RoleEnum.DOCTOR, RoleEnum.ADMIN]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors and admins can export queries"
+        )
+    
+    statement = select(
+        Query.query_id, Query.query_text, Query.enhanced_query, Query.status,
+        Query.triage_level, Query.safety_score, Query.created_at
+    ).order_by(Query.created_at, Query.id)
+    if status_filter:
+        statement = statement.where(Query.status == status_filter)
+    if triage_level:
+        statement = statement.where(Query.triage_level == triage_level)
+    
+    async def lines():
+        async for row in stream_rows(statement):
+            record = dict(row._mapping)
+            record["created_at"] = record["created_at"].isoformat()
+            yield json.dumps(record) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/search", response_model=List[QuerySearchResult])
+async def search_queries(
+    response: Response,
+    q: str = QueryParam(..., min_length=1, max_length=500),
+    limit: int = QueryParam(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_read_session),
+    role: RoleEnum = Depends(verify_role)
+):
+    """
+    Search queries and their responses by text.
+    Matches must contain every word of q and are ranked by relevance (BM25
+    on SQLite, ts_rank_cd on PostgreSQL), each with a snippet highlighting
+    the matched words. Archived queries are included. Only the
+    SEARCH_MAX_CANDIDATES most recent matches are ranked, so very common
+    words return the best recent matches.
+    Paginated by cursor; the next page's cursor is returned in the
+    X-Next-Cursor header.
+    Only doctors and admins can search queries.
+    """
+    if role not in [RoleEnum.DOCTOR, RoleEnum.ADMIN]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only doctors and admins can search queries"
+        )
+    
+    dialect = session.bind.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"Search is not available on {dialect}"
+        )
+    
+    try:
+        terms = search_terms(q, dialect)
+        after, window_start = decode_search_cursor(cursor, q) if cursor else (None, None)
+    except (InvalidSearchError, InvalidCursorError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    # The first page fixes which matches are ranked
+    if window_start is None:
+        window = await session.exec(
+            search_window_statement(dialect), params={"terms": terms, "candidates": SEARCH_MAX_CANDIDATES}
+        )
+        window_start = window.scalar()
+        if window_start is None:
+            return []
+    
+    # One row more than the page tells whether another page follows
+    params = {"terms": terms, "window_start": window_start, "limit": limit + 1}
+    if after is not None:
+        params.update(after_score=after[0], after_id=after[1])
+    results = await session.exec(search_statement(dialect, after), params=params)
+    rows = results.all()
+    
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[CURSOR_HEADER] = encode_search_cursor((rows[-1].score, rows[-1].id), window_start, q)
+    
+    return [
+        QuerySearchResult(
+            query_id=row.query_id,
+            query_text=row.query_text,
+            status=row.status,
+            triage_level=row.triage_level,
+            created_at=row.created_at,
+            archived=row.archived,
+            score=row.score,
+            snippet=row.snippet
+        ) for row in rows
+    ]
+
+
 @router.get("/{query_id}", response_model=QueryResponse)
 async def get_query(
     query_id: str,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     role: RoleEnum = Depends(verify_role)
 ):
     """
     Get a specific query by its ID.
+    Closed queries moved to the archive are still returned, with archived set.
     """
     # Query the database
-    query = await session.exec(Query.select.where(Query.query_id == query_id))
+    query = await session.exec(select(Query).where(Query.query_id == query_id))
     query = query.first()
+    archived = False
+    
+    if not query:
+        query = await get_archived_query(session, query_id)
+        archived = query is not None
     
     if not query:
         raise HTTPException(
@@ -118,21 +422,24 @@ async def get_query(
         enhanced_query=query.enhanced_query,
         status=query.status,
         triage_level=query.triage_level,
-        safety_score=query.safety_score
+        safety_score=query.safety_score,
+        archived=archived
     )
 
 
 @router.get("/", response_model=List[QueryResponse])
 async def list_queries(
-    limit: int = 10,
-    offset: int = 0,
+    response: Response,
     status: Optional[StatusEnum] = None,
-    session: AsyncSession = Depends(get_session),
+    page: Page = Depends(get_page),
+    session: AsyncSession = Depends(get_read_session),
     role: RoleEnum = Depends(verify_role)
 ):
     """
     List queries with optional filtering by status.
     Doctors and admins can see all queries, patients can only see their own.
+    Paginated by cursor or offset; the next page's cursor is returned in the
+    X-Next-Cursor header.
     """
     # Only doctors and admins can list all queries
     if role not in [RoleEnum.DOCTOR, RoleEnum.ADMIN]:
@@ -142,18 +449,18 @@ async def list_queries(
         )
     
     # Build the query
-    query = Query.select()
+    query = select(Query)
     
     # Apply status filter if provided
     if status:
         query = query.where(Query.status == status)
     
     # Apply pagination
-    query = query.offset(offset).limit(limit)
+    query = page.apply(query, Query.created_at, Query.id)
     
     # Execute the query
     results = await session.exec(query)
-    queries = results.all()
+    queries = page.finish(results.all(), response, lambda q: (q.created_at, q.id))
     
     return [
         QueryResponse(
@@ -0,0 +1,245 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Adaptive concurrency limiter configuration
+LLM_LIMIT_INITIAL = int(os.getenv("LLM_LIMIT_INITIAL", 20))
+LLM_LIMIT_MIN = int(os.getenv("LLM_LIMIT_MIN", 2))
+LLM_LIMIT_MAX = int(os.getenv("LLM_LIMIT_MAX", 200))
+LLM_LIMIT_BACKOFF = float(os.getenv("LLM_LIMIT_BACKOFF", 0.7))
+LLM_LATENCY_TARGET_MS = float(os.getenv("LLM_LATENCY_TARGET_MS", 0))  # 0 disables latency-based backoff
+LLM_MAX_WAITING = int(os.getenv("LLM_MAX_WAITING", 500))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", 5.0))
+
+# Circuit breaker configuration
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", 5))
+LLM_BREAKER_RESET_TIMEOUT = float(os.getenv("LLM_BREAKER_RESET_TIMEOUT", 30.0))
+LLM_BREAKER_HALF_OPEN_CALLS = int(os.getenv("LLM_BREAKER_HALF_OPEN_CALLS", 1))
+
+
+class LLMUnavailableError(Exception):
+    """
+    Raised when an LLM call is not attempted or cannot complete: the circuit
+    is open, the limiter queue is saturated, or the transport failed.
+    Agents catch it and fall back to their local implementation.
+    """
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limiter for outbound LLM calls.
+
+    The limit grows by roughly one for every ``limit`` successful calls and
+    is multiplied by ``backoff`` on failures, rate limits, or calls slower
+    than the latency target. Callers beyond the limit wait in FIFO order for
+    at most ``queue_timeout`` seconds; when too many are already waiting they
+    are rejected immediately.
+    """
+
+    def __init__(
+        self,
+        initial: int = LLM_LIMIT_INITIAL,
+        min_limit: int = LLM_LIMIT_MIN,
+        max_limit: int = LLM_LIMIT_MAX,
+        backoff: float = LLM_LIMIT_BACKOFF,
+        latency_target: Optional[float] = LLM_LATENCY_TARGET_MS / 1000 or None,
+        max_waiting: int = LLM_MAX_WAITING,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT,
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_target = latency_target
+        self.max_waiting = max_waiting
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+        self.rejected = 0
+        self.decreases = 0
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for a free slot.
+
+        Args:
+            timeout: Optional limit on the wait, tighter than queue_timeout
+
+        Raises:
+            LLMUnavailableError: If the wait queue is full or the wait times out
+        """
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.max_waiting:
+            self.rejected += 1
+            raise LLMUnavailableError("LLM concurrency limit reached and wait queue is full")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            wait = self.queue_timeout if timeout is None else max(0.0, min(self.queue_timeout, timeout))
+            await asyncio.wait_for(future, wait)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # The slot was granted as we gave up; hand it on
+                self.release()
+            else:
+                future.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise LLMUnavailableError("Timed out waiting for an LLM concurrency slot") from e
+            raise
+
+    def release(self) -> None:
+        """
+        Free a slot and wake waiters while capacity allows.
+        """
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            future = self._waiters.popleft()
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    def on_success(self, latency: float) -> None:
+        """
+        Record a successful call and its latency in seconds.
+        """
+        if self.latency_target and latency > self.latency_target:
+            self._decrease()
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._wake()
+
+    def on_drop(self) -> None:
+        """
+        Record a failed, rate-limited or timed-out call.
+        """
+        self._decrease()
+
+    def _decrease(self) -> None:
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self.decreases += 1
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "rejected": self.rejected,
+            "decreases": self.decreases,
+        }
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker shared by all agents.
+
+    Opens after ``failure_threshold`` consecutive failures. While open,
+    calls fail fast. After ``reset_timeout`` seconds it lets a few probe
+    calls through (half-open); one success closes it again, one failure
+    reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = LLM_BREAKER_RESET_TIMEOUT,
+        half_open_calls: int = LLM_BREAKER_HALF_OPEN_CALLS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probes = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        """
+        Check whether a call may proceed.
+
+        Returns:
+            False if the circuit is open and the call should fail fast
+        """
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._probes = 0
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_calls:
+                self.rejected += 1
+                return False
+            self._probes += 1
+        return True
+
+    def abandon(self) -> None:
+        """
+        Give back a call admitted by allow() that ended without an outcome,
+        e.g. because it was cancelled, so its half-open probe slot is not
+        held forever.
+        """
+        if self.state == self.HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        if self.state != self.CLOSED:
+            logger.info("LLM circuit breaker closed")
+            self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("LLM circuit breaker opened after %d failures", self.consecutive_failures)
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "rejected": self.rejected,
+            "times_opened": self.times_opened,
+        }
+
+
+# Process-wide instances shared by all agents
+llm_limiter = AdaptiveConcurrencyLimiter()
+llm_breaker = CircuitBreaker()
+
+
+def get_resilience_state() -> Dict[str, Any]:
+    """
+    Get limiter and breaker state for monitoring.
+
+    Returns:
+        Dictionary with the limiter and circuit breaker state
+    """
+    return {
+        "limiter": llm_limiter.state(),
+        "circuit_breaker": llm_breaker.snapshot(),
+    }
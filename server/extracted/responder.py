@@ -1,9 +1,17 @@
 import os
+import re
 import json
-from typing import Dict, Any, Optional, List
-import httpx
+import asyncio
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, Any, Optional, List
 from dotenv import load_dotenv
 
+from agents.llm_client import post_chat_completion, stream_chat_completion
+from agents.cache import get_agent_cache, make_cache_key
+from agents.resilience import LLMUnavailableError
+from agents.prompt_budget import build_response_prompt
+from agents.deadline import has_budget, record_degraded
+
 # Load environment variables
 load_dotenv()
 
@@ -13,6 +21,49 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
 
 # MCP configuration
 MCP_ENABLED = os.getenv("MCP_ENABLED", "True").lower() == "true"
+# Delay between chunks of the simulated MCP stream (seconds)
+MCP_STREAM_CHUNK_DELAY = float(os.getenv("MCP_STREAM_CHUNK_DELAY", 0.02))
+
+# Prompt settings, part of the result cache key
+PROMPT_VERSION = "2"
+TEMPERATURE = 0.4  # Balanced temperature for informative but varied responses
+MAX_COMPLETION_TOKENS = 1000
+
+# Response used when the API call fails
+FALLBACK_RESPONSE = (
+    "I apologize, but I'm unable to provide a specific response at this time. "
+    "Please consult with a healthcare professional for personalized medical advice."
+)
+
+# Response used when no API key is configured
+MOCK_RESPONSE = (
+    "This is a simulated medical response. In a real implementation, this would be generated "
+    "by an AI model with medical knowledge. The response would address the query while being "
+    "careful to provide accurate information and appropriate disclaimers."
+)
+
+SYSTEM_PROMPT = (
+    "You are a medical AI assistant providing information to help with medical queries. "
+    "Your responses should be informative, evidence-based, and helpful, while being careful "
+    "not to provide definitive diagnoses or treatment recommendations. Always include appropriate "
+    "disclaimers and encourage users to consult with healthcare professionals for personalized advice. "
+    "Use clear, accessible language and organize information in a structured way."
+)
+
+
+def response_cache_key(
+    query_text: str,
+    file_summaries: Optional[List[str]] = None,
+    conversation_history: Optional[List[Dict[str, str]]] = None
+) -> str:
+    """
+    Build the agent cache key for a response request.
+    """
+    model = "mcp" if MCP_ENABLED else OPENAI_MODEL
+    return make_cache_key(
+        "responder", query_text, model, TEMPERATURE, PROMPT_VERSION,
+        extra={"file_summaries": file_summaries, "conversation_history": conversation_history}
+    )
 
 
 async def generate_response(
@@ -25,6 +76,9 @@ async def generate_response(
     
     This function creates a comprehensive and safe response to a medical query,
     taking into account any attached files and conversation history.
+    Identical requests are served from the agent cache, and the local MCP
+    path is used while the LLM endpoint is unavailable or when the request
+    deadline leaves too little time.
     
     Args:
         query_text: The query text to respond to
@@ -34,10 +88,31 @@ async def generate_response(
     Returns:
         Generated response text
     """
-    if MCP_ENABLED:
+    key = response_cache_key(query_text, file_summaries, conversation_history)
+    cache = get_agent_cache()
+    
+    if not MCP_ENABLED and not has_budget("respond"):
+        cached = await cache.get("responder", key, default=None) if cache.enabled else None
+        if cached is not None:
+            return cached
+        record_degraded("respond")
+        return await generate_response_with_mcp(query_text, file_summaries, conversation_history)
+    
+    async def compute() -> str:
+        if MCP_ENABLED:
+            return await generate_response_with_mcp(query_text, file_summaries, conversation_history)
+        else:
+            return await generate_response_with_openai(query_text, file_summaries, conversation_history)
+    
+    try:
+        return await cache.get_or_compute(
+            "responder", key, compute, is_fallback=lambda response: response == FALLBACK_RESPONSE
+        )
+    except LLMUnavailableError as e:
+        # Fail fast to the local path while the LLM endpoint is unhealthy
+        print(f"OpenAI unavailable, responding locally: {e}")
+        record_degraded("respond")
         return await generate_response_with_mcp(query_text, file_summaries, conversation_history)
-    else:
-        return await generate_response_with_openai(query_text, file_summaries, conversation_history)
 
 
 async def generate_response_with_openai(
@@ -48,6 +123,10 @@ async def generate_response_with_openai(
     """
     Generate a medical response using direct OpenAI API calls.
     
+    The prompt is assembled within the model's token budget: recent turns
+    are kept verbatim, older ones summarized and file summaries included
+    by relevance.
+    
     Args:
         query_text: The query text to respond to
         file_summaries: Optional list of file content summaries
@@ -58,52 +137,21 @@ async def generate_response_with_openai(
     """
     if not OPENAI_API_KEY:
         # Fall back to mock implementation if no API key is available
-        return (
-            "This is a simulated medical response. In a real implementation, this would be generated "
-            "by an AI model with medical knowledge. The response would address the query while being "
-            "careful to provide accurate information and appropriate disclaimers."
-        )
+        return MOCK_RESPONSE
     
-    # Prepare the system prompt
-    system_prompt = (
-        "You are a medical AI assistant providing information to help with medical queries. "
-        "Your responses should be informative, evidence-based, and helpful, while being careful "
-        "not to provide definitive diagnoses or treatment recommendations. Always include appropriate "
-        "disclaimers and encourage users to consult with healthcare professionals for personalized advice. "
-        "Use clear, accessible language and organize information in a structured way."
+    # Prepare the messages array within the token budget
+    plan = build_response_prompt(
+        SYSTEM_PROMPT, query_text, OPENAI_MODEL, MAX_COMPLETION_TOKENS,
+        file_summaries=file_summaries, conversation_history=conversation_history
     )
     
-    # Prepare the messages array
-    messages = [{"role": "system", "content": system_prompt}]
-    
-    # Add conversation history if available
-    if conversation_history:
-        messages.extend(conversation_history)
-    
-    # Prepare the user prompt with file summaries if available
-    user_content = query_text
-    if file_summaries and len(file_summaries) > 0:
-        file_summary_text = "\n\n".join([f"File {i+1}: {summary}" for i, summary in enumerate(file_summaries)])
-        user_content = f"{query_text}\n\nAttached Files:\n{file_summary_text}"
-    
-    messages.append({"role": "user", "content": user_content})
-    
-    # Make the API request
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {OPENAI_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": OPENAI_MODEL,
-                "messages": messages,
-                "temperature": 0.4,  # Balanced temperature for informative but varied responses
-                "max_tokens": 1000
-            },
-            timeout=60.0  # 60 second timeout for longer responses
-        )
+    # Make the API request over the shared HTTP client
+    response = await post_chat_completion("responder", {
+        "model": OPENAI_MODEL,
+        "messages": plan.messages,
+        "temperature": TEMPERATURE,
+        "max_tokens": MAX_COMPLETION_TOKENS
+    })
     
     # Parse the response
     if response.status_code == 200:
@@ -113,10 +161,140 @@ async def generate_response_with_openai(
     else:
         # Fall back to a generic response if API call fails
         print(f"OpenAI API error: {response.status_code} - {response.text}")
-        return (
-            "I apologize, but I'm unable to provide a specific response at this time. "
-            "Please consult with a healthcare professional for personalized medical advice."
-        )
+        return FALLBACK_RESPONSE
+
+
+async def stream_response(
+    query_text: str,
+    file_summaries: Optional[List[str]] = None,
+    conversation_history: Optional[List[Dict[str, str]]] = None
+) -> AsyncIterator[str]:
+    """
+    Stream a medical response to a user query chunk by chunk.
+    
+    The streaming counterpart of generate_response: a cached response is
+    sent as a single chunk, and a complete streamed response is cached.
+    If the LLM endpoint is unavailable before the first chunk the local
+    MCP stream is used instead, and that fallback is not cached. Closing
+    the iterator cancels the upstream request.
+    
+    Args:
+        query_text: The query text to respond to
+        file_summaries: Optional list of file content summaries
+        conversation_history: Optional conversation history
+        
+    Yields:
+        Chunks of the response text
+    """
+    cache = get_agent_cache()
+    key = response_cache_key(query_text, file_summaries, conversation_history)
+    if cache.enabled:
+        cached = await cache.get("responder", key, default=None)
+        if cached is not None:
+            yield cached
+            return
+    
+    fell_back = False
+    if MCP_ENABLED:
+        source = stream_response_with_mcp(query_text, file_summaries, conversation_history)
+    elif not has_budget("respond"):
+        record_degraded("respond")
+        fell_back = True
+        source = stream_response_with_mcp(query_text, file_summaries, conversation_history)
+    else:
+        source = stream_response_with_openai(query_text, file_summaries, conversation_history)
+    
+    parts: List[str] = []
+    try:
+        async with aclosing(source) as chunks:
+            async for chunk in chunks:
+                parts.append(chunk)
+                yield chunk
+    except LLMUnavailableError as e:
+        if parts:
+            raise
+        print(f"OpenAI unavailable, streaming locally: {e}")
+        record_degraded("respond")
+        fell_back = True
+        async with aclosing(stream_response_with_mcp(query_text, file_summaries, conversation_history)) as chunks:
+            async for chunk in chunks:
+                parts.append(chunk)
+                yield chunk
+    
+    # Never store the local fallback under the model's cache key
+    response_text = "".join(parts).strip()
+    if cache.enabled and response_text and not fell_back:
+        await cache.set(key, response_text)
+
+
+async def stream_response_with_openai(
+    query_text: str,
+    file_summaries: Optional[List[str]] = None,
+    conversation_history: Optional[List[Dict[str, str]]] = None
+) -> AsyncIterator[str]:
+    """
+    Stream a medical response from the OpenAI API.
+    
+    Args:
+        query_text: The query text to respond to
+        file_summaries: Optional list of file content summaries
+        conversation_history: Optional conversation history
+        
+    Yields:
+        Content deltas as they arrive
+        
+    Raises:
+        LLMUnavailableError: If the request fails
+    """
+    if not OPENAI_API_KEY:
+        # Fall back to mock implementation if no API key is available
+        for chunk in chunk_text(MOCK_RESPONSE):
+            yield chunk
+        return
+    
+    plan = build_response_prompt(
+        SYSTEM_PROMPT, query_text, OPENAI_MODEL, MAX_COMPLETION_TOKENS,
+        file_summaries=file_summaries, conversation_history=conversation_history
+    )
+    async with aclosing(stream_chat_completion("responder", {
+        "model": OPENAI_MODEL,
+        "messages": plan.messages,
+        "temperature": TEMPERATURE,
+        "max_tokens": MAX_COMPLETION_TOKENS
+    })) as chunks:
+        async for chunk in chunks:
+            yield chunk
+
+
+async def stream_response_with_mcp(
+    query_text: str,
+    file_summaries: Optional[List[str]] = None,
+    conversation_history: Optional[List[Dict[str, str]]] = None
+) -> AsyncIterator[str]:
+    """
+    Stream the MCP response in small chunks, simulating token streaming.
+    
+    Args:
+        query_text: The query text to respond to
+        file_summaries: Optional list of file content summaries
+        conversation_history: Optional conversation history
+        
+    Yields:
+        Chunks of a few words each
+    """
+    response = await generate_response_with_mcp(query_text, file_summaries, conversation_history)
+    for chunk in chunk_text(response):
+        if MCP_STREAM_CHUNK_DELAY:
+            await asyncio.sleep(MCP_STREAM_CHUNK_DELAY)
+        yield chunk
+
+
+def chunk_text(text: str, words_per_chunk: int = 3) -> List[str]:
+    """
+    Split text into chunks of a few words, keeping all whitespace.
+    """
+    words = re.findall(r"\s*\S+\s*", text) or [text]
+    return ["".join(words[i:i + words_per_chunk]) for i in range(0, len(words), words_per_chunk)]
 
 
 async def generate_response_with_mcp(
@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+import json
+from contextlib import aclosing
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Request
+from fastapi import Response as HTTPResponse
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
+from sqlalchemy import func
+from sqlalchemy.sql import Select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from pydantic import BaseModel
 
-from db.database import get_session
+from db.database import async_engine, get_read_session, get_session
 from models import Query, Response, StatusEnum, RoleEnum
-from agents.responder import generate_response
+from agents.responder import generate_response, stream_response
+from routes.pagination import Page, get_page
+from agents.resilience import LLMUnavailableError
+from agents.deadline import (
+    DEADLINE_HEADER, REVIEW_DEADLINE_SECONDS, deadline_scope, degraded_stages, resolve_deadline
+)
 
 router = APIRouter()
 
@@ -36,6 +48,7 @@ class ReviewResponse(BaseModel):
     is_approved: bool
     doctor_notes: Optional[str] = None
     status: StatusEnum
+    degraded_stages: List[str] = []
 
 
 async def verify_role(x_user_role: Optional[str] = Header(None)):
@@ -58,14 +71,18 @@ async def verify_role(x_user_role: Optional[str] = Header(None)):
 @router.post("/generate", response_model=ReviewResponse, status_code=status.HTTP_201_CREATED)
 async def create_response_for_review(
     review_data: ReviewCreate,
+    x_request_deadline: Optional[str] = Header(None, alias=DEADLINE_HEADER),
     session: AsyncSession = Depends(get_session),
     role: RoleEnum = Depends(verify_role)
 ):
     """
     Generate an AI response for a query and submit it for doctor review.
+    Generation runs under a deadline of REVIEW_DEADLINE_SECONDS or the
+    X-Request-Deadline header (seconds); a degraded response is listed in
+    degraded_stages.
     """
     # Get the query
-    query_result = await session.exec(Query.select.where(Query.query_id == review_data.query_id))
+    query_result = await session.exec(select(Query).where(Query.query_id == review_data.query_id))
     query = query_result.first()
     
     if not query:
@@ -81,8 +98,13 @@ async def create_response_for_review(
             detail=f"Query with status {query.status} cannot be processed for review"
         )
     
-    # Generate AI response
-    response_text = await generate_response(query.enhanced_query or query.query_text)
+    # End the read transaction so the writer connection is free during generation
+    await session.commit()
+    
+    # Generate AI response within the request deadline
+    with deadline_scope(resolve_deadline(x_request_deadline, REVIEW_DEADLINE_SECONDS)):
+        response_text = await generate_response(query.enhanced_query or query.query_text)
+        degraded = degraded_stages()
     
     # Create response record
     response = Response(
@@ -107,20 +129,166 @@ async def create_response_for_review(
         response_text=response.response_text,
         is_approved=response.is_approved,
         doctor_notes=response.doctor_notes,
-        status=query.status
+        status=query.status,
+        degraded_stages=degraded
+    )
+
+
+def sse_event(event: str, data: dict) -> str:
+    """
+    Format a Server-Sent Event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/generate/stream")
+async def stream_response_for_review(
+    review_data: ReviewCreate,
+    request: Request,
+    x_request_deadline: Optional[str] = Header(None, alias=DEADLINE_HEADER),
+    session: AsyncSession = Depends(get_session),
+    role: RoleEnum = Depends(verify_role)
+):
+    """
+    Generate an AI response for a query as Server-Sent Events.
+
+    Emits ``token`` events with ``{"text": ...}`` as the response is
+    generated and a final ``done`` event with the review once the response
+    has been saved. If the client disconnects, generation is cancelled and
+    nothing is saved.
+    """
+    # Get the query
+    query_result = await session.exec(select(Query).where(Query.query_id == review_data.query_id))
+    query = query_result.first()
+    
+    if not query:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Query with ID {review_data.query_id} not found"
+        )
+    
+    # Check if query is in a valid state for response generation
+    if query.status not in [StatusEnum.PROCESSING, StatusEnum.NEEDS_REVIEW]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Query with status {query.status} cannot be processed for review"
+        )
+    
+    query_pk = query.id
+    prompt_text = query.enhanced_query or query.query_text
+    deadline = resolve_deadline(x_request_deadline, REVIEW_DEADLINE_SECONDS)
+    # The request session stays open while streaming; release its connection
+    await session.commit()
+    
+    async def events() -> AsyncIterator[str]:
+        parts = []
+        # The stream runs after this handler returns, so the deadline is set here
+        with deadline_scope(deadline):
+            try:
+                # Closed on every exit, so returning early also ends the upstream request
+                async with aclosing(stream_response(prompt_text)) as chunks:
+                    async for chunk in chunks:
+                        if await request.is_disconnected():
+                            return
+                        parts.append(chunk)
+                        yield sse_event("token", {"text": chunk})
+            except LLMUnavailableError as e:
+                print(f"Response stream failed: {e}")
+                yield sse_event("error", {"detail": "Response generation failed, please retry"})
+                return
+            degraded = degraded_stages()
+        
+        # The request session is closed once streaming starts, so save in a new one
+        async with AsyncSession(async_engine, expire_on_commit=False) as write_session:
+            stored_query = await write_session.get(Query, query_pk)
+            if stored_query is None:
+                # Archived or deleted while the response was streaming
+                yield sse_event("error", {"detail": f"Query with ID {review_data.query_id} not found"})
+                return
+            response = Response(
+                response_text="".join(parts).strip(),
+                is_approved=False,  # Requires doctor approval
+                query_id=query_pk
+            )
+            stored_query.status = StatusEnum.NEEDS_REVIEW
+            write_session.add(response)
+            write_session.add(stored_query)
+            await write_session.commit()
+            await write_session.refresh(response)
+            
+            review = ReviewResponse(
+                id=response.id,
+                query_id=stored_query.query_id,
+                query_text=stored_query.query_text,
+                response_text=response.response_text,
+                is_approved=response.is_approved,
+                doctor_notes=response.doctor_notes,
+                status=stored_query.status,
+                degraded_stages=degraded
+            )
+        yield sse_event("done", review.model_dump(mode="json"))
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
+def pending_reviews_statement(page: Page) -> Select:
+    """
+    Build the query for a page of reviews pending approval.
+    
+    The latest response per query is picked with a row_number() window over
+    the responses of NEEDS_REVIEW queries, so the page is read in a single
+    round trip. Queries without a response are left out.
+    """
+    latest = (
+        select(
+            Response.id,
+            Response.query_id,
+            Response.response_text,
+            Response.is_approved,
+            Response.doctor_notes,
+            func.row_number().over(
+                partition_by=Response.query_id,
+                order_by=(Response.created_at.desc(), Response.id.desc())
+            ).label("position")
+        )
+        .join(Query, Query.id == Response.query_id)
+        .where(Query.status == StatusEnum.NEEDS_REVIEW)
+        .subquery("latest_response")
+    )
+    statement = (
+        select(
+            latest.c.id.label("response_id"),
+            Query.id,
+            Query.query_id,
+            Query.query_text,
+            Query.created_at,
+            latest.c.response_text,
+            latest.c.is_approved,
+            latest.c.doctor_notes,
+            Query.status
+        )
+        .join(latest, latest.c.query_id == Query.id)
+        .where(Query.status == StatusEnum.NEEDS_REVIEW, latest.c.position == 1)
+    )
+    return page.apply(statement, Query.created_at, Query.id)
+
+
 @router.get("/pending", response_model=List[ReviewResponse])
 async def list_pending_reviews(
-    limit: int = 10,
-    offset: int = 0,
-    session: AsyncSession = Depends(get_session),
+    http_response: HTTPResponse,
+    page: Page = Depends(get_page),
+    session: AsyncSession = Depends(get_read_session),
     role: RoleEnum = Depends(verify_role)
 ):
     """
     List all responses pending doctor review.
     Only doctors and admins can access this endpoint.
+    Paginated by cursor or offset; the next page's cursor is returned in the
+    X-Next-Cursor header.
     """
     # Only doctors and admins can access pending reviews
     if role not in [RoleEnum.DOCTOR, RoleEnum.ADMIN]:
@@ -129,36 +297,22 @@ async def list_pending_reviews(
             detail="Only doctors and admins can access pending reviews"
         )
     
-    # Get queries that need review
-    query_result = await session.exec(
-        Query.select.where(Query.status == StatusEnum.NEEDS_REVIEW)
-        .offset(offset).limit(limit)
-    )
-    queries = query_result.all()
+    # Each query with its latest response, in one statement
+    rows = await session.exec(pending_reviews_statement(page))
+    rows = page.finish(rows.all(), http_response, lambda row: (row.created_at, row.id))
     
-    # Get the latest response for each query
-    reviews = []
-    for query in queries:
-        response_result = await session.exec(
-            Response.select.where(Response.query_id == query.id)
-            .order_by(Response.created_at.desc())
+    return [
+        ReviewResponse(
+            id=row.response_id,
+            query_id=row.query_id,
+            query_text=row.query_text,
+            response_text=row.response_text,
+            is_approved=row.is_approved,
+            doctor_notes=row.doctor_notes,
+            status=row.status
         )
-        response = response_result.first()
-        
-        if response:
-            reviews.append(
-                ReviewResponse(
-                    id=response.id,
-                    query_id=query.query_id,
-                    query_text=query.query_text,
-                    response_text=response.response_text,
-                    is_approved=response.is_approved,
-                    doctor_notes=response.doctor_notes,
-                    status=query.status
-                )
-            )
-    
-    return reviews
+        for row in rows
+    ]
 
 
 @router.put("/{response_id}", response_model=ReviewResponse)
@@ -180,7 +334,7 @@ async def update_review(
         )
     
     # Get the response
-    response_result = await session.exec(Response.select.where(Response.id == response_id))
+    response_result = await session.exec(select(Response).where(Response.id == response_id))
     response = response_result.first()
     
     if not response:
@@ -190,7 +344,7 @@ async def update_review(
         )
     
     # Get the associated query
-    query_result = await session.exec(Query.select.where(Query.id == response.query_id))
+    query_result = await session.exec(select(Query).where(Query.id == response.query_id))
     query = query_result.first()
     
     if not query:
@@ -229,14 +383,14 @@ async def update_review(
 @router.get("/{query_id}", response_model=ReviewResponse)
 async def get_latest_review(
     query_id: str,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     role: RoleEnum = Depends(verify_role)
 ):
     """
     Get the latest review for a specific query.
     """
     # Get the query
-    query_result = await session.exec(Query.select.where(Query.query_id == query_id))
+    query_result = await session.exec(select(Query).where(Query.query_id == query_id))
     query = query_result.first()
     
     if not query:
@@ -247,7 +401,7 @@ async def get_latest_review(
     
     # Get the latest response for the query
     response_result = await session.exec(
-        Response.select.where(Response.query_id == query.id)
+        select(Response).where(Response.query_id == query.id)
         .order_by(Response.created_at.desc())
     )
     response = response_result.first()
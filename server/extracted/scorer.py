@@ -1,9 +1,15 @@
 import os
 import json
-from typing import Dict, Any, Optional
-import httpx
+from typing import Dict, Any, Optional, List
 from dotenv import load_dotenv
 
+from agents.llm_client import post_chat_completion
+from agents.cache import get_agent_cache, make_cache_key
+from agents.batcher import MicroBatcher
+from agents.lexicon import get_safety_lexicon
+from agents.resilience import LLMUnavailableError
+from agents.deadline import has_budget, record_degraded
+
 # Load environment variables
 load_dotenv()
 
@@ -14,6 +20,33 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
 # MCP configuration
 MCP_ENABLED = os.getenv("MCP_ENABLED", "True").lower() == "true"
 
+# Prompt settings, part of the result cache key
+PROMPT_VERSION = "1"
+TEMPERATURE = 0.1  # Low temperature for consistent scoring
+
+# Score used when the API call or parsing fails
+FALLBACK_SAFETY_SCORE = 0.5  # Default to medium risk
+
+# Micro-batching of OpenAI scoring requests
+SCORER_BATCH_ENABLED = os.getenv("SCORER_BATCH_ENABLED", "False").lower() == "true"
+SCORER_BATCH_MAX_SIZE = int(os.getenv("SCORER_BATCH_MAX_SIZE", 16))
+SCORER_BATCH_WINDOW_MS = float(os.getenv("SCORER_BATCH_WINDOW_MS", 20))
+
+SYSTEM_PROMPT = (
+    "You are a medical safety scoring agent. Your task is to evaluate the potential risk level "
+    "of a medical query. Consider factors such as urgency, severity, complexity, and potential "
+    "for harm if answered incorrectly. Return a single float value between 0.0 (high risk) and "
+    "1.0 (low risk). Do not include any explanation or additional text."
+)
+
+BATCH_SYSTEM_PROMPT = (
+    "You are a medical safety scoring agent. You will receive a JSON array of medical queries. "
+    "For each query, evaluate the potential risk level considering urgency, severity, complexity, "
+    "and potential for harm if answered incorrectly. Return only a JSON array of float values "
+    "between 0.0 (high risk) and 1.0 (low risk), one per query, in the same order. Do not include "
+    "any explanation or additional text."
+)
+
 
 async def calculate_safety_score(query_text: str) -> float:
     """
@@ -22,22 +55,53 @@ async def calculate_safety_score(query_text: str) -> float:
     This function evaluates the potential risk level of a medical query
     and returns a safety score between 0.0 (high risk) and 1.0 (low risk).
     
+    Scores are served from the agent cache when the same normalized query
+    has already been scored with the same model and prompt version. If the
+    LLM endpoint is unavailable, or the request deadline leaves too little
+    time, the local keyword scorer is used instead.
+    
     Args:
         query_text: The query text to evaluate
         
     Returns:
         Safety score between 0.0 and 1.0
     """
-    if MCP_ENABLED:
+    model = "mcp" if MCP_ENABLED else OPENAI_MODEL
+    key = make_cache_key("scorer", query_text, model, TEMPERATURE, PROMPT_VERSION)
+    cache = get_agent_cache()
+    
+    if not MCP_ENABLED and not has_budget("score"):
+        # Not enough time left for a round trip; use a cached score or score locally
+        cached = await cache.get("scorer", key, default=None) if cache.enabled else None
+        if cached is not None:
+            return cached
+        record_degraded("score")
+        return await calculate_safety_score_with_mcp(query_text)
+    
+    async def compute() -> float:
+        if MCP_ENABLED:
+            return await calculate_safety_score_with_mcp(query_text)
+        else:
+            return await calculate_safety_score_with_openai(query_text)
+    
+    try:
+        return await cache.get_or_compute(
+            "scorer", key, compute, is_fallback=lambda score: score == FALLBACK_SAFETY_SCORE
+        )
+    except LLMUnavailableError as e:
+        # Fail fast to the local keyword scorer while the LLM endpoint is unhealthy
+        print(f"OpenAI unavailable, scoring locally: {e}")
+        record_degraded("score")
         return await calculate_safety_score_with_mcp(query_text)
-    else:
-        return await calculate_safety_score_with_openai(query_text)
 
 
 async def calculate_safety_score_with_openai(query_text: str) -> float:
     """
     Calculate a safety score using direct OpenAI API calls.
     
+    With SCORER_BATCH_ENABLED, concurrent requests are collected by a
+    micro-batcher and scored together in one completion.
+    
     Args:
         query_text: The query text to evaluate
         
@@ -50,33 +114,33 @@ async def calculate_safety_score_with_openai(query_text: str) -> float:
         import random
         return max(0.5, min(0.9, 0.7 + random.uniform(-0.2, 0.2)))
     
-    # Prepare the prompt for the OpenAI API
-    system_prompt = (
-        "You are a medical safety scoring agent. Your task is to evaluate the potential risk level "
-        "of a medical query. Consider factors such as urgency, severity, complexity, and potential "
-        "for harm if answered incorrectly. Return a single float value between 0.0 (high risk) and "
-        "1.0 (low risk). Do not include any explanation or additional text."
-    )
-    
-    # Make the API request
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {OPENAI_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": OPENAI_MODEL,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": query_text}
-                ],
-                "temperature": 0.1,  # Low temperature for consistent scoring
-                "max_tokens": 10
-            },
-            timeout=30.0  # 30 second timeout
-        )
+    if SCORER_BATCH_ENABLED:
+        # Share one completion with other queries arriving in the same window
+        return await score_batcher.submit(query_text)
+    
+    return await score_single_with_openai(query_text)
+
+
+async def score_single_with_openai(query_text: str) -> float:
+    """
+    Score one query with its own OpenAI API call.
+    
+    Args:
+        query_text: The query text to evaluate
+        
+    Returns:
+        Safety score between 0.0 and 1.0
+    """
+    # Make the API request over the shared HTTP client
+    response = await post_chat_completion("scorer", {
+        "model": OPENAI_MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": query_text}
+        ],
+        "temperature": TEMPERATURE,
+        "max_tokens": 10
+    })
     
     # Parse the response
     if response.status_code == 200:
@@ -92,11 +156,68 @@ async def calculate_safety_score_with_openai(query_text: str) -> float:
         except ValueError:
             # Fall back to a default score if parsing fails
             print(f"Failed to parse safety score: {score_text}")
-            return 0.5  # Default to medium risk
+            return FALLBACK_SAFETY_SCORE
     else:
         # Fall back to a default score if API call fails
         print(f"OpenAI API error: {response.status_code} - {response.text}")
-        return 0.5  # Default to medium risk
+        return FALLBACK_SAFETY_SCORE
+
+
+async def score_batch_with_openai(query_texts: List[str]) -> List[Optional[float]]:
+    """
+    Score several queries with a single OpenAI API call.
+    
+    Args:
+        query_texts: The query texts to evaluate
+        
+    Returns:
+        One score per query, or None where the model's output for that
+        query could not be parsed
+    """
+    # Make the API request over the shared HTTP client
+    response = await post_chat_completion("scorer", {
+        "model": OPENAI_MODEL,
+        "messages": [
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": json.dumps(query_texts)}
+        ],
+        "temperature": TEMPERATURE,
+        "max_tokens": 8 * len(query_texts) + 10
+    })
+    
+    if response.status_code != 200:
+        # Same fallback as a failed single call, without retrying every item
+        print(f"OpenAI API error: {response.status_code} - {response.text}")
+        return [FALLBACK_SAFETY_SCORE] * len(query_texts)
+    
+    result = response.json()
+    scores_text = result["choices"][0]["message"]["content"].strip()
+    
+    try:
+        values = json.loads(scores_text)
+    except ValueError:
+        print(f"Failed to parse safety score batch: {scores_text}")
+        return [None] * len(query_texts)
+    
+    if not isinstance(values, list):
+        values = []
+    
+    scores: List[Optional[float]] = []
+    for i in range(len(query_texts)):
+        try:
+            scores.append(max(0.0, min(1.0, float(values[i]))))
+        except (IndexError, TypeError, ValueError):
+            scores.append(None)  # Scored again on its own by the batcher
+    return scores
+
+
+# Batches concurrent OpenAI scoring requests when SCORER_BATCH_ENABLED is set
+score_batcher = MicroBatcher(
+    score_batch_with_openai,
+    score_single_with_openai,
+    max_batch_size=SCORER_BATCH_MAX_SIZE,
+    max_wait=SCORER_BATCH_WINDOW_MS / 1000,
+)
 
 
 async def calculate_safety_score_with_mcp(query_text: str) -> float:
@@ -110,19 +231,5 @@ async def calculate_safety_score_with_mcp(query_text: str) -> float:
         Safety score between 0.0 and 1.0
     """
     # In a real implementation, this would call the MCP service
-    # For demo purposes, we'll simulate the MCP response
-    
-    # Mock MCP implementation - simulate different scores based on keywords
-    lower_query = query_text.lower()
-    
-    # Check for high-risk keywords
-    if any(word in lower_query for word in ["emergency", "severe", "extreme", "dying", "suicide"]):
-        return 0.2  # High risk
-    
-    # Check for medium-risk keywords
-    elif any(word in lower_query for word in ["pain", "chronic", "symptoms", "medication"]):
-        return 0.6  # Medium risk
-    
-    # Default to low-medium risk
-    else:
-        return 0.8  # Low risk
\ No newline at end of file
+    # For demo purposes, we score locally against the weighted risk lexicon
+    return get_safety_lexicon().score(query_text)
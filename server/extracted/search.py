@@ -0,0 +1,392 @@
+"""
+Full-text search over queries and their responses.
+
+Each query is one search document made of its query_text, enhanced_query
+and the text of all its responses, weighted in that order. The index lives
+in the query_search table:
+
+- On SQLite it is an FTS5 table keyed by the query id, ranked with BM25.
+- On PostgreSQL it holds a weighted tsvector with a GIN index, ranked with
+  ts_rank_cd.
+
+Scoring costs time for every matching document, so a search ranks only
+its SEARCH_MAX_CANDIDATES most recent matches. Searches for specific
+words match fewer documents than that and are ranked exactly; for very
+common words the best matches among recent queries come first, which
+keeps every page fast at millions of documents.
+
+Triggers on the query and response tables keep the index up to date on
+every insert, update and delete, so there is no separate indexing job.
+Rows moved by the archival job keep their document, and search results
+say whether a query was archived.
+
+create_search_index() creates the table and triggers on startup and fills
+the index from existing rows the first time it runs.
+"""
+
+import os
+import re
+import json
+import base64
+import binascii
+from typing import Optional, Tuple
+
+from sqlalchemy import Boolean, Float, Integer, String, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.sql.selectable import TextualSelect
+
+from models import Query
+from db.database import InvalidCursorError
+
+SEARCH_TABLE = "query_search"
+
+# Marks around matched terms in snippets
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# Approximate number of words in a snippet
+SNIPPET_WORDS = 16
+
+# Most recent matches ranked per search
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", 5000))
+
+# Relative weight of query_text, enhanced_query and response_text
+SQLITE_BM25_WEIGHTS = (4.0, 2.0, 1.0)
+
+SQLITE_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+        query_text, enhanced_query, response_text,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+    """,
+    # ORDER BY rank uses the weighted BM25 score
+    f"""
+    INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank)
+    VALUES ('rank', 'bm25({", ".join(map(str, SQLITE_BM25_WEIGHTS))})')
+    """,
+]
+
+SQLITE_BACKFILL = f"""
+    INSERT INTO {SEARCH_TABLE}(rowid, query_text, enhanced_query, response_text)
+    SELECT q.id, q.query_text, coalesce(q.enhanced_query, ''),
+           coalesce((SELECT group_concat(r.response_text, ' ') FROM {{responses}} r WHERE r.query_id = q.id), '')
+    FROM {{queries}} q
+"""
+
+SQLITE_RESPONSE_TEXT = f"""
+    UPDATE {SEARCH_TABLE}
+    SET response_text = coalesce((SELECT group_concat(response_text, ' ') FROM response WHERE query_id = {{row}}.query_id), '')
+    WHERE rowid = {{row}}.query_id;
+"""
+
+# Deleting a row that is being archived leaves its document in place
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_query_insert AFTER INSERT ON query BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, query_text, enhanced_query, response_text)
+        VALUES (new.id, new.query_text, coalesce(new.enhanced_query, ''), '');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_query_update AFTER UPDATE OF query_text, enhanced_query ON query BEGIN
+        UPDATE {SEARCH_TABLE}
+        SET query_text = new.query_text, enhanced_query = coalesce(new.enhanced_query, '')
+        WHERE rowid = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_query_delete AFTER DELETE ON query
+    WHEN NOT EXISTS (SELECT 1 FROM query_archive WHERE id = old.id) BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_response_insert AFTER INSERT ON response BEGIN
+        {SQLITE_RESPONSE_TEXT.format(row="new")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_response_update AFTER UPDATE OF response_text, query_id ON response BEGIN
+        {SQLITE_RESPONSE_TEXT.format(row="old")}
+        {SQLITE_RESPONSE_TEXT.format(row="new")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_response_delete AFTER DELETE ON response
+    WHEN NOT EXISTS (SELECT 1 FROM query_archive WHERE id = old.query_id) BEGIN
+        {SQLITE_RESPONSE_TEXT.format(row="old")}
+    END
+    """,
+]
+
+POSTGRES_SCHEMA = [
+    f"""
+    CREATE TABLE {SEARCH_TABLE} (
+        id integer PRIMARY KEY,
+        content text NOT NULL,
+        document tsvector NOT NULL
+    )
+    """,
+    f"CREATE INDEX ix_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING gin (document)",
+]
+
+POSTGRES_BACKFILL = f"""
+    INSERT INTO {SEARCH_TABLE} (id, content, document)
+    SELECT q.id,
+           concat_ws(' ', q.query_text, q.enhanced_query, r.response_text),
+           setweight(to_tsvector('english', q.query_text), 'A')
+           || setweight(to_tsvector('english', coalesce(q.enhanced_query, '')), 'B')
+           || setweight(to_tsvector('english', coalesce(r.response_text, '')), 'C')
+    FROM {{queries}} q
+    LEFT JOIN LATERAL (
+        SELECT string_agg(response_text, ' ') AS response_text FROM {{responses}} WHERE query_id = q.id
+    ) r ON true
+    {{where}}
+    ON CONFLICT (id) DO UPDATE SET content = excluded.content, document = excluded.document
+"""
+
+POSTGRES_TRIGGERS = [
+    f"""
+    CREATE OR REPLACE FUNCTION {SEARCH_TABLE}_refresh(target integer) RETURNS void AS $$
+        {POSTGRES_BACKFILL.format(queries="query", responses="response", where="WHERE q.id = target")}
+    $$ LANGUAGE sql
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION {SEARCH_TABLE}_query_changed() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            IF NOT EXISTS (SELECT 1 FROM query_archive WHERE id = OLD.id) THEN
+                DELETE FROM {SEARCH_TABLE} WHERE id = OLD.id;
+            END IF;
+            RETURN OLD;
+        END IF;
+        PERFORM {SEARCH_TABLE}_refresh(NEW.id);
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION {SEARCH_TABLE}_response_changed() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') AND NOT EXISTS (SELECT 1 FROM query_archive WHERE id = OLD.query_id) THEN
+            PERFORM {SEARCH_TABLE}_refresh(OLD.query_id);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM {SEARCH_TABLE}_refresh(NEW.query_id);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_query ON query",
+    f"""
+    CREATE TRIGGER {SEARCH_TABLE}_query
+    AFTER INSERT OR UPDATE OF query_text, enhanced_query OR DELETE ON query
+    FOR EACH ROW EXECUTE FUNCTION {SEARCH_TABLE}_query_changed()
+    """,
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_response ON response",
+    f"""
+    CREATE TRIGGER {SEARCH_TABLE}_response
+    AFTER INSERT OR UPDATE OF response_text, query_id OR DELETE ON response
+    FOR EACH ROW EXECUTE FUNCTION {SEARCH_TABLE}_response_changed()
+    """,
+]
+
+# Shared by both dialects; {score} and {snippet} are filled in per dialect
+SEARCH_SQL = """
+    SELECT coalesce(q.query_id, a.query_id) AS query_id,
+           coalesce(q.query_text, a.query_text) AS query_text,
+           coalesce(q.status, a.status) AS status,
+           coalesce(q.triage_level, a.triage_level) AS triage_level,
+           coalesce(q.created_at, a.created_at) AS created_at,
+           q.id IS NULL AS archived,
+           hits.id AS id, hits.score AS score, {snippet} AS snippet
+    FROM (
+        SELECT {id} AS id, {score} AS score
+        FROM {source}
+        WHERE {match} AND {id} >= :window_start
+        {after}
+        ORDER BY score, id
+        LIMIT :limit
+    ) hits
+    {join}
+    LEFT JOIN query q ON q.id = hits.id
+    LEFT JOIN query_archive a ON a.id = hits.id
+    WHERE coalesce(q.id, a.id) IS NOT NULL
+    ORDER BY hits.score, hits.id
+"""
+
+SQLITE_SEARCH_PARTS = {
+    "id": "rowid",
+    "score": "rank",
+    "source": SEARCH_TABLE,
+    "match": f"{SEARCH_TABLE} MATCH :terms",
+    "after": "AND (rank > :after_score OR (rank = :after_score AND rowid > :after_id))",
+    # snippet() needs the FTS5 table in the MATCH statement, so it is looked up again by rowid
+    "join": f"JOIN {SEARCH_TABLE} ON {SEARCH_TABLE}.rowid = hits.id AND {SEARCH_TABLE} MATCH :terms",
+    "snippet": (
+        f"snippet({SEARCH_TABLE}, -1, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…', {SNIPPET_WORDS})"
+    ),
+}
+
+POSTGRES_SEARCH_PARTS = {
+    "id": "s.id",
+    # Negated so that, as with BM25 on SQLite, lower scores rank first
+    "score": "-ts_rank_cd(s.document, websearch_to_tsquery('english', :terms))",
+    "source": f"{SEARCH_TABLE} s",
+    "match": "s.document @@ websearch_to_tsquery('english', :terms)",
+    "after": (
+        "AND (-ts_rank_cd(s.document, websearch_to_tsquery('english', :terms)), s.id) "
+        "> (:after_score, :after_id)"
+    ),
+    "join": f"JOIN {SEARCH_TABLE} ON {SEARCH_TABLE}.id = hits.id",
+    "snippet": (
+        f"ts_headline('english', {SEARCH_TABLE}.content, websearch_to_tsquery('english', :terms), "
+        f"'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, "
+        f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}, MaxFragments=2')"
+    ),
+}
+
+# First id of the newest SEARCH_MAX_CANDIDATES matches
+WINDOW_SQL = """
+    SELECT min(id) FROM (
+        SELECT {id} AS id FROM {source} WHERE {match} ORDER BY {id} DESC LIMIT :candidates
+    ) candidates
+"""
+
+Key = Tuple[float, int]
+
+
+class InvalidSearchError(ValueError):
+    """
+    Raised when a search string contains no searchable terms.
+    """
+
+
+def search_terms(search: str, dialect: str) -> str:
+    """
+    Turn user input into a full-text query matching all of its words.
+
+    On SQLite every word is quoted, so FTS5 operators and punctuation in
+    the input are searched for literally instead of failing to parse.
+    PostgreSQL's websearch_to_tsquery accepts any input as it is.
+
+    Raises:
+        InvalidSearchError: If the input has no words
+    """
+    words = re.findall(r"\w+", search)
+    if not words:
+        raise InvalidSearchError("Search must contain at least one word")
+    if dialect == "postgresql":
+        return search
+    return " ".join(f'"{word}"' for word in words)
+
+
+def search_window_statement(dialect: str) -> TextClause:
+    """
+    Build the statement finding where the ranked matches of a search start.
+
+    It returns the lowest id among the :candidates newest matches of
+    :terms, or NULL when nothing matches. The first page of a search runs
+    it once and the later pages reuse its result from the cursor, so new
+    matches do not shift the window between pages.
+    """
+    parts = POSTGRES_SEARCH_PARTS if dialect == "postgresql" else SQLITE_SEARCH_PARTS
+    return text(WINDOW_SQL.format(**parts))
+
+
+def search_statement(dialect: str, after: Optional[Key] = None) -> TextualSelect:
+    """
+    Build the ranked search statement for a database dialect.
+
+    Matches from :window_start on are ranked by score and then id, so a
+    page can be resumed after the (score, id) of the previous page's last
+    row. Snippets are only built for the rows of the page. The statement
+    takes the :terms from search_terms(), :window_start, :limit, and
+    :after_score and :after_id when after is given.
+    """
+    parts = dict(POSTGRES_SEARCH_PARTS if dialect == "postgresql" else SQLITE_SEARCH_PARTS)
+    if after is None:
+        parts["after"] = ""
+    columns = Query.__table__.c
+    return text(SEARCH_SQL.format(**parts)).columns(
+        query_id=String, query_text=String, status=columns.status.type, triage_level=columns.triage_level.type,
+        created_at=columns.created_at.type, archived=Boolean, id=Integer, score=Float, snippet=String,
+    )
+
+
+def encode_search_cursor(key: Key, window_start: int, search: str) -> str:
+    """
+    Encode the position after ``key`` in the results of ``search``.
+    """
+    payload = json.dumps([key[0], key[1], window_start, search], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str, search: str) -> Tuple[Key, int]:
+    """
+    Decode a cursor made by encode_search_cursor for the same search.
+
+    Returns:
+        The (score, id) to resume after, and the start of the search window
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or from another search
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, row_id, window_start, cursor_search = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        key = (float(score), int(row_id))
+        window_start = int(window_start)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from e
+    if cursor_search != search:
+        raise InvalidCursorError("Cursor was issued for a different search")
+    return key, window_start
+
+
+def create_search_index(connection: Connection) -> bool:
+    """
+    Create the search table and its triggers if they are missing.
+
+    A newly created index is filled from the existing live and archived
+    queries. Backends other than SQLite and PostgreSQL are left without a
+    search index.
+
+    Args:
+        connection: A synchronous connection inside a transaction
+
+    Returns:
+        True if the index was created
+    """
+    dialect = connection.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        return False
+
+    created = not connection.dialect.has_table(connection, SEARCH_TABLE)
+    if dialect == "sqlite":
+        schema, backfill, triggers = SQLITE_SCHEMA, SQLITE_BACKFILL, SQLITE_TRIGGERS
+    else:
+        schema, backfill, triggers = POSTGRES_SCHEMA, POSTGRES_BACKFILL, POSTGRES_TRIGGERS
+
+    if created:
+        for statement in schema:
+            connection.exec_driver_sql(statement)
+        for queries, responses in (("query", "response"), ("query_archive", "response_archive")):
+            connection.exec_driver_sql(backfill.format(queries=queries, responses=responses, where=""))
+    for statement in triggers:
+        connection.exec_driver_sql(statement)
+    return created
+
+
+def drop_search_index(connection: Connection) -> None:
+    """
+    Drop the search table, e.g. before the tables are recreated.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+        for function in ("query_changed", "response_changed", "refresh"):
+            connection.exec_driver_sql(f"DROP FUNCTION IF EXISTS {SEARCH_TABLE}_{function} CASCADE")
+    elif connection.dialect.name == "sqlite":
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
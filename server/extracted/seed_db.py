@@ -2,35 +2,57 @@
 """
 Seed database script for the Medical AI Assistant App.
 
-This script populates the SQLite database with mock data for demonstration purposes.
-It creates sample users, queries, responses, and file records.
+Without options this populates the database with the hand-written sample
+users, queries, responses and file records used for demonstrations.
+
+With --queries it generates synthetic data at production scale instead:
+users, queries, responses and files with configurable distributions over
+status, triage level and safety score, inserted with Core executemany in
+chunked transactions. Query and response texts are assembled from
+templates per triage level so urgent queries read like urgent queries.
+
+Example:
+
+    python seed_db.py
+    python seed_db.py --users 20000 --queries 2000000 --days 365
+    python seed_db.py --queries 100000 --status-weights needs_review=0.5,completed=0.5
 """
 
+import argparse
 import asyncio
 import datetime
+import hashlib
 import os
 import random
 import sys
+import time
+import uuid
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, TypeVar
 
 # Add the project root to the Python path
 sys.path.insert(0, str(Path(__file__).parent))
 
 # Import models and database functions
-from db.database import init_db, get_engine
-from models.models import (
-    User, Query, Response, File, 
+from db.database import init_db, async_engine
+from models import (
+    User, Query, Response, File, QueryArchive, ResponseArchive, FileArchive,
     RoleEnum, StatusEnum, TriageLevelEnum
 )
-from sqlmodel import Session, select
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# Archived rows keep their keys, which must not be reused
+ARCHIVES = {Query: QueryArchive, Response: ResponseArchive, File: FileArchive}
 
 # Sample data
 SAMPLE_USERS = [
-    {"username": "patient1", "email": "patient1@example.com", "role": RoleEnum.PATIENT},
-    {"username": "patient2", "email": "patient2@example.com", "role": RoleEnum.PATIENT},
-    {"username": "doctor1", "email": "doctor1@example.com", "role": RoleEnum.DOCTOR},
-    {"username": "doctor2", "email": "doctor2@example.com", "role": RoleEnum.DOCTOR},
-    {"username": "admin1", "email": "admin1@example.com", "role": RoleEnum.ADMIN},
+    {"name": "patient1", "email": "patient1@example.com", "role": RoleEnum.PATIENT},
+    {"name": "patient2", "email": "patient2@example.com", "role": RoleEnum.PATIENT},
+    {"name": "doctor1", "email": "doctor1@example.com", "role": RoleEnum.DOCTOR},
+    {"name": "doctor2", "email": "doctor2@example.com", "role": RoleEnum.DOCTOR},
+    {"name": "admin1", "email": "admin1@example.com", "role": RoleEnum.ADMIN},
 ]
 
 SAMPLE_QUERIES = [
@@ -116,21 +138,21 @@ SAMPLE_RESPONSES = [
 SAMPLE_FILES = [
     {
         "original_filename": "blood_test_results.pdf",
-        "file_path": "/tmp/medical_ai_files/blood_test_results_hash.pdf",
+        "stored_filename": "blood_test_results_hash.pdf",
         "file_type": "application/pdf",
         "file_size": 245000,
         "summary": "Complete blood count and metabolic panel from 2023-06-15. Notable findings: ALT 78 U/L (elevated), AST 65 U/L (elevated), all other values within normal range.",
     },
     {
         "original_filename": "medication_list.csv",
-        "file_path": "/tmp/medical_ai_files/medication_list_hash.csv",
+        "stored_filename": "medication_list_hash.csv",
         "file_type": "text/csv",
         "file_size": 1240,
         "summary": "Current medications: Lisinopril 10mg daily, Atorvastatin 20mg daily, Metformin 500mg twice daily, Aspirin 81mg daily.",
     },
     {
         "original_filename": "symptoms_diary.txt",
-        "file_path": "/tmp/medical_ai_files/symptoms_diary_hash.txt",
+        "stored_filename": "symptoms_diary_hash.txt",
         "file_type": "text/plain",
         "file_size": 3500,
         "summary": "Two-week headache diary showing pattern of morning headaches rated 7-9/10 in severity, often accompanied by nausea. Pain typically located in frontal and temporal regions bilaterally.",
@@ -138,85 +160,403 @@ SAMPLE_FILES = [
 ]
 
 
-async def seed_database():
-    """Seed the database with sample data."""
+# Building blocks for synthetic queries, by triage level
+SYMPTOMS = {
+    TriageLevelEnum.LOW: [
+        "a mild rash on my forearm", "occasional heartburn after dinner", "dry, itchy eyes",
+        "a runny nose and sneezing", "trouble falling asleep", "mild lower back stiffness",
+        "questions about my cholesterol results", "a sore throat without fever",
+    ],
+    TriageLevelEnum.MEDIUM: [
+        "headaches most mornings", "a cough that will not go away", "ankle swelling since starting a new medication",
+        "unexplained tiredness and weight loss", "frequent urination and thirst", "recurring stomach pain after meals",
+        "dizziness when I stand up", "a fever of 101F on and off",
+    ],
+    TriageLevelEnum.HIGH: [
+        "a high fever and a spreading rash", "blood in my urine", "severe abdominal pain on the right side",
+        "vomiting that will not stop", "a head injury with a worsening headache", "sudden vision changes in one eye",
+        "a deep cut that keeps bleeding", "confusion in my elderly father",
+    ],
+    TriageLevelEnum.URGENT: [
+        "chest pain spreading to my left arm and jaw", "trouble breathing and blue lips",
+        "sudden weakness on one side of my face", "thoughts of harming myself",
+        "swelling of my throat after eating peanuts", "the worst headache of my life that came on suddenly",
+        "fainting with a racing heartbeat", "a seizure that lasted several minutes",
+    ],
+}
+DURATIONS = ["since this morning", "for two days", "for about a week", "for several weeks", "on and off for months"]
+QUESTIONS = [
+    "What could be causing this?", "Should I see a doctor?", "Is this something to worry about?",
+    "What can I do at home?", "Should I go to the ER?", "Could this be related to my medication?",
+]
+ADVICE = {
+    TriageLevelEnum.LOW: "This is usually not serious. Rest, fluids and over-the-counter remedies often help.",
+    TriageLevelEnum.MEDIUM: "This should be checked by your primary care physician within the next few days.",
+    TriageLevelEnum.HIGH: "Please get evaluated today at an urgent care clinic or by your doctor.",
+    TriageLevelEnum.URGENT: "This may be a medical emergency. Call 911 or your local emergency number now.",
+}
+DOCTOR_NOTES = [
+    "Appropriate advice.", "Add follow-up instructions if symptoms persist.",
+    "Needs more urgency in the recommendation.", "Please mention red-flag symptoms.", None,
+]
+FILE_TYPES = [
+    ("lab_results", ".pdf", "application/pdf"),
+    ("medication_list", ".csv", "text/csv"),
+    ("symptom_diary", ".txt", "text/plain"),
+]
+
+# Statuses whose queries have been answered, and those a doctor has decided
+ANSWERED_STATUSES = (StatusEnum.NEEDS_REVIEW, StatusEnum.APPROVED, StatusEnum.REJECTED, StatusEnum.COMPLETED)
+DECIDED_STATUSES = (StatusEnum.APPROVED, StatusEnum.REJECTED, StatusEnum.COMPLETED)
+
+
+@dataclass
+class SeedConfig:
+    """
+    Size and shape of a synthetic data set.
+
+    Weights are relative and need not sum to one. Safety scores are drawn
+    uniformly from the range of the query's triage level, so urgent
+    queries get low scores as they do in production.
+    """
+    users: int = 1000
+    queries: int = 100_000
+    doctor_fraction: float = 0.05
+    admin_fraction: float = 0.005
+    status_weights: Dict[StatusEnum, float] = field(default_factory=lambda: {
+        StatusEnum.COMPLETED: 0.45,
+        StatusEnum.APPROVED: 0.2,
+        StatusEnum.REJECTED: 0.05,
+        StatusEnum.NEEDS_REVIEW: 0.15,
+        StatusEnum.PROCESSING: 0.1,
+        StatusEnum.PENDING: 0.05,
+    })
+    triage_weights: Dict[TriageLevelEnum, float] = field(default_factory=lambda: {
+        TriageLevelEnum.LOW: 0.5,
+        TriageLevelEnum.MEDIUM: 0.3,
+        TriageLevelEnum.HIGH: 0.15,
+        TriageLevelEnum.URGENT: 0.05,
+    })
+    safety_score_ranges: Dict[TriageLevelEnum, Tuple[float, float]] = field(default_factory=lambda: {
+        TriageLevelEnum.LOW: (0.7, 1.0),
+        TriageLevelEnum.MEDIUM: (0.5, 0.85),
+        TriageLevelEnum.HIGH: (0.25, 0.6),
+        TriageLevelEnum.URGENT: (0.0, 0.3),
+    })
+    # Responses per answered query (redrafts), drawn uniformly
+    responses_per_query: Tuple[int, int] = (1, 2)
+    # Fraction of queries with an attached file
+    file_rate: float = 0.1
+    # Queries are spread over this many days up to now
+    days: int = 90
+    chunk_size: int = 10_000
+    seed: Optional[int] = None
+
+
+E = TypeVar("E", StatusEnum, TriageLevelEnum)
+
+
+def parse_weights(text: str, enum_type: Type[E]) -> Dict[E, float]:
+    """
+    Parse "name=weight,..." into weights keyed by enum member.
+    """
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        weights[enum_type(name.strip().lower())] = float(weight)
+    return weights
+
+
+class SyntheticData:
+    """
+    Generates rows for the user, query, response and file tables.
+
+    Rows are plain dicts with explicit primary keys starting after the ids
+    already in use, so related rows can be generated without reading back
+    inserted ids.
+    """
+
+    def __init__(self, config: SeedConfig, first_ids: Dict[str, int]):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.next_ids = dict(first_ids)
+        self.now = datetime.datetime.utcnow()
+        self.patient_ids: List[int] = []
+        self.statuses = list(config.status_weights)
+        self.status_weights = list(config.status_weights.values())
+        self.levels = list(config.triage_weights)
+        self.level_weights = list(config.triage_weights.values())
+
+    def _id(self, table: str) -> int:
+        value = self.next_ids[table]
+        self.next_ids[table] += 1
+        return value
+
+    def users(self) -> Iterator[List[Dict[str, Any]]]:
+        """Yield chunks of user rows."""
+        config = self.config
+        chunk = []
+        for i in range(config.users):
+            roll = self.rng.random()
+            if roll < config.admin_fraction:
+                role = RoleEnum.ADMIN
+            elif roll < config.admin_fraction + config.doctor_fraction:
+                role = RoleEnum.DOCTOR
+            else:
+                role = RoleEnum.PATIENT
+            user_id = self._id("user")
+            if role == RoleEnum.PATIENT:
+                self.patient_ids.append(user_id)
+            created_at = self.now - datetime.timedelta(days=config.days, seconds=self.rng.randint(0, 86400 * 30))
+            chunk.append({
+                "id": user_id, "name": f"{role.value}{user_id}", "email": f"{role.value}{user_id}@example.com",
+                "role": role, "created_at": created_at, "updated_at": created_at,
+            })
+            if len(chunk) >= config.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def queries(self) -> Iterator[Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """
+        Yield (queries, responses, files) chunks, oldest queries first.
+        """
+        config = self.config
+        rng = self.rng
+        span = config.days * 86400
+        step = span / max(config.queries, 1)
+
+        for start in range(0, config.queries, config.chunk_size):
+            queries, responses, files = [], [], []
+            for i in range(start, min(start + config.chunk_size, config.queries)):
+                status = rng.choices(self.statuses, self.status_weights)[0]
+                level = rng.choices(self.levels, self.level_weights)[0]
+                low, high = config.safety_score_ranges[level]
+                symptom = rng.choice(SYMPTOMS[level])
+                query_text = f"I have had {symptom} {rng.choice(DURATIONS)}. {rng.choice(QUESTIONS)}"
+                created_at = self.now - datetime.timedelta(seconds=span - i * step - rng.random() * step)
+                query_pk = self._id("query")
+                queries.append({
+                    "id": query_pk,
+                    "query_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                    "query_text": query_text,
+                    "enhanced_query": None if status == StatusEnum.PENDING else
+                        f"Patient reports {symptom} {rng.choice(DURATIONS)}; assess severity and next steps.",
+                    "status": status,
+                    "triage_level": None if status == StatusEnum.PENDING else level,
+                    "safety_score": None if status == StatusEnum.PENDING else round(rng.uniform(low, high), 3),
+                    "user_id": rng.choice(self.patient_ids) if self.patient_ids else None,
+                    "created_at": created_at,
+                    "updated_at": created_at + datetime.timedelta(seconds=rng.randint(1, 120)),
+                })
+
+                if status in ANSWERED_STATUSES:
+                    drafts = rng.randint(*config.responses_per_query)
+                    for draft in range(drafts):
+                        responded_at = created_at + datetime.timedelta(minutes=5 + 30 * draft, seconds=rng.randint(0, 600))
+                        final = draft == drafts - 1
+                        responses.append({
+                            "id": self._id("response"),
+                            "query_id": query_pk,
+                            "response_text": f"Thank you for describing {symptom}. {ADVICE[level]}",
+                            "is_approved": final and status in (StatusEnum.APPROVED, StatusEnum.COMPLETED),
+                            "doctor_notes": rng.choice(DOCTOR_NOTES) if final and status in DECIDED_STATUSES else None,
+                            "created_at": responded_at,
+                            "updated_at": responded_at,
+                        })
+
+                if rng.random() < config.file_rate:
+                    name, extension, mime_type = rng.choice(FILE_TYPES)
+                    file_hash = "%064x" % rng.getrandbits(256)
+                    uploaded_at = created_at + datetime.timedelta(seconds=rng.randint(10, 600))
+                    files.append({
+                        "id": self._id("file"),
+                        "query_id": query_pk,
+                        "original_filename": f"{name}{extension}",
+                        "stored_filename": f"{file_hash}{extension}",
+                        "file_type": mime_type,
+                        "file_size": rng.randint(1_000, 5_000_000),
+                        "file_hash": file_hash,
+                        "summary": f"{name.replace('_', ' ').capitalize()} uploaded with the query.",
+                        "created_at": uploaded_at,
+                        "expiry_time": uploaded_at + datetime.timedelta(minutes=30),
+                    })
+            yield queries, responses, files
+
+
+async def first_free_ids(conn: AsyncConnection) -> Dict[str, int]:
+    """
+    Get the first unused primary key of each seeded table.
+    Keys of archived rows count as used.
+    """
+    ids = {}
+    for model in (User, Query, Response, File):
+        table = model.__table__
+        used = [(await conn.execute(select(func.max(table.c.id)))).scalar() or 0]
+        if model in ARCHIVES:
+            archive = ARCHIVES[model].__table__
+            used.append((await conn.execute(select(func.max(archive.c.id)))).scalar() or 0)
+        ids[table.name] = max(used) + 1
+    return ids
+
+
+async def reset_sequences(conn: AsyncConnection) -> None:
+    """
+    Move PostgreSQL id sequences past the explicitly inserted ids.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    ids = await first_free_ids(conn)
+    for model in (User, Query, Response, File):
+        table = model.__table__.name
+        await conn.exec_driver_sql(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), {ids[table]}, false)"
+        )
+
+
+async def generate(config: SeedConfig) -> Dict[str, int]:
+    """
+    Insert a synthetic data set, one transaction per chunk.
+
+    Returns:
+        Rows inserted per table
+    """
+    async with async_engine.connect() as conn:
+        data = SyntheticData(config, await first_free_ids(conn))
+
+    counts = {"user": 0, "query": 0, "response": 0, "file": 0}
+    started = time.perf_counter()
+
+    for chunk in data.users():
+        async with async_engine.begin() as conn:
+            await conn.execute(insert(User.__table__), chunk)
+        counts["user"] += len(chunk)
+
+    for queries, responses, files in data.queries():
+        async with async_engine.begin() as conn:
+            await conn.execute(insert(Query.__table__), queries)
+            if responses:
+                await conn.execute(insert(Response.__table__), responses)
+            if files:
+                await conn.execute(insert(File.__table__), files)
+        counts["query"] += len(queries)
+        counts["response"] += len(responses)
+        counts["file"] += len(files)
+        elapsed = time.perf_counter() - started
+        print(f"  {counts['query']:,}/{config.queries:,} queries ({counts['query'] / elapsed:,.0f}/s)", end="\r")
+
+    async with async_engine.begin() as conn:
+        await reset_sequences(conn)
+    print()
+    return counts
+
+
+async def seed_samples():
+    """Insert the hand-written sample data."""
+    async with async_engine.connect() as conn:
+        ids = await first_free_ids(conn)
+    rng = random.Random()
+    now = datetime.datetime.utcnow()
+
+    users = [{"id": ids["user"] + i, **user} for i, user in enumerate(SAMPLE_USERS)]
+    patient_ids = [u["id"] for u in users if u["role"] == RoleEnum.PATIENT]
+
+    queries = []
+    for i, query_data in enumerate(SAMPLE_QUERIES):
+        created_at = now - datetime.timedelta(days=rng.randint(1, 14))
+        queries.append({
+            **query_data,
+            "id": ids["query"] + i,
+            "query_id": str(uuid.uuid4()),
+            "user_id": rng.choice(patient_ids),
+            "created_at": created_at,
+            "updated_at": created_at + datetime.timedelta(hours=rng.randint(1, 24)),
+        })
+
+    responses = []
+    for query, response_data in zip(queries, SAMPLE_RESPONSES):
+        created_at = query["updated_at"] + datetime.timedelta(hours=rng.randint(1, 6))
+        responses.append({
+            **response_data,
+            "query_id": query["id"],
+            "created_at": created_at,
+            "updated_at": created_at + datetime.timedelta(hours=rng.randint(1, 12)),
+        })
+
+    files = []
+    for query, file_data in zip(queries, SAMPLE_FILES):
+        created_at = query["created_at"] + datetime.timedelta(minutes=rng.randint(5, 30))
+        files.append({
+            **file_data,
+            "file_hash": hashlib.sha256(file_data["stored_filename"].encode()).hexdigest(),
+            "query_id": query["id"],
+            "created_at": created_at,
+            "expiry_time": created_at + datetime.timedelta(days=30),
+        })
+
+    async with async_engine.begin() as conn:
+        for model, rows in ((User, users), (Query, queries), (Response, responses), (File, files)):
+            await conn.execute(insert(model.__table__), rows)
+        await reset_sequences(conn)
+
+
+async def seed_db(config: Optional[SeedConfig] = None):
+    """
+    Seed the database with the sample data, or with a synthetic data set.
+
+    Args:
+        config: Size and distributions of a synthetic data set; the
+            hand-written samples are inserted when omitted
+    """
     print("Initializing database...")
     await init_db()
-    
-    # Use synchronous session for seeding
-    engine = get_engine()
-    with Session(engine) as session:
-        print("Seeding users...")
-        users = []
-        for user_data in SAMPLE_USERS:
-            user = User(**user_data)
-            users.append(user)
-            session.add(user)
-        session.commit()
-        
-        print("Seeding queries...")
-        queries = []
-        for i, query_data in enumerate(SAMPLE_QUERIES):
-            # Assign to a random patient
-            patient_users = [u for u in users if u.role == RoleEnum.PATIENT]
-            user = random.choice(patient_users)
-            
-            # Create query with timestamps
-            created_at = datetime.datetime.now() - datetime.timedelta(days=random.randint(1, 14))
-            updated_at = created_at + datetime.timedelta(hours=random.randint(1, 24))
-            
-            query = Query(
-                **query_data,
-                user_id=user.id,
-                created_at=created_at,
-                updated_at=updated_at
-            )
-            queries.append(query)
-            session.add(query)
-        session.commit()
-        
-        print("Seeding responses...")
-        for i, response_data in enumerate(SAMPLE_RESPONSES):
-            if i < len(queries):
-                # Create response with timestamps
-                created_at = queries[i].updated_at + datetime.timedelta(hours=random.randint(1, 6))
-                updated_at = created_at + datetime.timedelta(hours=random.randint(1, 12))
-                
-                # Assign to a random doctor
-                doctor_users = [u for u in users if u.role == RoleEnum.DOCTOR]
-                doctor = random.choice(doctor_users)
-                
-                response = Response(
-                    **response_data,
-                    query_id=queries[i].id,
-                    doctor_id=doctor.id,
-                    created_at=created_at,
-                    updated_at=updated_at
-                )
-                session.add(response)
-        session.commit()
-        
-        print("Seeding files...")
-        for i, file_data in enumerate(SAMPLE_FILES):
-            if i < len(queries):
-                # Create file with timestamps
-                created_at = queries[i].created_at + datetime.timedelta(minutes=random.randint(5, 30))
-                
-                file = File(
-                    **file_data,
-                    query_id=queries[i].id,
-                    created_at=created_at,
-                )
-                session.add(file)
-        session.commit()
-        
-        print("Database seeding completed successfully!")
+
+    if config is None:
+        print("Seeding sample users, queries, responses and files...")
+        await seed_samples()
+    else:
+        print(f"Generating {config.users:,} users and {config.queries:,} queries...")
+        started = time.perf_counter()
+        counts = await generate(config)
+        elapsed = time.perf_counter() - started
+        total = sum(counts.values())
+        print(", ".join(f"{count:,} {table}" for table, count in counts.items()) +
+              f" rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+
+    print("Database seeding completed successfully!")
 
 
 def main():
     """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Seed the database with sample or synthetic data")
+    parser.add_argument("--queries", type=int, default=None,
+                        help="Generate this many synthetic queries instead of the samples")
+    parser.add_argument("--users", type=int, default=1000, help="Synthetic users")
+    parser.add_argument("--days", type=int, default=90, help="Spread queries over this many days")
+    parser.add_argument("--status-weights", default=None,
+                        help="Relative status weights, e.g. completed=0.5,needs_review=0.3,pending=0.2")
+    parser.add_argument("--triage-weights", default=None,
+                        help="Relative triage weights, e.g. low=0.6,medium=0.3,high=0.08,urgent=0.02")
+    parser.add_argument("--file-rate", type=float, default=0.1, help="Fraction of queries with a file")
+    parser.add_argument("--max-responses", type=int, default=2, help="Most response drafts per answered query")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="Rows per insert transaction")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible data")
+    args = parser.parse_args()
+
+    config = None
+    if args.queries is not None:
+        config = SeedConfig(
+            users=args.users, queries=args.queries, days=args.days, file_rate=args.file_rate,
+            responses_per_query=(1, max(1, args.max_responses)), chunk_size=args.chunk_size, seed=args.seed
+        )
+        if args.status_weights:
+            config.status_weights = parse_weights(args.status_weights, StatusEnum)
+        if args.triage_weights:
+            config.triage_weights = parse_weights(args.triage_weights, TriageLevelEnum)
+
     print("Starting database seeding process...")
-    asyncio.run(seed_database())
+    asyncio.run(seed_db(config))
     print("Done!")
 
 
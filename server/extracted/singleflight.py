@@ -0,0 +1,85 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    """
+    An in-flight call shared by all waiters with the same key.
+    """
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one underlying call.
+
+    The first caller for a key starts the work in its own task; callers that
+    arrive while it is running await the same task. Results and exceptions
+    are delivered to every waiter. A waiter that is cancelled only detaches
+    itself; the underlying call is cancelled once no waiters remain. The key
+    is forgotten as soon as the call finishes, so later calls start fresh.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``fn`` for ``key`` unless an identical call is already in flight.
+
+        Args:
+            key: Identity of the call, e.g. an agent cache key
+            fn: Coroutine factory performing the call
+
+        Returns:
+            The result of the shared call
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task, key=key, call=call: self._forget(key, call))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            # Shield so one cancelled waiter does not cancel the shared call
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        """
+        Get the number of distinct calls currently running.
+        """
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get coalescing counters for monitoring.
+
+        Returns:
+            Dictionary with executed, coalesced and in-flight call counts
+        """
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight(),
+        }
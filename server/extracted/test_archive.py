@@ -0,0 +1,108 @@
+import pytest
+import httpx
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from main import app
+from db.archive import archive_batch, archive_closed_queries
+from db.database import async_engine, init_db
+from models import File, FileArchive, Query, QueryArchive, Response, ResponseArchive, StatusEnum
+
+DOCTOR = {"X-User-Role": "doctor"}
+
+
+@pytest.mark.asyncio
+async def test_archive_moves_old_closed_queries():
+    """Test that old closed queries move to the archive with their responses and files, in batches."""
+    await init_db()
+    old = datetime.utcnow() - timedelta(days=200)
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        closed = [
+            Query(query_text=f"Closed {i}", status=status, created_at=old)
+            for i, status in enumerate([StatusEnum.APPROVED, StatusEnum.REJECTED, StatusEnum.COMPLETED] * 2)
+        ]
+        open_query = Query(query_text="Still open", status=StatusEnum.NEEDS_REVIEW, created_at=old)
+        recent = Query(query_text="Recently closed", status=StatusEnum.APPROVED)
+        session.add_all(closed + [open_query, recent])
+        await session.flush()
+        for query in closed + [open_query, recent]:
+            session.add(Response(response_text=f"Answer to {query.query_text}", query_id=query.id))
+            session.add(File(
+                original_filename="scan.pdf", stored_filename=f"{query.id}.pdf", file_type="application/pdf",
+                file_size=10, file_hash="0" * 64, query_id=query.id, expiry_time=old
+            ))
+        await session.commit()
+
+    archived = await archive_closed_queries(retention_days=90, batch_size=4)
+    assert archived >= len(closed)
+
+    closed_ids = [query.id for query in closed]
+    async with AsyncSession(async_engine) as session:
+        for live, archive in ((Query, QueryArchive), (Response, ResponseArchive), (File, FileArchive)):
+            key = "id" if live is Query else "query_id"
+            remaining = (await session.exec(select(live).where(getattr(live, key).in_(closed_ids)))).all()
+            moved = (await session.exec(select(archive).where(getattr(archive, key).in_(closed_ids)))).all()
+            assert remaining == []
+            assert len(moved) == len(closed_ids)
+        kept = (await session.exec(select(Query.id).where(Query.id.in_([open_query.id, recent.id])))).all()
+        assert sorted(kept) == sorted([open_query.id, recent.id])
+        assert (await session.exec(select(QueryArchive).where(QueryArchive.id == closed[0].id))).one().created_at == old
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get(f"/api/query/{closed[0].query_id}", headers=DOCTOR)
+        live = await client.get(f"/api/query/{recent.query_id}", headers=DOCTOR)
+
+    assert response.status_code == 200
+    assert response.json()["archived"] is True
+    assert response.json()["status"] == StatusEnum.APPROVED.value
+    assert live.json()["archived"] is False
+
+
+@pytest.mark.asyncio
+async def test_archive_skips_reused_keys():
+    """Test that live rows reusing an archived key stay live instead of failing every run."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    old = datetime.utcnow() - timedelta(days=200)
+    cutoff = datetime.utcnow() - timedelta(days=90)
+
+    def query(id, query_id):
+        return insert(Query.__table__).values(
+            id=id, query_id=query_id, query_text=query_id, status=StatusEnum.APPROVED, created_at=old, updated_at=old
+        )
+
+    def response(id, query_id):
+        return insert(Response.__table__).values(
+            id=id, query_id=query_id, response_text="Answer", is_approved=True, created_at=old, updated_at=old
+        )
+
+    async with engine.begin() as conn:
+        await conn.execute(query(1, "first"))
+        await conn.execute(response(1, 1))
+        assert await archive_batch(conn, cutoff, batch_size=10) == 1
+
+    # Keys handed out again, as on files created before AUTOINCREMENT
+    async with engine.begin() as conn:
+        await conn.execute(query(1, "reused"))
+        await conn.execute(query(2, "reused response"))
+        await conn.execute(response(1, 2))
+        await conn.execute(query(3, "second"))
+        assert await archive_batch(conn, cutoff, batch_size=10) == 1
+        assert await archive_batch(conn, cutoff, batch_size=10) == 0
+
+    async with AsyncSession(engine) as session:
+        live = (await session.exec(select(Query.query_id).order_by(Query.id))).all()
+        archived = (await session.exec(select(QueryArchive.query_id).order_by(QueryArchive.id))).all()
+    assert live == ["reused", "reused response"]
+    assert archived == ["first", "second"]
+    await engine.dispose()
@@ -0,0 +1,108 @@
+import json
+import pytest
+import httpx
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents import assessor, worker
+from agents.cache import AgentCache, MemoryCache, set_agent_cache
+from models import Query, QueryAssessment, StatusEnum, TriageLevelEnum
+
+VALID = {"enhanced_query": "Chest pain radiating to the left arm", "safety_score": 0.2, "triage_level": "URGENT"}
+
+
+def completion(content: str) -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"role": "assistant", "content": content}}]})
+
+
+@pytest.fixture
+def fused(monkeypatch):
+    """Enable the fused agent against a replaceable OpenAI reply."""
+    monkeypatch.setattr(assessor, "MCP_ENABLED", False)
+    monkeypatch.setattr(assessor, "OPENAI_API_KEY", "local")
+    monkeypatch.setattr(worker, "FUSED_AGENT_ENABLED", True)
+    set_agent_cache(AgentCache([MemoryCache(max_entries=10, ttl=60)]))
+    replies = []
+
+    async def post_chat_completion(agent, payload):
+        return completion(replies.pop(0))
+
+    monkeypatch.setattr(assessor, "post_chat_completion", post_chat_completion)
+    yield replies
+    set_agent_cache(None)
+
+
+def test_parse_assessment_normalizes_triage_level():
+    """Test that a valid reply parses and the triage level is case-insensitive."""
+    assessment = assessor.parse_assessment(json.dumps(VALID))
+    assert assessment == QueryAssessment(
+        enhanced_query=VALID["enhanced_query"], safety_score=0.2, triage_level=TriageLevelEnum.URGENT
+    )
+
+
+@pytest.mark.parametrize("content", [
+    "not json at all",
+    '{"enhanced_query": "Chest pain", "safety_score": 0.2',
+    "[1, 2, 3]",
+    json.dumps({**VALID, "safety_score": 1.5}),
+    json.dumps({**VALID, "safety_score": -0.1}),
+    json.dumps({**VALID, "triage_level": "critical"}),
+    json.dumps({**VALID, "enhanced_query": ""}),
+    json.dumps({"enhanced_query": "Chest pain", "safety_score": 0.2}),
+])
+def test_parse_assessment_rejects_invalid_replies(content):
+    """Test that malformed JSON, out-of-range scores and unknown triage levels are rejected."""
+    assert assessor.parse_assessment(content) is None
+
+
+@pytest.mark.asyncio
+async def test_invalid_fused_reply_falls_back_to_chain(fused, monkeypatch):
+    """Test that process_query runs the enhancer, scorer and triage chain when the fused reply is invalid."""
+    stages = []
+    run = worker.QUERY_PIPELINE.run
+
+    async def spy(context, on_stage_complete=None):
+        async def record(stage, values):
+            stages.append(stage)
+            if on_stage_complete is not None:
+                await on_stage_complete(stage, values)
+        return await run(context, record)
+
+    monkeypatch.setattr(worker.QUERY_PIPELINE, "run", spy)
+    fused.append(json.dumps({**VALID, "triage_level": "critical"}))
+
+    query = await worker.process_query(Query(query_text="Chest pain after running"))
+
+    assert fused == []
+    assert stages == ["enhance", "score", "triage"]
+    assert query.safety_score is not None and query.triage_level is not None
+    assert query.status in (StatusEnum.NEEDS_REVIEW, StatusEnum.PROCESSING)
+
+
+@pytest.mark.asyncio
+async def test_fused_flag_selects_single_call(fused, monkeypatch):
+    """Test that FUSED_AGENT_ENABLED switches process_query between the fused call and the chain."""
+    chain_runs = []
+    run = worker.QUERY_PIPELINE.run
+
+    async def spy(context, on_stage_complete=None):
+        chain_runs.append(context["query_text"])
+        return await run(context, on_stage_complete)
+
+    monkeypatch.setattr(worker.QUERY_PIPELINE, "run", spy)
+    fused.append(json.dumps(VALID))
+
+    query = await worker.process_query(Query(query_text="Crushing chest pain"))
+    assert chain_runs == []
+    assert query.enhanced_query == VALID["enhanced_query"]
+    assert query.triage_level == TriageLevelEnum.URGENT
+    assert query.status == StatusEnum.NEEDS_REVIEW
+
+    monkeypatch.setattr(worker, "FUSED_AGENT_ENABLED", False)
+    fused.append(json.dumps(VALID))
+    await worker.process_query(Query(query_text="Mild chest pain"))
+    assert chain_runs == ["Mild chest pain"]
+    assert fused, "the fused agent should not be called when disabled"
@@ -0,0 +1,123 @@
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.batcher import MicroBatcher
+
+
+class Upstream:
+    """Batch and single-item functions that record their calls."""
+
+    def __init__(self, results=None, fail=False, delay=0.0):
+        self.results = results
+        self.fail = fail
+        self.delay = delay
+        self.batches = []
+        self.singles = []
+
+    async def batch(self, items):
+        self.batches.append(list(items))
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        if self.results is not None:
+            return self.results(items)
+        return [f"batch:{item}" for item in items]
+
+    async def single(self, item):
+        self.singles.append(item)
+        return f"single:{item}"
+
+
+@pytest.mark.asyncio
+async def test_flushes_when_batch_is_full():
+    """Test that a full batch is sent at once without waiting for the window."""
+    upstream = Upstream()
+    batcher = MicroBatcher(upstream.batch, upstream.single, max_batch_size=3, max_wait=10.0)
+
+    results = await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(3))), timeout=1.0)
+
+    assert results == ["batch:0", "batch:1", "batch:2"]
+    assert upstream.batches == [[0, 1, 2]]
+
+
+@pytest.mark.asyncio
+async def test_flushes_when_window_expires():
+    """Test that a partial batch is sent once max_wait has passed."""
+    upstream = Upstream()
+    batcher = MicroBatcher(upstream.batch, upstream.single, max_batch_size=10, max_wait=0.05)
+
+    first = asyncio.create_task(batcher.submit("a"))
+    second = asyncio.create_task(batcher.submit("b"))
+    await asyncio.sleep(0.01)
+    assert upstream.batches == []
+
+    assert await asyncio.wait_for(asyncio.gather(first, second), timeout=1.0) == ["batch:a", "batch:b"]
+    assert upstream.batches == [["a", "b"]]
+
+
+@pytest.mark.asyncio
+async def test_none_result_falls_back_for_that_item():
+    """Test that a None result retries only that item on its own."""
+    upstream = Upstream(results=lambda items: [None if item == "bad" else f"batch:{item}" for item in items])
+    batcher = MicroBatcher(upstream.batch, upstream.single, max_batch_size=3, max_wait=0.01)
+
+    results = await asyncio.gather(*(batcher.submit(item) for item in ("a", "bad", "c")))
+
+    assert results == ["batch:a", "single:bad", "batch:c"]
+    assert upstream.singles == ["bad"]
+    assert batcher.item_fallbacks == 1 and batcher.batch_failures == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_falls_back_for_every_item():
+    """Test that a failed batch call, or one returning the wrong number of results, retries every item."""
+    for upstream in (Upstream(fail=True), Upstream(results=lambda items: ["only one"])):
+        batcher = MicroBatcher(upstream.batch, upstream.single, max_batch_size=2, max_wait=0.01)
+
+        results = await asyncio.gather(batcher.submit("a"), batcher.submit("b"))
+
+        assert results == ["single:a", "single:b"]
+        assert sorted(upstream.singles) == ["a", "b"]
+        assert batcher.batch_failures == 1 and batcher.item_fallbacks == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_submitter_leaves_batch_intact():
+    """Test that cancelling one waiting submitter does not affect the others in its batch."""
+    upstream = Upstream(delay=0.05)
+    batcher = MicroBatcher(upstream.batch, upstream.single, max_batch_size=3, max_wait=0.01)
+
+    tasks = [asyncio.create_task(batcher.submit(item)) for item in ("a", "b", "c")]
+    await asyncio.sleep(0.02)
+    tasks[1].cancel()
+
+    assert await tasks[0] == "batch:a"
+    assert await tasks[2] == "batch:c"
+    with pytest.raises(asyncio.CancelledError):
+        await tasks[1]
+    assert upstream.singles == []
+
+
+@pytest.mark.asyncio
+async def test_stats():
+    """Test the batch, item and fallback counters."""
+    upstream = Upstream(results=lambda items: [None if item == 0 else item for item in items])
+    batcher = MicroBatcher(upstream.batch, upstream.single, max_batch_size=4, max_wait=0.01)
+
+    await asyncio.gather(*(batcher.submit(i) for i in range(4)))
+    await asyncio.gather(*(batcher.submit(i) for i in range(4, 6)))
+
+    stats = batcher.stats()
+    assert stats["batches"] == 2
+    assert stats["items"] == 6
+    assert stats["avg_batch_size"] == 3.0
+    assert stats["max_batch_size"] == 4
+    assert stats["item_fallbacks"] == 1
+    assert stats["batch_failures"] == 0
+    assert stats["pending"] == 0
+    assert stats["avg_wait_ms"] >= 0.0
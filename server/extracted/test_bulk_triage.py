@@ -0,0 +1,42 @@
+import pytest
+import json
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bulk_triage import BulkTriage, build_local_scoring_pipeline, load_checkpoint, open_output, read_queries
+
+
+async def run_bulk(input_path: Path, output_path: Path, resume: bool = False) -> BulkTriage:
+    done = load_checkpoint(str(output_path)) if resume else set()
+    output = open_output(str(output_path), resume)
+    bulk = BulkTriage(build_local_scoring_pipeline(None), output, concurrency=4, deadline=None, flush_every=1)
+    try:
+        await bulk.run(read_queries(str(input_path), done))
+    finally:
+        output.close()
+    return bulk
+
+@pytest.mark.asyncio
+async def test_bulk_triage_and_resume(tmp_path):
+    """Test streaming results, invalid lines and resuming from the output."""
+    input_path = tmp_path / "queries.jsonl"
+    output_path = tmp_path / "results.jsonl"
+    lines = [json.dumps({"id": i, "query_text": f"I have a headache {i}"}) for i in range(10)]
+    input_path.write_text("\n".join(lines[:6] + ["not json"] + lines[6:]) + "\n")
+
+    bulk = await run_bulk(input_path, output_path)
+    assert bulk.processed == 10
+    assert bulk.failed == 1
+
+    # Simulate a crash: drop the last results and cut a line in half
+    results = output_path.read_text().splitlines()
+    output_path.write_text("\n".join(results[:5]) + "\n" + results[5][:20])
+
+    bulk = await run_bulk(input_path, output_path, resume=True)
+    results = [json.loads(line) for line in output_path.read_text().splitlines() if line.endswith("}")]
+    assert sorted(result["line"] for result in results) == list(range(1, 12))
+    assert all(result["triage_level"] for result in results if "error" not in result)
+    assert "Throughput" in bulk.report(1.0, 5)
@@ -0,0 +1,100 @@
+import pytest
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.cache import AgentCache, MemoryCache, SQLiteCache, make_cache_key
+
+
+def test_cache_key_normalizes_text():
+    """Test that whitespace and case differences share a cache key."""
+    key1 = make_cache_key("enhancer", "I have a  Headache", "gpt-4o", 0.3, "1")
+    key2 = make_cache_key("enhancer", "  i have a headache ", "gpt-4o", 0.3, "1")
+    assert key1 == key2
+
+    # Model, temperature and prompt version are part of the key
+    assert key1 != make_cache_key("enhancer", "I have a headache", "gpt-4o-mini", 0.3, "1")
+    assert key1 != make_cache_key("enhancer", "I have a headache", "gpt-4o", 0.5, "1")
+    assert key1 != make_cache_key("enhancer", "I have a headache", "gpt-4o", 0.3, "2")
+    assert key1 != make_cache_key("scorer", "I have a headache", "gpt-4o", 0.3, "1")
+
+@pytest.mark.asyncio
+async def test_get_or_compute_counts_hits_and_misses():
+    """Test that repeated calls are served from the cache."""
+    cache = AgentCache([MemoryCache(max_entries=10, ttl=60)])
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return "enhanced"
+
+    assert await cache.get_or_compute("enhancer", "k", compute) == "enhanced"
+    assert await cache.get_or_compute("enhancer", "k", compute) == "enhanced"
+    assert len(calls) == 1
+
+    stats = cache.stats()["agents"]["enhancer"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_fallback_results_are_not_cached():
+    """Test that degraded fallback results are never stored."""
+    cache = AgentCache([MemoryCache(max_entries=10, ttl=60)])
+
+    async def compute():
+        return 0.5
+
+    await cache.get_or_compute("scorer", "k", compute, is_fallback=lambda score: score == 0.5)
+    await cache.get_or_compute("scorer", "k", compute, is_fallback=lambda score: score == 0.5)
+    assert cache.stats()["agents"]["scorer"]["hits"] == 0
+
+@pytest.mark.asyncio
+async def test_failed_promotion_still_hits():
+    """Test that a faster tier failing to store a promoted value does not turn the hit into an error."""
+    class BrokenTier(MemoryCache):
+        name = "broken"
+
+        async def set(self, key, value):
+            raise OSError("disk full")
+
+    slow = MemoryCache(max_entries=10, ttl=60)
+    await slow.set("k", "cached")
+    slow.name = "slow"
+    cache = AgentCache([BrokenTier(max_entries=10, ttl=60), slow])
+
+    assert await cache.get("enhancer", "k") == "cached"
+    assert cache.tier_hits["slow"] == 1
+
+@pytest.mark.asyncio
+async def test_memory_cache_lru_and_ttl():
+    """Test LRU eviction and TTL expiry of the in-process tier."""
+    tier = MemoryCache(max_entries=2, ttl=60)
+    await tier.set("a", 1)
+    await tier.set("b", 2)
+    await tier.get("a")
+    await tier.set("c", 3)
+    assert await tier.get("a") == 1
+    assert await tier.get("c") == 3
+    assert len(tier) == 2
+
+    expired = MemoryCache(max_entries=2, ttl=-1)
+    await expired.set("a", 1)
+    await expired.get("a")
+    assert len(expired) == 0
+
+@pytest.mark.asyncio
+async def test_sqlite_tier_survives_restart(tmp_path):
+    """Test that the persistent tier serves values to a new cache instance."""
+    path = str(tmp_path / "agent_cache.db")
+    first = SQLiteCache(path, ttl=60)
+    await first.set("k", 0.8)
+    first.close()
+
+    memory = MemoryCache(max_entries=10, ttl=60)
+    cache = AgentCache([memory, SQLiteCache(path, ttl=60)])
+    assert await cache.get("scorer", "k") == 0.8
+    # The hit is promoted into the in-process tier
+    assert await memory.get("k") == 0.8
@@ -0,0 +1,97 @@
+import pytest
+import sys
+from pathlib import Path
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.database import create_engines
+
+
+@pytest.mark.asyncio
+async def test_sqlite_file_engines(tmp_path):
+    """Test that SQLite files get WAL, a single writer and query-only readers."""
+    write_engine, read_engine = create_engines(f"sqlite+aiosqlite:///{tmp_path / 'app.db'}")
+    assert write_engine is not read_engine
+    assert write_engine.pool.size() == 1
+
+    async with write_engine.begin() as conn:
+        assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1  # NORMAL
+        await conn.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY)"))
+        await conn.execute(text("INSERT INTO item VALUES (1)"))
+
+    async with read_engine.connect() as conn:
+        assert (await conn.execute(text("SELECT count(*) FROM item"))).scalar() == 1
+        with pytest.raises(OperationalError):
+            await conn.execute(text("INSERT INTO item VALUES (2)"))
+
+    await write_engine.dispose()
+    await read_engine.dispose()
+
+@pytest.mark.asyncio
+async def test_memory_database_is_shared():
+    """Test that an in-memory database uses one engine for reads and writes."""
+    write_engine, read_engine = create_engines("sqlite+aiosqlite:///:memory:")
+    assert write_engine is read_engine
+    await write_engine.dispose()
+
+@pytest.mark.asyncio
+async def test_sync_engine_is_cached():
+    """Test that sync sessions share one engine until it is disposed."""
+    from db import database
+
+    await database.init_db()
+    engine = database.get_sync_engine()
+    assert database.get_sync_engine() is engine
+
+    for _ in range(3):
+        session = next(database.get_sync_session())
+        assert session.get_bind() is engine
+        assert session.execute(text("SELECT count(*) FROM query")).scalar() >= 0
+        session.close()
+    assert engine.pool.checkedout() == 0
+
+    await database.dispose_engines()
+    assert database.get_sync_engine() is not engine
+
+def test_url_derivation():
+    """Test async driver selection and sync URL derivation."""
+    from db.database import async_database_url, sync_database_url
+
+    url = async_database_url("postgres://app:s3cret@db:5432/medical")
+    assert url.drivername == "postgresql+asyncpg"
+    sync_url = sync_database_url("postgresql+asyncpg://app:s3cret@db/medical?prepared_statement_cache_size=100")
+    assert sync_url.drivername == "postgresql+psycopg2"
+    assert sync_url.password == "s3cret" and "prepared_statement_cache_size" not in sync_url.query
+    assert sync_database_url("sqlite+aiosqlite:///data/app.db").render_as_string() == "sqlite:///data/app.db"
+    assert async_database_url("sqlite:///:memory:").drivername == "sqlite+aiosqlite"
+
+@pytest.mark.asyncio
+async def test_export_streams_ndjson():
+    """Test that the export endpoint streams every matching query as JSON lines."""
+    import json
+    import httpx
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from main import app
+    from db.database import async_engine, init_db
+    from models import Query, StatusEnum
+
+    await init_db()
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        queries = [Query(query_text=f"Export {i}", status=StatusEnum.REJECTED) for i in range(5)]
+        session.add_all(queries)
+        await session.commit()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/query/export", params={"status": "rejected"}, headers={"X-User-Role": "admin"})
+        forbidden = await client.get("/api/query/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert {q.query_id for q in queries} <= {record["query_id"] for record in records}
+    assert all(record["status"] == "rejected" for record in records)
+    assert forbidden.status_code == 403
@@ -0,0 +1,56 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents import enhancer, scorer
+from agents.deadline import deadline_scope, degraded_stages, remaining, resolve_deadline
+from agents.lexicon import get_safety_lexicon
+from agents.llm_client import get_agent_timeout
+from agents.worker import process_query
+from models import Query
+
+
+@pytest.fixture
+def llm_mode(monkeypatch):
+    """Use the LLM code paths so the deadline checks apply."""
+    for module in (enhancer, scorer):
+        monkeypatch.setattr(module, "MCP_ENABLED", False)
+        monkeypatch.setattr(module, "OPENAI_API_KEY", "local")
+
+def test_resolve_deadline():
+    """Test header parsing, endpoint defaults and the upper bound."""
+    assert resolve_deadline(None, 20.0) == 20.0
+    assert resolve_deadline("2.5", 20.0) == 2.5
+    assert resolve_deadline("not-a-number", 20.0) == 20.0
+    assert resolve_deadline("0", 20.0) is None
+    assert resolve_deadline("100000", 20.0) == 120.0
+
+def test_timeout_capped_by_deadline():
+    """Test that agent read timeouts never outlive the request deadline."""
+    assert remaining() is None
+    with deadline_scope(1.5):
+        assert get_agent_timeout("responder").read <= 1.5
+    assert get_agent_timeout("responder").read == 60.0
+
+@pytest.mark.asyncio
+async def test_short_deadline_degrades_stages(llm_mode):
+    """Test that a tight deadline skips enhancement and scores locally."""
+    text = "I have severe chest pain"
+    with deadline_scope(0.5):
+        assert await enhancer.enhance_query(text) == text
+        assert await scorer.calculate_safety_score(text) == get_safety_lexicon().score(text)
+        assert degraded_stages() == ["enhance", "score"]
+    assert degraded_stages() == []
+
+@pytest.mark.asyncio
+async def test_pipeline_records_degraded_stages(llm_mode):
+    """Test that process_query reports degraded stages to the caller's scope."""
+    query = Query(query_text="Mild headache since yesterday")
+    with deadline_scope(0.5):
+        await process_query(query)
+        assert degraded_stages() == ["enhance", "score"]
+    assert query.enhanced_query == query.query_text
+    assert query.triage_level is not None
@@ -0,0 +1,34 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.lexicon import SafetyLexicon, get_safety_lexicon
+
+
+def test_default_lexicon_matches_previous_scores():
+    """Test that single-tier matches keep the previous MCP scores."""
+    lexicon = get_safety_lexicon()
+    assert lexicon.score("This is an EMERGENCY") == pytest.approx(0.2)
+    assert lexicon.score("I take medication for my blood pressure") == pytest.approx(0.6)
+    assert lexicon.score("What should I eat for breakfast?") == pytest.approx(0.8)
+
+def test_word_boundaries():
+    """Test that terms only match whole words."""
+    lexicon = SafetyLexicon({"pain": 0.25})
+    assert lexicon.matches("I live in Spain") == set()
+    assert lexicon.matches("Sharp pain, then more PAIN.") == {"pain"}
+
+def test_multi_word_terms_and_compounding():
+    """Test multi-word terms and combined risk from several terms."""
+    lexicon = SafetyLexicon({"chest pain": 0.5, "shortness of breath": 0.5}, baseline=1.0)
+    text = "Chest  pain with shortness\nof breath"
+    assert lexicon.matches(text) == {"chest pain", "shortness of breath"}
+    assert lexicon.score(text) == pytest.approx(0.25)
+
+def test_score_many():
+    """Test the batch API returns one score per text in order."""
+    lexicon = SafetyLexicon({"severe": 0.75})
+    assert lexicon.score_many(["severe", "fine", ""]) == pytest.approx([0.2, 0.8, 0.8])
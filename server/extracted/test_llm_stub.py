@@ -0,0 +1,104 @@
+import pytest
+import pytest_asyncio
+import httpx
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mock_llm_server import MockSettings, create_app
+from agents import llm_client, enhancer, scorer, responder, assessor
+from agents.llm_client import set_http_client
+from agents.cache import AgentCache, MemoryCache, set_agent_cache
+from agents.resilience import CircuitBreaker
+
+
+@pytest_asyncio.fixture
+async def stub(monkeypatch):
+    """Route the agents' OpenAI calls to the in-process stand-in server."""
+    settings = MockSettings(seed=1)
+    app = create_app(settings)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    set_http_client(client)
+    monkeypatch.setattr(llm_client, "OPENAI_CHAT_COMPLETIONS_URL", "http://stub/v1/chat/completions")
+    for module in (llm_client, enhancer, scorer, responder, assessor):
+        monkeypatch.setattr(module, "OPENAI_API_KEY", "local")
+    yield settings
+    await client.aclose()
+    set_http_client(None)
+
+@pytest.mark.asyncio
+async def test_agents_over_http(stub):
+    """Test the OpenAI code paths end to end against the stand-in server."""
+    enhanced = await enhancer.enhance_query_with_openai("I have a headache")
+    assert "I have a headache" in enhanced
+
+    score = await scorer.score_single_with_openai("This is an emergency")
+    assert score == pytest.approx(0.2)
+
+    scores = await scorer.score_batch_with_openai(["This is an emergency", "What should I eat?"])
+    assert scores == pytest.approx([0.2, 0.8])
+
+    response = await responder.generate_response_with_openai("I have a headache")
+    assert "healthcare professional" in response
+
+    assessment = await assessor.assess_query_with_openai("Severe chest pain")
+    assert assessment["triage_level"] == "urgent"
+
+@pytest.mark.asyncio
+async def test_outputs_are_deterministic(stub):
+    """Test that identical requests get identical canned outputs."""
+    first = await responder.generate_response_with_openai("Is my blood sugar too high?")
+    second = await responder.generate_response_with_openai("Is my blood sugar too high?")
+    assert first == second
+
+@pytest.mark.asyncio
+async def test_rate_limits_fall_back(stub):
+    """Test that 429 responses trigger the agents' fallbacks."""
+    stub.rate_limit_rate = 1.0
+    assert await enhancer.enhance_query_with_openai("I have a headache") == "I have a headache"
+    assert await scorer.score_single_with_openai("I have a headache") == scorer.FALLBACK_SAFETY_SCORE
+
+@pytest.mark.asyncio
+async def test_streaming_matches_blocking_response(stub):
+    """Test that the streamed deltas add up to the blocking response."""
+    blocking = await responder.generate_response_with_openai("I have a headache")
+    chunks = [chunk async for chunk in responder.stream_response_with_openai("I have a headache")]
+    assert len(chunks) > 1
+    assert "".join(chunks).strip() == blocking
+
+@pytest.mark.asyncio
+async def test_closing_stream_releases_slot(stub):
+    """Test that abandoning a stream early frees the concurrency slot."""
+    stream = responder.stream_response_with_openai("I have a headache")
+    assert await stream.__anext__()
+    assert llm_client.llm_limiter.in_flight == 1
+    await stream.aclose()
+    assert llm_client.llm_limiter.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_mcp_stream_is_chunked(monkeypatch):
+    """Test that the MCP path streams its response in pieces."""
+    monkeypatch.setattr(responder, "MCP_STREAM_CHUNK_DELAY", 0)
+    full = await responder.generate_response_with_mcp("I have a headache")
+    chunks = [chunk async for chunk in responder.stream_response_with_mcp("I have a headache")]
+    assert len(chunks) > 1
+    assert "".join(chunks) == full
+
+@pytest.mark.asyncio
+async def test_stream_fallback_is_not_cached(stub, monkeypatch):
+    """Test that a stream falling back to MCP after a 429 leaves the cache empty."""
+    stub.rate_limit_rate = 1.0
+    monkeypatch.setattr(responder, "MCP_ENABLED", False)
+    monkeypatch.setattr(responder, "MCP_STREAM_CHUNK_DELAY", 0)
+    monkeypatch.setattr(llm_client, "llm_breaker", CircuitBreaker())
+    cache = AgentCache([MemoryCache(max_entries=10, ttl=60)])
+    set_agent_cache(cache)
+    try:
+        chunks = [chunk async for chunk in responder.stream_response("I have a headache")]
+        assert "".join(chunks) == await responder.generate_response_with_mcp("I have a headache")
+        key = responder.response_cache_key("I have a headache")
+        assert await cache.get("responder", key, default=None) is None
+    finally:
+        set_agent_cache(None)
@@ -0,0 +1,73 @@
+import pytest
+import httpx
+import re
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from metrics import Counter, Histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test the Prometheus text format of a histogram."""
+    histogram = Histogram("test_latency_seconds", "Test latency", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5.0, "/a")
+    text = histogram.render()
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{route="/a"} 3' in text
+    assert histogram.sum("/a") == pytest.approx(5.55)
+
+def test_counter_escapes_labels():
+    """Test counter totals and label escaping."""
+    counter = Counter("test_events", "Test events", ("name",))
+    counter.inc('say "hi"')
+    counter.inc('say "hi"', amount=2)
+    assert 'test_events_total{name="say \\"hi\\""} 3' in counter.render()
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint():
+    """Test that /metrics reports route latencies, DB statements and gauges."""
+    from main import app
+    from db.database import init_db
+
+    await init_db()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        await client.get("/")
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/",status="200"} 1' in text
+    assert 'db_query_duration_seconds_count{operation="SELECT"}' in text
+    assert re.search(r"^pending_reviews \d+$", text, re.MULTILINE)
+    assert "worker_queue_depth 0" in text
+
+@pytest.mark.asyncio
+async def test_agent_cache_counters():
+    """Test that agent cache hits and misses are exposed as counters."""
+    from agents.cache import AgentCache, MemoryCache, set_agent_cache
+    from metrics import render
+
+    async def compute():
+        return "result"
+
+    cache = AgentCache([MemoryCache(max_entries=10, ttl=60)])
+    set_agent_cache(cache)
+    try:
+        for _ in range(3):
+            await cache.get_or_compute("enhancer", "key", compute)
+        text = render()
+    finally:
+        set_agent_cache(None)
+
+    assert "# TYPE agent_cache_hits counter" in text
+    assert 'agent_cache_hits_total{agent="enhancer"} 2' in text
+    assert 'agent_cache_misses_total{agent="enhancer"} 1' in text
@@ -0,0 +1,91 @@
+import pytest
+import sys
+from pathlib import Path
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models import Query
+from db.migrations import migrate_indexes
+
+
+async def create_unindexed_tables(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                await conn.execute(text(f'DROP INDEX "{index.name}"'))
+
+
+async def index_names(engine, table_name):
+    async with engine.connect() as conn:
+        indexes = await conn.run_sync(lambda c: inspect(c).get_indexes(table_name))
+    return {index["name"] for index in indexes}
+
+
+@pytest.mark.asyncio
+async def test_migration_adds_missing_indexes():
+    """Test that indexes are added to existing tables and reruns are no-ops."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    await create_unindexed_tables(engine)
+    assert not await index_names(engine, "query")
+
+    created = await migrate_indexes(engine)
+    assert "ix_query_query_id" in created
+    assert "ix_response_query_id_created_at" in created
+    assert await index_names(engine, "query") == {index.name for index in Query.__table__.indexes}
+    assert await migrate_indexes(engine) == []
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_duplicates_skip_only_unique_index():
+    """Test that duplicate values block the unique index but not the others."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    await create_unindexed_tables(engine)
+    async with engine.begin() as conn:
+        for _ in range(2):
+            await conn.execute(text(
+                "INSERT INTO query (query_id, query_text, status, created_at, updated_at) "
+                "VALUES ('dup', 'text', 'PENDING', '2024-01-01', '2024-01-01')"
+            ))
+
+    created = await migrate_indexes(engine)
+    assert "ix_query_query_id" not in created
+    assert "ix_query_status_created_at" in created
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_migration_enables_autoincrement():
+    """Test that tables created without AUTOINCREMENT are rebuilt to never reuse archived keys."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    metadata = MetaData()
+    for table in SQLModel.metadata.sorted_tables:
+        table.to_metadata(metadata).dialect_options["sqlite"]["autoincrement"] = False
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+        await conn.execute(text(
+            "INSERT INTO query (id, query_id, query_text, status, created_at, updated_at) "
+            "VALUES (1, 'live', 'text', 'PENDING', '2024-01-01', '2024-01-01')"
+        ))
+        await conn.execute(text(
+            "INSERT INTO query_archive (id, query_id, query_text, status, created_at, updated_at, archived_at) "
+            "VALUES (5, 'archived', 'text', 'APPROVED', '2024-01-01', '2024-01-01', '2024-01-02')"
+        ))
+
+    created = await migrate_indexes(engine)
+    assert "ix_query_status_created_at" in created
+    async with engine.begin() as conn:
+        sql = (await conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'query'"))).scalar()
+        assert "AUTOINCREMENT" in sql
+        await conn.execute(text(
+            "INSERT INTO query (query_id, query_text, status, created_at, updated_at) "
+            "VALUES ('new', 'text', 'PENDING', '2024-01-01', '2024-01-01')"
+        ))
+        ids = (await conn.execute(text("SELECT id, query_id FROM query ORDER BY id"))).all()
+    assert [tuple(row) for row in ids] == [(1, "live"), (6, "new")]
+    assert await migrate_indexes(engine) == []
+    await engine.dispose()
@@ -0,0 +1,88 @@
+import pytest
+import httpx
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from main import app
+from db.database import async_engine, init_db
+from models import Query, StatusEnum, TriageLevelEnum
+from routes.pagination import CURSOR_HEADER, MAX_PAGE_LIMIT, SortOrder, decode_cursor, encode_cursor, get_page
+
+DOCTOR = {"X-User-Role": "doctor"}
+
+
+async def walk(client, path, **params):
+    """Follow X-Next-Cursor through a list and return the query ids in order."""
+    seen = []
+    cursor = None
+    while True:
+        response = await client.get(path, params={**params, **({"cursor": cursor} if cursor else {})}, headers=DOCTOR)
+        assert response.status_code == 200
+        seen += [item["query_id"] for item in response.json()]
+        cursor = response.headers.get(CURSOR_HEADER)
+        if not cursor:
+            return seen
+
+
+def test_cursor_round_trip():
+    """Test that cursors decode to the key and order they were made from."""
+    key = (datetime(2024, 5, 1, 12, 30, 15, 123456), 42)
+    assert decode_cursor(encode_cursor(key, SortOrder.DESC)) == (key, SortOrder.DESC)
+
+@pytest.mark.asyncio
+async def test_cursor_pages_match_offset_pages():
+    """Test that cursor pages cover the list like offset pages, in both orders."""
+    await init_db()
+    created = datetime.utcnow()
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        # Shared timestamps make the id tie-breaker matter
+        queries = [
+            Query(query_text=f"Urgent {i}", status=StatusEnum.NEEDS_REVIEW,
+                  triage_level=TriageLevelEnum.URGENT, created_at=created + timedelta(seconds=i // 3))
+            for i in range(23)
+        ]
+        session.add_all(queries)
+        await session.commit()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        by_cursor = await walk(client, "/api/triage/urgent", limit=5)
+        by_offset = []
+        for offset in range(0, len(by_cursor) + 5, 5):
+            response = await client.get("/api/triage/urgent", params={"limit": 5, "offset": offset}, headers=DOCTOR)
+            by_offset += [item["query_id"] for item in response.json()]
+
+        assert by_cursor == by_offset
+        assert len(set(by_cursor)) == len(by_cursor)
+        mine = [q.query_id for q in queries]
+        assert [query_id for query_id in by_cursor if query_id in mine] == mine
+
+        descending = await walk(client, "/api/triage/urgent", limit=7, order="desc")
+        assert descending == by_cursor[::-1]
+
+@pytest.mark.asyncio
+async def test_bad_cursor_rejected():
+    """Test that malformed cursors and cursors for another order get a 400."""
+    cursor = encode_cursor((datetime.utcnow(), 1), SortOrder.ASC)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/triage/urgent", params={"cursor": "not-a-cursor"}, headers=DOCTOR)
+        assert response.status_code == 400
+        response = await client.get("/api/triage/urgent", params={"cursor": cursor, "order": "desc"}, headers=DOCTOR)
+        assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_page_bounds():
+    """Test that limits above the maximum are clamped and out-of-range values get a 422."""
+    assert get_page(limit=1000, offset=0, cursor=None, order=SortOrder.ASC).limit == MAX_PAGE_LIMIT
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        for params in ({"limit": 0}, {"offset": -1}):
+            response = await client.get("/api/triage/urgent", params=params, headers=DOCTOR)
+            assert response.status_code == 422
+        response = await client.get("/api/triage/urgent", params={"limit": 1000, "offset": 0}, headers=DOCTOR)
+        assert response.status_code == 200
+        assert len(response.json()) <= MAX_PAGE_LIMIT
@@ -0,0 +1,92 @@
+import pytest
+import asyncio
+import time
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.pipeline import Pipeline, PipelineError, Stage, STAGE_FALLBACK, STAGE_OK
+from agents.worker import process_query
+from models import Query, StatusEnum
+
+
+async def slow_upper(text: str) -> str:
+    await asyncio.sleep(0.1)
+    return text.upper()
+
+async def slow_length(text: str) -> int:
+    await asyncio.sleep(0.1)
+    return len(text)
+
+async def join(upper: str, length: int) -> str:
+    return f"{upper}:{length}"
+
+@pytest.mark.asyncio
+async def test_independent_stages_run_concurrently():
+    """Test that stages with satisfied inputs run at the same time."""
+    pipeline = Pipeline("test", [
+        Stage("upper", slow_upper, inputs=["text"], outputs="upper"),
+        Stage("length", slow_length, inputs=["text"], outputs="length"),
+        Stage("join", join, inputs=["upper", "length"], outputs="joined"),
+    ])
+    started = time.monotonic()
+    run = await pipeline.run({"text": "abc"})
+    assert run.context["joined"] == "ABC:3"
+    assert time.monotonic() - started < 0.19
+    assert set(run.timings()) == {"upper", "length", "join"}
+    assert all(result.status == STAGE_OK for result in run.stages.values())
+
+@pytest.mark.asyncio
+async def test_timeout_retries_then_falls_back():
+    """Test that a stage is retried on timeout and then uses its fallback."""
+    calls = []
+
+    async def hang(text: str) -> str:
+        calls.append(text)
+        await asyncio.sleep(1)
+        return text
+
+    pipeline = Pipeline("test", [
+        Stage("hang", hang, inputs=["text"], outputs="result", timeout=0.02, retries=2,
+              fallback=lambda text: "fallback"),
+    ])
+    run = await pipeline.run({"text": "abc"})
+    assert run.context["result"] == "fallback"
+    assert len(calls) == 3
+    assert run.stages["hang"].status == STAGE_FALLBACK
+    assert run.degraded() == ["hang"]
+
+@pytest.mark.asyncio
+async def test_failure_without_fallback_raises():
+    """Test that a failing stage without a fallback fails the pipeline."""
+    async def boom(text: str) -> str:
+        raise RuntimeError("boom")
+
+    pipeline = Pipeline("test", [Stage("boom", boom, inputs=["text"], outputs="result")])
+    with pytest.raises(PipelineError):
+        await pipeline.run({"text": "abc"})
+
+def test_invalid_definitions_rejected():
+    """Test that cycles and duplicate outputs are rejected up front."""
+    with pytest.raises(PipelineError):
+        Pipeline("cycle", [
+            Stage("a", join, inputs={"upper": "b_out", "length": "x"}, outputs="a_out"),
+            Stage("b", slow_upper, inputs={"text": "a_out"}, outputs="b_out"),
+        ])
+    with pytest.raises(PipelineError):
+        Pipeline("duplicate", [
+            Stage("a", slow_upper, inputs=["text"], outputs="out"),
+            Stage("b", slow_upper, inputs=["text"], outputs="out"),
+        ])
+
+@pytest.mark.asyncio
+async def test_query_pipeline():
+    """Test the enhance, score and triage pipeline on the local agents."""
+    query = Query(query_text="I have severe chest pain")
+    await process_query(query)
+    assert query.enhanced_query
+    assert query.safety_score is not None
+    assert query.triage_level is not None
+    assert query.status in (StatusEnum.NEEDS_REVIEW, StatusEnum.PROCESSING)
@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.prompt_budget import build_response_prompt, count_message_tokens, rank_file_summaries
+
+SYSTEM_PROMPT = "You are a medical AI assistant."
+MODEL = "gpt-4o"
+
+
+def make_history(turns):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"Turn {i}. " + "details " * 50}
+        for i in range(turns)
+    ]
+
+def test_small_prompt_is_unchanged():
+    """Test that a prompt within budget keeps everything verbatim."""
+    history = make_history(2)
+    plan = build_response_prompt(
+        SYSTEM_PROMPT, "Is my blood pressure normal?", MODEL, 1000,
+        file_summaries=["Blood pressure 130/85"], conversation_history=history, budget=4000
+    )
+    assert plan.messages[1:3] == history
+    assert plan.messages[-1]["content"].endswith("File 1: Blood pressure 130/85")
+    assert plan.decisions["summarized_turns"] == 0
+    assert plan.decisions["files_dropped"] == []
+
+def test_long_history_is_summarized_within_budget():
+    """Test that older turns are compressed and the budget is respected."""
+    history = make_history(40)
+    plan = build_response_prompt(
+        SYSTEM_PROMPT, "What should I do about my headache?", MODEL, 1000,
+        conversation_history=history, budget=800
+    )
+    decisions = plan.decisions
+    assert not decisions["over_budget"]
+    assert count_message_tokens(plan.messages, MODEL) <= 800
+    assert decisions["summarized_turns"] == 40 - decisions["verbatim_turns"]
+    assert plan.messages[1]["content"].startswith("Summary of earlier conversation:")
+    # The most recent turn is always kept verbatim
+    assert plan.messages[-2] == history[-1]
+
+def test_file_summaries_ranked_by_relevance():
+    """Test that the most relevant file survives when space runs out."""
+    files = [
+        "Dental cleaning record from last spring " * 20,
+        "Blood pressure readings averaging 150/95 over two weeks",
+    ]
+    assert rank_file_summaries("My blood pressure readings are high", files) == [1, 0]
+
+    plan = build_response_prompt(
+        SYSTEM_PROMPT, "My blood pressure readings are high", MODEL, 1000,
+        file_summaries=files, budget=80
+    )
+    assert plan.decisions["files_included"] == [1]
+    assert plan.decisions["files_dropped"] == [0]
+    assert "File 2: Blood pressure" in plan.messages[-1]["content"]
@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+import httpx
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from main import app
+from agents.deadline import remaining
+from db.database import async_engine, init_db
+from models import Query
+from routes import query as query_routes
+
+
+@pytest.mark.asyncio
+async def test_batch_partial_failures(monkeypatch):
+    """Test that failing items report errors without rolling back the rest."""
+    await init_db()
+    process_query = query_routes.process_query
+
+    async def process_with_collision(query):
+        await process_query(query)
+        if query.query_text == "duplicate":
+            # Force a primary key collision so the insert fails
+            query.id = 1
+        return query
+
+    monkeypatch.setattr(query_routes, "process_query", process_with_collision)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.post("/api/query/batch", json={"items": [{"query_text": "I have a headache"}]})
+        assert first.status_code == 200
+
+        response = await client.post("/api/query/batch", json={"items": [
+            {"query_text": "Severe chest pain"},
+            {"user_id": 3},
+            {"query_text": "duplicate"},
+            {"query_text": "Mild rash on my arm"},
+        ]})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["index"] for item in data["items"]] == [0, 1, 2, 3]
+        assert data["succeeded"] == 2 and data["failed"] == 2
+        assert data["items"][1]["error"].startswith("Invalid item")
+        assert data["items"][2]["error"] == "Could not be saved"
+
+    saved_ids = {data["items"][0]["query"]["query_id"], data["items"][3]["query"]["query_id"]}
+    async with AsyncSession(async_engine) as session:
+        result = await session.exec(select(Query.query_id).where(Query.query_id.in_(saved_ids)))
+        assert set(result.all()) == saved_ids
+
+
+@pytest.mark.asyncio
+async def test_batch_shares_one_deadline(monkeypatch):
+    """Test that items queued behind others do not get a fresh deadline budget."""
+    await init_db()
+    process_query = query_routes.process_query
+    budgets = []
+
+    async def slow_process(query):
+        budgets.append(remaining())
+        await asyncio.sleep(0.3)
+        return await process_query(query)
+
+    monkeypatch.setattr(query_routes, "process_query", slow_process)
+    monkeypatch.setattr(query_routes, "QUERY_BATCH_CONCURRENCY", 1)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post(
+            "/api/query/batch",
+            json={"items": [{"query_text": "Sore throat"}, {"query_text": "Sore knee"}]},
+            headers={"X-Request-Deadline": "10"}
+        )
+
+    assert response.status_code == 200
+    assert budgets[0] > 9.5
+    assert budgets[1] < budgets[0] - 0.25
+
+
+@pytest.mark.asyncio
+async def test_batch_size_limit(monkeypatch):
+    """Test that oversized batches are rejected up front."""
+    monkeypatch.setattr(query_routes, "QUERY_BATCH_MAX_ITEMS", 2)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/api/query/batch", json={"items": [{"query_text": "a"}] * 3})
+    assert response.status_code == 413
@@ -0,0 +1,93 @@
+import pytest
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.resilience import AdaptiveConcurrencyLimiter, CircuitBreaker, LLMUnavailableError
+
+
+def test_breaker_opens_and_recovers():
+    """Test that the breaker opens on failures and closes after a good probe."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.0, half_open_calls=1)
+    assert breaker.allow()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # After the reset timeout one probe is allowed through
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_breaker_fails_fast_while_open():
+    """Test that calls are rejected until the reset timeout passes."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60.0)
+    breaker.record_failure()
+    assert not breaker.allow()
+    assert breaker.snapshot()["rejected"] == 1
+
+def test_limiter_aimd():
+    """Test additive increase and multiplicative decrease of the limit."""
+    limiter = AdaptiveConcurrencyLimiter(initial=10, min_limit=2, max_limit=20, backoff=0.5)
+    for _ in range(10):
+        limiter.on_success(0.01)
+    # Roughly one step of additive increase per window of successes
+    assert 10.9 < limiter.limit < 11
+    grown = limiter.limit
+    limiter.on_drop()
+    assert limiter.limit == pytest.approx(grown * 0.5)
+    for _ in range(10):
+        limiter.on_drop()
+    assert limiter.limit == 2
+
+@pytest.mark.asyncio
+async def test_limiter_queues_and_rejects():
+    """Test that callers beyond the limit wait, and time out when starved."""
+    limiter = AdaptiveConcurrencyLimiter(initial=1, min_limit=1, max_waiting=1, queue_timeout=0.05)
+    await limiter.acquire()
+
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    # The queue is full, so another caller is rejected immediately
+    with pytest.raises(LLMUnavailableError):
+        await limiter.acquire()
+
+    limiter.release()
+    await waiter
+    assert limiter.in_flight == 1
+
+    with pytest.raises(LLMUnavailableError):
+        await limiter.acquire()
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_releases_breaker(monkeypatch):
+    """Test that a half-open probe cancelled before its outcome does not keep the circuit shut."""
+    from agents import llm_client
+
+    class HangingClient:
+        async def post(self, *args, **kwargs):
+            await asyncio.Event().wait()
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0, half_open_calls=1)
+    breaker.record_failure()
+    monkeypatch.setattr(llm_client, "llm_breaker", breaker)
+    monkeypatch.setattr(llm_client, "llm_limiter", AdaptiveConcurrencyLimiter(initial=4))
+    monkeypatch.setattr(llm_client, "get_http_client", lambda: HangingClient())
+
+    probe = asyncio.create_task(llm_client.post_chat_completion("enhancer", {}))
+    await asyncio.sleep(0.01)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    assert llm_client.llm_limiter.in_flight == 0
+    assert breaker.allow()
@@ -0,0 +1,80 @@
+import pytest
+import httpx
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import event
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from main import app
+from db.database import async_engine, init_db, read_engine
+from models import Query, Response, StatusEnum
+from routes import review as review_routes
+
+DOCTOR = {"X-User-Role": "doctor"}
+
+
+@pytest.mark.asyncio
+async def test_pending_reviews_single_statement():
+    """Test that a page of pending reviews costs one SQL statement."""
+    await init_db()
+    created = datetime.utcnow()
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        queries = [Query(query_text=f"Pending {i}", status=StatusEnum.NEEDS_REVIEW) for i in range(20)]
+        unanswered = Query(query_text="No draft yet", status=StatusEnum.NEEDS_REVIEW)
+        session.add_all(queries + [unanswered])
+        await session.flush()
+        for query in queries:
+            for age, text in ((2, "older draft"), (1, "latest draft")):
+                session.add(Response(
+                    response_text=f"{text} {query.query_text}", query_id=query.id,
+                    created_at=created - timedelta(minutes=age)
+                ))
+        await session.commit()
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(read_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/api/review/pending", params={"limit": 1000}, headers=DOCTOR)
+    finally:
+        event.remove(read_engine.sync_engine, "before_cursor_execute", count)
+
+    assert response.status_code == 200
+    assert len(statements) == 1
+    reviews = {review["query_id"]: review for review in response.json()}
+    assert unanswered.query_id not in reviews
+    for query in queries:
+        assert reviews[query.query_id]["response_text"] == f"latest draft {query.query_text}"
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_query_removed_while_streaming(monkeypatch):
+    """Test that a query deleted during streaming ends the stream with an error instead of crashing."""
+    await init_db()
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        query = Query(query_text="Gone soon", status=StatusEnum.NEEDS_REVIEW)
+        session.add(query)
+        await session.commit()
+
+    async def stream_and_delete(prompt_text):
+        yield "Draft"
+        async with AsyncSession(async_engine) as session:
+            await session.delete(await session.get(Query, query.id))
+            await session.commit()
+
+    monkeypatch.setattr(review_routes, "stream_response", stream_and_delete)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/api/review/generate/stream", json={"query_id": query.query_id}, headers=DOCTOR)
+
+    assert response.status_code == 200
+    assert "event: token" in response.text
+    assert "event: error" in response.text and "event: done" not in response.text
@@ -0,0 +1,71 @@
+import pytest
+import httpx
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from main import app
+from db.archive import archive_batch
+from db.database import async_engine, init_db
+from db.search import search_terms
+from models import Query, Response, StatusEnum
+
+DOCTOR = {"X-User-Role": "doctor"}
+
+
+async def search(client, q, **params):
+    return await client.get("/api/query/search", params={"q": q, **params}, headers=DOCTOR)
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_pages_and_follows_changes():
+    """Test that search ranks and pages matches and picks up inserts, updates and archival."""
+    await init_db()
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        title = Query(query_text="Zolpidemic rash on both arms", status=StatusEnum.APPROVED)
+        others = [Query(query_text=f"Question {i} about sleep", status=StatusEnum.NEEDS_REVIEW) for i in range(5)]
+        session.add_all([title] + others)
+        await session.flush()
+        for query in others:
+            session.add(Response(response_text="A zolpidemic reaction is unlikely here", query_id=query.id))
+        await session.commit()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        first = await search(client, "zolpidemic", limit=4)
+        assert first.status_code == 200
+        assert first.json()[0]["query_id"] == title.query_id
+        assert "<mark>Zolpidemic</mark>" in first.json()[0]["snippet"]
+        cursor = first.headers["X-Next-Cursor"]
+        rest = await search(client, "zolpidemic", limit=4, cursor=cursor)
+        found = [r["query_id"] for r in first.json() + rest.json()]
+        assert sorted(found) == sorted(q.query_id for q in [title] + others)
+        assert "X-Next-Cursor" not in rest.headers
+        assert (await search(client, "other words", cursor=cursor)).status_code == 400
+
+        # Updates are indexed, and archived queries stay searchable
+        async with AsyncSession(async_engine) as session:
+            query = (await session.exec(select(Query).where(Query.id == others[0].id))).one()
+            query.enhanced_query = "Insomnia with quinquennial relapses"
+            session.add(query)
+            await session.commit()
+        async with async_engine.begin() as conn:
+            await conn.execute(Query.__table__.update().where(Query.id == title.id).values(created_at=title.created_at.replace(year=2000)))
+            await archive_batch(conn, title.created_at.replace(year=2001), batch_size=10)
+
+        updated = (await search(client, "quinquennial")).json()
+        assert [r["query_id"] for r in updated] == [others[0].query_id]
+        archived = (await search(client, "zolpidemic rash")).json()
+        assert [(r["query_id"], r["archived"]) for r in archived] == [(title.query_id, True)]
+        assert (await search(client, "!!!")).status_code == 400
+        assert (await client.get("/api/query/search", params={"q": "rash"})).status_code == 403
+
+
+def test_search_terms_are_quoted():
+    """Test that FTS5 syntax in the input is searched literally."""
+    assert search_terms('knee" OR pain*', "sqlite") == '"knee" "OR" "pain"'
+    assert search_terms('knee" OR pain*', "postgresql") == 'knee" OR pain*'
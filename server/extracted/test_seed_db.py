@@ -0,0 +1,42 @@
+import pytest
+import sys
+from collections import Counter
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from seed_db import SeedConfig, SyntheticData, parse_weights
+from models import StatusEnum, TriageLevelEnum
+
+
+def test_synthetic_rows_follow_config():
+    """Test that generated rows honour the distributions and reference each other."""
+    config = SeedConfig(
+        users=200, queries=5000, chunk_size=1000, seed=3, file_rate=0.2,
+        status_weights=parse_weights("needs_review=3,completed=1", StatusEnum),
+        triage_weights={TriageLevelEnum.URGENT: 1.0},
+    )
+    data = SyntheticData(config, {"user": 1, "query": 10, "response": 1, "file": 1})
+    users = [user for chunk in data.users() for user in chunk]
+    queries, responses, files = [], [], []
+    for query_chunk, response_chunk, file_chunk in data.queries():
+        assert len(query_chunk) <= config.chunk_size
+        queries += query_chunk
+        responses += response_chunk
+        files += file_chunk
+
+    assert len(users) == 200 and len(queries) == 5000
+    assert queries[0]["id"] == 10
+    statuses = Counter(query["status"] for query in queries)
+    assert set(statuses) == {StatusEnum.NEEDS_REVIEW, StatusEnum.COMPLETED}
+    assert 0.7 < statuses[StatusEnum.NEEDS_REVIEW] / len(queries) < 0.8
+    assert all(0.0 <= query["safety_score"] <= 0.3 for query in queries)
+    assert [query["created_at"] for query in queries] == sorted(query["created_at"] for query in queries)
+
+    query_ids = {query["id"] for query in queries}
+    assert {response["query_id"] for response in responses} == query_ids
+    assert {file["query_id"] for file in files} <= query_ids
+    assert 0.15 < len(files) / len(queries) < 0.25
+    patients = {user["id"] for user in users if user["role"].value == "patient"}
+    assert {query["user_id"] for query in queries} <= patients
@@ -0,0 +1,97 @@
+import pytest
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents.singleflight import SingleFlight
+from agents.cache import AgentCache, MemoryCache
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    """Test that identical concurrent calls await a single underlying call."""
+    flight = SingleFlight()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 0.8
+
+    results = await asyncio.gather(*(flight.do("k", fn) for _ in range(10)))
+    assert results == [0.8] * 10
+    assert len(calls) == 1
+    assert flight.stats() == {"executed": 1, "coalesced": 9, "in_flight": 0}
+
+    # The key is forgotten once the call finishes
+    await flight.do("k", fn)
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_all_waiters():
+    """Test that an exception is raised in every coalesced caller."""
+    flight = SingleFlight()
+
+    async def fn():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream failed")
+
+    results = await asyncio.gather(*(flight.do("k", fn) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    """Test that cancelling one waiter leaves the call running for the others."""
+    flight = SingleFlight()
+
+    async def fn():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("k", fn))
+    second = asyncio.ensure_future(flight.do("k", fn))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+@pytest.mark.asyncio
+async def test_last_cancelled_waiter_cancels_call():
+    """Test that the underlying call is cancelled once nobody waits for it."""
+    flight = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def fn():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiter = asyncio.ensure_future(flight.do("k", fn))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    await asyncio.sleep(0)
+    assert flight.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_cache_coalesces_concurrent_misses():
+    """Test that the agent cache computes a burst of identical misses once."""
+    cache = AgentCache([MemoryCache(max_entries=10, ttl=60)])
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "enhanced"
+
+    results = await asyncio.gather(*(cache.get_or_compute("enhancer", "k", compute) for _ in range(5)))
+    assert results == ["enhanced"] * 5
+    assert len(calls) == 1
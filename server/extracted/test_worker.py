@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+import pytest_asyncio
+import httpx
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from main import app
+from agents import worker
+from agents.worker import QueryWorkerPool
+from db.database import dispose_engines, init_db
+from models import StatusEnum
+from routes import query as query_routes
+
+ASYNC = {"Prefer": "respond-async"}
+
+
+@pytest_asyncio.fixture
+async def pool(monkeypatch):
+    """Run a small worker pool in place of the process-wide one."""
+    await init_db()
+    pool = QueryWorkerPool(workers=1, queue_size=1)
+    monkeypatch.setattr(query_routes, "query_worker_pool", pool)
+    pool.start()
+    yield pool
+    await pool.stop()
+    # Workers and handlers queued for the single writer, which binds its pool to this test's loop
+    await dispose_engines()
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    """Hold each background query in PROCESSING until the event is set."""
+    release = asyncio.Event()
+    process_query = worker.process_query
+
+    async def gated_process(query, session=None):
+        await release.wait()
+        return await process_query(query, session)
+
+    monkeypatch.setattr(worker, "process_query", gated_process)
+    return release
+
+
+async def poll(client, location, done, timeout=5.0):
+    statuses = []
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        status = (await client.get(location)).json()["status"]
+        if not statuses or statuses[-1] != status:
+            statuses.append(status)
+        if done(status):
+            return statuses
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Query did not finish, statuses seen: {statuses}")
+
+
+@pytest.mark.asyncio
+async def test_async_query_moves_through_statuses(pool, gate):
+    """Test that respond-async returns 202 with Location and the worker reaches a final status."""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/api/query/", json={"query_text": "Severe chest pain, I can't breathe"}, headers=ASYNC)
+        assert response.status_code == 202
+        assert response.json()["status"] == StatusEnum.PENDING.value
+        location = response.headers["Location"]
+        assert location == f"/api/query/{response.json()['query_id']}"
+
+        seen = await poll(client, location, lambda status: status == StatusEnum.PROCESSING.value)
+        gate.set()
+        await pool.queue.join()
+        final = (await client.get(location)).json()
+
+    assert seen[-1] == StatusEnum.PROCESSING.value
+    assert final["status"] in (StatusEnum.NEEDS_REVIEW.value, StatusEnum.PROCESSING.value)
+    assert final["safety_score"] is not None and final["triage_level"] is not None
+    assert pool.processed == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_failure_needs_review(pool, monkeypatch):
+    """Test that a query whose processing fails is left for a doctor instead of stuck in PROCESSING."""
+    async def failing_process(query, session=None):
+        raise RuntimeError("agent exploded")
+
+    monkeypatch.setattr(worker, "process_query", failing_process)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/api/query/", json={"query_text": "Mild headache"}, headers=ASYNC)
+        assert response.status_code == 202
+        statuses = await poll(client, response.headers["Location"], lambda status: status == StatusEnum.NEEDS_REVIEW.value)
+
+    assert statuses[-1] == StatusEnum.NEEDS_REVIEW.value
+    assert pool.failed == 1
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejected(pool, gate):
+    """Test that a full processing queue answers 503 with Retry-After."""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        # The first query occupies the worker, the second fills the queue
+        for text in ("First", "Second"):
+            response = await client.post("/api/query/", json={"query_text": text}, headers=ASYNC)
+            assert response.status_code == 202
+            await asyncio.sleep(0.01)
+        assert pool.is_full()
+
+        response = await client.post("/api/query/", json={"query_text": "Third"}, headers=ASYNC)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+        gate.set()
+        await pool.queue.join()
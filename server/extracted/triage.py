@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
 
-from db.database import get_session
+from db.database import get_read_session, get_session
 from models import Query, StatusEnum, RoleEnum, TriageLevelEnum
+from routes.pagination import Page, get_page
 
 router = APIRouter()
 
@@ -45,17 +47,19 @@ async def verify_role(x_user_role: Optional[str] = Header(None)):
 
 @router.get("/", response_model=List[TriageResponse])
 async def list_triaged_queries(
+    response: Response,
     triage_level: Optional[TriageLevelEnum] = None,
     status: Optional[StatusEnum] = None,
-    limit: int = 10,
-    offset: int = 0,
-    session: AsyncSession = Depends(get_session),
+    page: Page = Depends(get_page),
+    session: AsyncSession = Depends(get_read_session),
     role: RoleEnum = Depends(verify_role)
 ):
     """
     List queries with triage information.
     Can be filtered by triage level and status.
     Only doctors and admins can access this endpoint.
+    Paginated by cursor or offset; the next page's cursor is returned in the
+    X-Next-Cursor header.
     """
     # Only doctors and admins can access triage information
     if role not in [RoleEnum.DOCTOR, RoleEnum.ADMIN]:
@@ -65,7 +69,7 @@ async def list_triaged_queries(
         )
     
     # Build the query
-    query = Query.select().where(Query.triage_level != None)
+    query = select(Query).where(Query.triage_level != None)
     
     # Apply filters if provided
     if triage_level:
@@ -75,11 +79,11 @@ async def list_triaged_queries(
         query = query.where(Query.status == status)
     
     # Apply pagination
-    query = query.offset(offset).limit(limit)
+    query = page.apply(query, Query.created_at, Query.id)
     
     # Execute the query
     results = await session.exec(query)
-    queries = results.all()
+    queries = page.finish(results.all(), response, lambda q: (q.created_at, q.id))
     
     return [
         TriageResponse(
@@ -110,7 +114,7 @@ async def update_triage_level(
         )
     
     # Get the query
-    query_result = await session.exec(Query.select.where(Query.query_id == query_id))
+    query_result = await session.exec(select(Query).where(Query.query_id == query_id))
     query = query_result.first()
     
     if not query:
@@ -141,14 +145,16 @@ async def update_triage_level(
 
 @router.get("/urgent", response_model=List[TriageResponse])
 async def list_urgent_queries(
-    limit: int = 10,
-    offset: int = 0,
-    session: AsyncSession = Depends(get_session),
+    response: Response,
+    page: Page = Depends(get_page),
+    session: AsyncSession = Depends(get_read_session),
     role: RoleEnum = Depends(verify_role)
 ):
     """
     List all urgent queries that need immediate attention.
     Only doctors and admins can access this endpoint.
+    Paginated by cursor or offset; the next page's cursor is returned in the
+    X-Next-Cursor header.
     """
     # Only doctors and admins can access urgent queries
     if role not in [RoleEnum.DOCTOR, RoleEnum.ADMIN]:
@@ -158,14 +164,14 @@ async def list_urgent_queries(
         )
     
     # Build the query for urgent cases
-    query = Query.select().where(Query.triage_level == TriageLevelEnum.URGENT)
+    query = select(Query).where(Query.triage_level == TriageLevelEnum.URGENT)
     
     # Apply pagination
-    query = query.offset(offset).limit(limit)
+    query = page.apply(query, Query.created_at, Query.id)
     
     # Execute the query
     results = await session.exec(query)
-    queries = results.all()
+    queries = page.finish(results.all(), response, lambda q: (q.created_at, q.id))
     
     return [
         TriageResponse(
@@ -0,0 +1,230 @@
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
+from dotenv import load_dotenv
+
+from db.database import async_engine
+from models import Query, StatusEnum, TriageLevelEnum
+from agents.enhancer import enhance_query
+from agents.scorer import calculate_safety_score
+from agents.triage import determine_triage_level
+from agents.assessor import FUSED_AGENT_ENABLED, assess_query
+from agents.lexicon import get_safety_lexicon
+from agents.pipeline import Pipeline, Stage
+from agents.deadline import record_degraded
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Background processing configuration
+QUERY_WORKERS = int(os.getenv("QUERY_WORKERS", 8))
+QUERY_QUEUE_SIZE = int(os.getenv("QUERY_QUEUE_SIZE", 1000))
+
+# Per-stage policy of the query pipeline
+PIPELINE_STAGE_TIMEOUT = float(os.getenv("PIPELINE_STAGE_TIMEOUT", 45.0))
+PIPELINE_STAGE_RETRIES = int(os.getenv("PIPELINE_STAGE_RETRIES", 1))
+PIPELINE_RETRY_BACKOFF = float(os.getenv("PIPELINE_RETRY_BACKOFF", 0.5))
+
+# Queries scoring below this threshold need a doctor's review
+SAFETY_THRESHOLD = 0.7
+
+
+async def keep_original_query(query_text: str) -> str:
+    return query_text
+
+
+async def score_locally(query_text: str) -> float:
+    return get_safety_lexicon().score(query_text)
+
+
+# enhance -> score -> triage. Each stage falls back to a local result so a
+# slow or failing agent degrades the query instead of failing it.
+QUERY_PIPELINE = Pipeline("query", [
+    Stage(
+        "enhance", enhance_query,
+        inputs={"query_text": "query_text"}, outputs="enhanced_query",
+        timeout=PIPELINE_STAGE_TIMEOUT, retries=PIPELINE_STAGE_RETRIES,
+        retry_backoff=PIPELINE_RETRY_BACKOFF, fallback=keep_original_query
+    ),
+    Stage(
+        "score", calculate_safety_score,
+        inputs={"query_text": "enhanced_query"}, outputs="safety_score",
+        timeout=PIPELINE_STAGE_TIMEOUT, retries=PIPELINE_STAGE_RETRIES,
+        retry_backoff=PIPELINE_RETRY_BACKOFF, fallback=score_locally
+    ),
+    Stage(
+        "triage", determine_triage_level,
+        inputs={"query_text": "enhanced_query", "safety_score": "safety_score"}, outputs="triage_level",
+        timeout=PIPELINE_STAGE_TIMEOUT
+    ),
+])
+
+
+def final_status(query: Query) -> StatusEnum:
+    """
+    Determine the status of a query once all agents have run.
+
+    Args:
+        query: The processed query
+
+    Returns:
+        NEEDS_REVIEW for urgent or low-safety queries, PROCESSING otherwise
+    """
+    if query.triage_level == TriageLevelEnum.URGENT:
+        return StatusEnum.NEEDS_REVIEW
+    elif query.safety_score is not None and query.safety_score < SAFETY_THRESHOLD:
+        return StatusEnum.NEEDS_REVIEW
+    else:
+        return StatusEnum.PROCESSING
+
+
+async def process_query(query: Query, session: Optional[AsyncSession] = None) -> Query:
+    """
+    Run a query through the enhancement, safety scoring and triage agents.
+
+    The agents run as QUERY_PIPELINE under the caller's request deadline, if
+    any; stages that degrade are recorded for deadline.degraded_stages().
+    When a session is given, progress is committed after every stage so
+    clients polling the query can follow it. With FUSED_AGENT_ENABLED the
+    three agents are replaced by a single structured call, falling back to
+    the chain if its output cannot be validated.
+
+    Args:
+        query: The query to process
+        session: Optional session used to persist intermediate results
+
+    Returns:
+        The processed query with its final status
+    """
+    async def checkpoint():
+        if session is not None:
+            query.updated_at = datetime.utcnow()
+            session.add(query)
+            await session.commit()
+
+    if FUSED_AGENT_ENABLED:
+        assessment = await assess_query(query.query_text)
+        if assessment is not None:
+            query.enhanced_query = assessment.enhanced_query
+            query.safety_score = assessment.safety_score
+            query.triage_level = assessment.triage_level
+            query.status = final_status(query)
+            await checkpoint()
+            return query
+
+    async def on_stage_complete(stage: str, context: dict):
+        for name in ("enhanced_query", "safety_score", "triage_level"):
+            if name in context:
+                setattr(query, name, context[name])
+        if stage == "triage":
+            query.status = final_status(query)
+        await checkpoint()
+
+    run = await QUERY_PIPELINE.run({"query_text": query.query_text}, on_stage_complete)
+    for stage in run.degraded():
+        record_degraded(stage)
+    logger.debug("Query %s stage timings: %s", query.query_id, run.timings())
+    return query
+
+
+class QueryWorkerPool:
+    """
+    Bounded pool of background workers running the agent pipeline.
+
+    Queries are submitted by primary key. Each worker loads the query in its
+    own session, marks it PROCESSING and commits as each agent completes.
+    """
+
+    def __init__(self, workers: int = QUERY_WORKERS, queue_size: int = QUERY_QUEUE_SIZE):
+        self.workers = workers
+        self.queue: "asyncio.Queue[int]" = asyncio.Queue(maxsize=queue_size)
+        self._tasks: List[asyncio.Task] = []
+        self.processed = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        """
+        Start the worker tasks.
+        """
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"query-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """
+        Stop the worker tasks. Queries still queued stay PENDING.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def is_full(self) -> bool:
+        return self.queue.full()
+
+    def submit(self, query_id: int) -> bool:
+        """
+        Queue a query for background processing.
+
+        Args:
+            query_id: Primary key of the query
+
+        Returns:
+            True if the query was queued, False if the queue is full
+        """
+        try:
+            self.queue.put_nowait(query_id)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _worker(self) -> None:
+        while True:
+            query_id = await self.queue.get()
+            try:
+                await self._process(query_id)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.exception("Background processing failed for query %s: %s", query_id, e)
+            finally:
+                self.queue.task_done()
+
+    async def _process(self, query_id: int) -> None:
+        # Keep attributes loaded across the per-stage commits
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            query = await session.get(Query, query_id)
+            if query is None:
+                logger.warning("Query %s vanished before processing", query_id)
+                return
+
+            query.status = StatusEnum.PROCESSING
+            query.updated_at = datetime.utcnow()
+            session.add(query)
+            await session.commit()
+
+            try:
+                await process_query(query, session)
+            except Exception:
+                # Leave failed queries for a doctor rather than stuck in PROCESSING
+                await session.rollback()
+                query.status = StatusEnum.NEEDS_REVIEW
+                session.add(query)
+                await session.commit()
+                raise
+
+
+# Process-wide pool, started and stopped by main.lifespan
+query_worker_pool = QueryWorkerPool()